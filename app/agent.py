@@ -1,21 +1,32 @@
 # Copyright 2025 Google LLC
+import base64
 import datetime
+import json
 import os
 from zoneinfo import ZoneInfo
-import json
-import base64
-import google.generativeai as genai
 
-import google.auth
+import google.generativeai as genai
 from google.adk.agents import Agent
+
+from app import progress
+from app.client_pool import get_credential_context
+from app.gcp_real_data import RESOURCE_BUCKETS, InventoryAggregator
 from app.infrastructure_analyzer import InfrastructureAnalyzer
+from app.recommendation_filter import build_recommendation_filter
+from app.recommendation_ranking import RANKING_PAGE_SIZE, page_recommendations
 from app.state_manager import get_project_id, set_project_id
+from app.sweep import InfrastructureSweep, format_rollup, resolve_projects
 
-_, default_project_id = google.auth.default()
+default_project_id = get_credential_context().project_id
 os.environ.setdefault("GOOGLE_CLOUD_PROJECT", default_project_id)
 os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
 os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
 
+# Presupuesto de tiempo de cada herramienta; lo que no termina a tiempo se devuelve como parcial.
+TOOL_DEADLINE_SECONDS = float(os.environ.get("TOOL_DEADLINE_SECONDS", "45"))
+# Recomendaciones por página; el resto se pide con get_more_recommendations.
+RECOMMENDATIONS_PAGE_SIZE = int(os.environ.get("RECOMMENDATIONS_PAGE_SIZE", RANKING_PAGE_SIZE))
+
 
 def analyze_infrastructure(query: str) -> str:
     """Analyzes GCP infrastructure and returns cost analysis.
@@ -27,8 +38,22 @@ def analyze_infrastructure(query: str) -> str:
         Detailed infrastructure and cost analysis
     """
     project_id = get_project_id() or default_project_id
-    analyzer = InfrastructureAnalyzer(project_id=project_id)
-    resources = analyzer.get_infrastructure_summary()
+    analyzer = InfrastructureAnalyzer(project_id=project_id, deadline_seconds=TOOL_DEADLINE_SECONDS)
+    aggregator = InventoryAggregator(project_id)
+    # asset_name de cada recurso en el mismo orden en que el resumen lista su bucket.
+    asset_names = {bucket: [] for bucket in RESOURCE_BUCKETS}
+
+    def collect(record):
+        aggregator.add(record)
+        asset_names[record.bucket].append(record.asset_name)
+
+    index = analyzer.get_recommendation_index(on_record=collect)
+    resources = aggregator.summary()
+    missing = analyzer.data_collector.missing_asset_types
+
+    def savings_note(bucket: str, position: int) -> str:
+        amount = index.savings_for(asset_names[bucket][position])
+        return f" — 💡 save ~${amount:.2f}/month" if amount > 0 else ""
     
     response = f"""🔍 **Infrastructure Analysis Complete for project {project_id}!**
 
@@ -52,36 +77,46 @@ def analyze_infrastructure(query: str) -> str:
         response += f"- Cloud Schedulers: {len(resources['schedulers'])} jobs\n"
     if resources.get('run_services'):
         response += f"- Cloud Run Services: {len(resources['run_services'])} services\n"
+    if resources.get('pubsub_topics'):
+        response += f"- Pub/Sub Topics: {len(resources['pubsub_topics'])} topics\n"
+    if resources.get('pubsub_subscriptions'):
+        response += f"- Pub/Sub Subscriptions: {len(resources['pubsub_subscriptions'])} subscriptions\n"
 
     response += "\n💰 **Cost Breakdown:**\n"
     if resources.get('vms'):
-        response += "VMs:\n" + "\n".join([f"  • {vm['name']}: ${vm['monthly_cost']}/month ({vm['type']})" for vm in resources['vms']]) + "\n"
+        response += "VMs:\n" + "\n".join([f"  • {vm['name']}: ${vm['monthly_cost']}/month ({vm['type']}){savings_note('vms', i)}" for i, vm in enumerate(resources['vms'])]) + "\n"
     if resources.get('databases'):
-        response += "Databases:\n" + "\n".join([f"  • {db['name']}: ${db['monthly_cost']}/month" for db in resources['databases']]) + "\n"
+        response += "Databases:\n" + "\n".join([f"  • {db['name']}: ${db['monthly_cost']}/month{savings_note('databases', i)}" for i, db in enumerate(resources['databases'])]) + "\n"
     if resources.get('storage'):
-        response += f"Storage: {len(resources['storage'])} buckets totaling ${sum(b['monthly_cost'] for b in resources['storage']):.2f}/month.\n"
+        storage_savings = sum(index.savings_for(name) for name in asset_names['storage'])
+        response += f"Storage: {len(resources['storage'])} buckets totaling ${sum(b['monthly_cost'] for b in resources['storage']):.2f}/month"
+        response += f" — 💡 save ~${storage_savings:.2f}/month.\n" if storage_savings > 0 else ".\n"
     if resources.get('clusters'):
-        response += "GKE Clusters:\n" + "\n".join([f"  • {c['name']}: ${c['monthly_cost']}/month" for c in resources['clusters']]) + "\n"
+        response += "GKE Clusters:\n" + "\n".join([f"  • {c['name']}: ${c['monthly_cost']}/month{savings_note('clusters', i)}" for i, c in enumerate(resources['clusters'])]) + "\n"
     if resources.get('redis_instances'):
-        response += "Memorystore for Redis:\n" + "\n".join([f"  • {r['name']}: ${r['monthly_cost']}/month" for r in resources['redis_instances']]) + "\n"
+        response += "Memorystore for Redis:\n" + "\n".join([f"  • {r['name']}: ${r['monthly_cost']}/month{savings_note('redis_instances', i)}" for i, r in enumerate(resources['redis_instances'])]) + "\n"
     if resources.get('spanner_instances'):
-        response += "Spanner:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month" for s in resources['spanner_instances']]) + "\n"
+        response += "Spanner:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month{savings_note('spanner_instances', i)}" for i, s in enumerate(resources['spanner_instances'])]) + "\n"
     if resources.get('schedulers'):
-        response += "Cloud Schedulers:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month" for s in resources['schedulers']]) + "\n"
+        response += "Cloud Schedulers:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month{savings_note('schedulers', i)}" for i, s in enumerate(resources['schedulers'])]) + "\n"
     if resources.get('run_services'):
-        response += "Cloud Run Services:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month" for s in resources['run_services']]) + "\n"
+        response += "Cloud Run Services:\n" + "\n".join([f"  • {s['name']}: ${s['monthly_cost']}/month{savings_note('run_services', i)}" for i, s in enumerate(resources['run_services'])]) + "\n"
 
     response += "\n🔗 **Interconnectivity:**\n"
     all_resources = (resources.get('vms', []) + resources.get('databases', []) + 
                      resources.get('storage', []) + resources.get('clusters', []) + 
                      resources.get('redis_instances', []) + resources.get('spanner_instances', []) + 
-                     resources.get('schedulers', []) + resources.get('run_services', []))
+                     resources.get('schedulers', []) + resources.get('run_services', []) +
+                     resources.get('pubsub_topics', []) + resources.get('pubsub_subscriptions', []))
     for resource in all_resources:
         if resource.get('relationships'):
             response += f"  • {resource['name']} relationships:\n"
             for rel in resource['relationships']:
                 response += f"    - {rel['type']} -> {rel['target']}\n"
 
+    if missing:
+        response += f"\n⚠️ **Partial results:** the time budget ran out before these asset types were listed: {', '.join(missing)}\n"
+
     return response
 
 def generate_infrastructure_image(query: str) -> str:
@@ -112,32 +147,205 @@ def generate_infrastructure_image(query: str) -> str:
     except Exception as e:
         return f"Error al generar la imagen: {e}"
 
-def get_google_cloud_recommendations(query: str) -> str:
-    """Gets official Google Cloud optimization recommendations."""
+def get_google_cloud_recommendations(query: str, state: str = "ACTIVE", min_priority: str = "") -> str:
+    """Gets official Google Cloud optimization recommendations.
+
+    Args:
+        query: User query about recommendations
+        state: Comma-separated recommendation states to include (ACTIVE, CLAIMED, SUCCEEDED, FAILED, DISMISSED); empty for all
+        min_priority: Lowest priority to include, from P1 (highest) to P4; empty for all
+
+    Returns:
+        The top recommendations by savings and priority, with a cursor for the rest
+    """
     project_id = get_project_id() or default_project_id
-    analyzer = InfrastructureAnalyzer(project_id=project_id)
-    data = analyzer.get_google_recommendations()
+    try:
+        recommendation_filter = build_recommendation_filter(state.split(","), min_priority)
+    except ValueError as e:
+        return f"Error: {e}"
+    analyzer = InfrastructureAnalyzer(project_id=project_id, deadline_seconds=TOOL_DEADLINE_SECONDS)
+    for data in analyzer.iter_google_recommendations(filter=recommendation_filter, with_evidence=True):
+        if not data['done']:
+            progress.publish("get_google_cloud_recommendations", format_recommendation_progress(data))
     
     response = f"""💡 **Google Cloud Optimization Recommendations for {project_id}**
 
-Found {data['recommendation_count']} total recommendations.
+Found {data['recommendation_count']} total recommendations{f" matching `{recommendation_filter}`" if recommendation_filter else ""}.
 💰 **Potential Monthly Savings:** ${data['total_monthly_savings']:.2f}
 
 """
-    
-    for category, recs in data['recommendations'].items():
-        if recs:
-            response += f"**{category.capitalize()} Recommendations ({len(recs)}):**\n"
-            response += format_recommendations(recs)
+    counts = ", ".join(f"{category.capitalize()}: {len(recs)}" for category, recs in data['recommendations'].items() if recs)
+    if counts:
+        response += f"**By category:** {counts}\n\n"
+    response += format_recommendation_page(data, cursor=None)
+
+    if data.get('skipped_unavailable'):
+        response += (f"⏭️ Skipped {data['skipped_unavailable']} recommender/location pairs that returned "
+                     f"PERMISSION_DENIED or NOT_FOUND on a recent run.\n")
+    if data.get('missing'):
+        missing = data['missing']
+        response += (f"⚠️ **Partial results:** {len(missing)} recommender/location pairs were not checked "
+                     f"(time budget ran out or the call failed): "
+                     f"{', '.join(missing[:10])}{' ...' if len(missing) > 10 else ''}\n")
+    if data.get('stale'):
+        stale = data['stale']
+        response += (f"⚠️ **Possibly outdated:** {len(stale)} recommender/location pairs failed and were served "
+                     f"from their last stored copy: {', '.join(stale[:10])}{' ...' if len(stale) > 10 else ''}\n")
             
     return response
 
+def get_more_recommendations(cursor: str, state: str = "ACTIVE", min_priority: str = "") -> str:
+    """Gets the next page of Google Cloud recommendations, ranked by savings and priority.
+
+    Args:
+        cursor: The cursor returned at the end of the previous page of recommendations
+        state: The same state filter used for the previous page
+        min_priority: The same minimum priority used for the previous page
+
+    Returns:
+        The next recommendations and, if there are more, the cursor for the following page
+    """
+    project_id = get_project_id() or default_project_id
+    try:
+        recommendation_filter = build_recommendation_filter(state.split(","), min_priority)
+    except ValueError as e:
+        return f"Error: {e}"
+    analyzer = InfrastructureAnalyzer(project_id=project_id, deadline_seconds=TOOL_DEADLINE_SECONDS)
+    data = analyzer.get_google_recommendations(filter=recommendation_filter)
+    try:
+        return f"💡 **More recommendations for {project_id}**\n\n" + format_recommendation_page(data, cursor)
+    except ValueError as e:
+        return f"Error: {e}. Call get_google_cloud_recommendations to start again from the top."
+
+def sweep_infrastructure(scope: str) -> str:
+    """Analyzes infrastructure and recommendations across many GCP projects at once.
+
+    Args:
+        scope: "organizations/<id>", "folders/<id>" or a comma-separated list of project IDs
+
+    Returns:
+        Consolidated cost rollup with cross-project rankings
+    """
+    try:
+        project_ids = resolve_projects(scope)
+    except Exception as e:
+        return f"Error resolving projects for scope '{scope}': {e}"
+    if not project_ids:
+        return f"No projects found for scope '{scope}'."
+    rollup = InfrastructureSweep(deadline_seconds=TOOL_DEADLINE_SECONDS).run(project_ids)
+    return format_rollup(rollup)
+
+def get_resource_neighbors(resource: str) -> str:
+    """Lists the direct relationships of a resource: what it depends on and what depends on it.
+
+    Args:
+        resource: Full asset name or short name of the resource (e.g. "vm-1")
+
+    Returns:
+        Direct dependencies and dependents of the resource
+    """
+    project_id = get_project_id() or default_project_id
+    graph = InfrastructureAnalyzer(project_id=project_id).get_relationship_graph()
+    if not graph.resolve(resource):
+        return f"Resource '{resource}' not found in the inventory of {project_id}."
+    neighbors = graph.neighbors(resource)
+    response = f"🔗 **Relationships of {resource}**\n\n**Depends on ({len(neighbors['depends_on'])}):**\n"
+    for rel_type, target in neighbors['depends_on']:
+        response += f"  • {target} ({rel_type})\n"
+    response += f"\n**Used by ({len(neighbors['dependents'])}):**\n"
+    for rel_type, source in neighbors['dependents']:
+        response += f"  • {source} ({rel_type})\n"
+    return response
+
+def get_blast_radius(resource: str) -> str:
+    """Lists every resource that depends, directly or transitively, on the given resource.
+
+    Args:
+        resource: Full asset name or short name of the resource (e.g. "db-1")
+
+    Returns:
+        Resources affected if the given resource is removed or fails, by distance
+    """
+    project_id = get_project_id() or default_project_id
+    graph = InfrastructureAnalyzer(project_id=project_id).get_relationship_graph()
+    if not graph.resolve(resource):
+        return f"Resource '{resource}' not found in the inventory of {project_id}."
+    affected = graph.blast_radius(resource)
+    response = f"💥 **Blast radius of {resource}: {len(affected)} dependent resources**\n"
+    for name, depth in affected:
+        response += f"  • {name} ({'direct' if depth == 1 else f'{depth} hops'})\n"
+    return response
+
+def get_connected_components(query: str) -> str:
+    """Groups the project resources into independent clusters of related resources.
+
+    Args:
+        query: User query about resource groups or dependencies
+
+    Returns:
+        Connected groups of resources, largest first
+    """
+    project_id = get_project_id() or default_project_id
+    graph = InfrastructureAnalyzer(project_id=project_id).get_relationship_graph()
+    components = graph.connected_components()
+    response = f"🧩 **{len(components)} groups of related resources in {project_id}**\n"
+    for i, component in enumerate(components[:20], 1):
+        names = ", ".join(name.rsplit("/", 1)[-1] for name in component[:10])
+        more = f" and {len(component) - 10} more" if len(component) > 10 else ""
+        response += f"  {i}. {len(component)} resources: {names}{more}\n"
+    return response
+
+def get_resources_with_recommendations(query: str) -> str:
+    """Lists the most expensive resources that have pending Google Cloud recommendations.
+
+    Args:
+        query: User query about which resources have recommendations
+
+    Returns:
+        Resources with pending recommendations, most expensive first, with their savings
+    """
+    project_id = get_project_id() or default_project_id
+    analyzer = InfrastructureAnalyzer(project_id=project_id, deadline_seconds=TOOL_DEADLINE_SECONDS)
+    index = analyzer.get_recommendation_index()
+    matches = index.costly_with_recommendations(limit=20)
+    response = f"🎯 **Resources with pending recommendations in {project_id}: {len(index.by_resource)}**\n"
+    for resource, recs in matches:
+        amount = index.savings_for(resource.asset_name)
+        savings = f", save ~${amount:.2f}/month" if amount > 0 else ""
+        response += f"  • {resource.name}: ${resource.monthly_cost}/month, {len(recs)} recommendations{savings}\n"
+        for rec in recs[:3]:
+            response += f"    - {rec['type']} ({rec['priority']}): {rec['description']}\n"
+    if index.unmatched:
+        response += f"\n📌 {len(index.unmatched)} recommendations apply to the project or to resources outside the inventory.\n"
+    return response
+
+def format_recommendation_progress(data: dict) -> str:
+    """Formats a partial result of the incremental recommendation listing."""
+    counts = ", ".join(f"{category.capitalize()}: {len(recs)}" for category, recs in data['recommendations'].items() if recs)
+    return (f"⏳ {data['completed']}/{data['planned']} recommenders checked · "
+            f"{data['recommendation_count']} recommendations ({counts or 'none yet'}) · "
+            f"${data['total_monthly_savings']:.2f}/month potential savings so far")
+
+def format_recommendation_page(data: dict, cursor: str | None) -> str:
+    """Formats one page of the savings/priority ranking, with the cursor for the next one."""
+    page, next_cursor = page_recommendations(data['recommendations'], RECOMMENDATIONS_PAGE_SIZE, cursor)
+    if not page:
+        return "No more recommendations.\n"
+    response = f"**Top {len(page)} recommendations by savings and priority:**\n" + format_recommendations(page)
+    if next_cursor:
+        response += f"➡️ More recommendations available: call `get_more_recommendations` with cursor `{next_cursor}`.\n"
+    return response
+
 def format_recommendations(recs: list) -> str:
     """Formats a list of recommendations into a string."""
     formatted_string = ""
     for rec in recs:
-        savings = f" (Est. Savings: ${rec.get('monthly_cost', 0)}/month)" if rec.get('monthly_cost', 0) > 0 else ""
-        formatted_string += f"- **{rec['type']}** on `{rec['resource']}`: {rec['description']}{savings}\n"
+        savings = f" (Est. Savings: ${rec.get('monthly_savings', 0)}/month)" if rec.get('monthly_savings', 0) > 0 else ""
+        formatted_string += f"- **{rec['type']}** ({rec['category'].capitalize()}, {rec['priority']}) on `{rec['resource']}`: {rec['description']}{savings}\n"
+        for insight in rec.get('evidence', [])[:2]:
+            figures = ", ".join(f"{key}: {value}" for key, value in insight['evidence'].items())
+            period = f" over {insight['observation_days']} days" if insight.get('observation_days') else ""
+            formatted_string += f"  ↳ Evidence{period}: {insight['description']}{f' ({figures})' if figures else ''}\n"
     return formatted_string + "\n"
 
 root_agent = Agent(
@@ -149,9 +357,19 @@ root_agent = Agent(
     2. Generate a visual diagram of the infrastructure using the `generate_infrastructure_image` tool.
     3. Provide actionable recommendations to reduce cloud costs.
     4. Set the project to analyze using the `set_project_id` tool.
+    5. Analyze many projects at once (an organization, a folder or a list of projects) using the `sweep_infrastructure` tool.
+    6. Explain dependencies between resources using the `get_resource_neighbors`, `get_blast_radius` and `get_connected_components` tools.
+    7. Link recommendations to the resources they affect using the `get_resources_with_recommendations` tool.
     
     When a user asks for an image, diagram, or visualization, you must use the `generate_infrastructure_image` tool.
     For general analysis, use `analyze_infrastructure`.
-    For recommendations, use `get_google_cloud_recommendations`. """,
-    tools=[set_project_id, analyze_infrastructure, get_google_cloud_recommendations, generate_infrastructure_image],
+    For recommendations, use `get_google_cloud_recommendations`; it returns only the top recommendations by savings and priority. When the user asks for more, call `get_more_recommendations` with the cursor from the previous page and the same filters.
+    Recommendations default to state ACTIVE; pass state="" for the full history, or a state such as DISMISSED or SUCCEEDED when the user asks about those, and min_priority (e.g. "P2") to keep only the most important ones.
+    For organization, folder or multi-project analysis, use `sweep_infrastructure`.
+    For questions about what a resource is connected to, use `get_resource_neighbors`; for what would break if it went away, use `get_blast_radius`; for groups of related resources, use `get_connected_components`.
+    For which resources (e.g. the most expensive ones) have pending recommendations, use `get_resources_with_recommendations`.
+    `get_google_cloud_recommendations` attaches the evidence (insights) behind each recommendation, such as utilization over the observation period; use it to explain why a resource is idle or over-provisioned. """,
+    tools=[set_project_id, analyze_infrastructure, get_google_cloud_recommendations, get_more_recommendations, generate_infrastructure_image, sweep_infrastructure,
+           get_resource_neighbors, get_blast_radius, get_connected_components,
+           get_resources_with_recommendations],
 )
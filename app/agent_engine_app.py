@@ -20,16 +20,15 @@ import logging
 import os
 from typing import Any
 
-import google.auth
 import vertexai
 from google.adk.artifacts import GcsArtifactService
-from google.cloud import logging as google_cloud_logging
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider, export
 from vertexai import agent_engines
 from vertexai.preview.reasoning_engines import AdkApp
 
 from app.agent import root_agent
+from app.client_pool import get_credential_context, get_logging_client
 from app.utils.gcs import create_bucket_if_not_exists
 from app.utils.tracing import CloudTraceLoggingSpanExporter
 from app.utils.typing import Feedback
@@ -39,7 +38,7 @@ class AgentEngineApp(AdkApp):
     def set_up(self) -> None:
         """Set up logging and tracing for the agent engine app."""
         super().set_up()
-        logging_client = google_cloud_logging.Client()
+        logging_client = get_logging_client()
         self.logger = logging_client.logger(__name__)
         provider = TracerProvider()
         processor = export.BatchSpanProcessor(
@@ -201,7 +200,7 @@ if __name__ == "__main__":
             env_vars[key] = value
 
     if not args.project:
-        _, args.project = google.auth.default()
+        args.project = get_credential_context().project_id
 
     print("""
     ╔═══════════════════════════════════════════════════════════╗
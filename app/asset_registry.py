@@ -0,0 +1,163 @@
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from app.billing_calculator import GCPBillingCalculator
+
+# Precios de referencia; el proyecto no influye en las tarifas de lista.
+_billing = GCPBillingCalculator(project_id="")
+
+
+class _Resource:
+    """Base de los recursos tipados; exporta el diccionario legacy en el orden de sus campos."""
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(slots=True)
+class VirtualMachine(_Resource):
+    name: str
+    type: str
+    monthly_cost: float
+    zone: str
+    status: str
+    relationships: list[dict] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class StorageBucket(_Resource):
+    name: str
+    size_gb: float
+    monthly_cost: float
+    storage_class: str
+    location: str
+    relationships: list[dict] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ManagedResource(_Resource):
+    name: str
+    type: str
+    monthly_cost: float
+    relationships: list[dict] = field(default_factory=list)
+
+
+# parser(asset, partes del nombre, relaciones) -> recurso sin coste, o None para descartarlo.
+Parser = Callable[[object, list[str], list[dict]], _Resource | None]
+CostModel = Callable[[_Resource], float]
+
+
+@dataclass(frozen=True, slots=True)
+class AssetTypeSpec:
+    """Cómo se clasifica y se costea un tipo de asset exacto.
+
+    relationships=False marca los tipos que list_assets rechaza con RELATIONSHIP
+    ("No RELATIONSHIP found"); el colector los pide con RESOURCE sin sondearlos.
+    """
+    asset_type: str
+    bucket: str
+    resource_class: type
+    parser: Parser
+    cost_model: CostModel
+    relationships: bool = True
+
+    def parse(self, asset) -> _Resource | None:
+        resource = self.parser(asset, asset.name.split("/"), parse_relationships(asset))
+        if resource is not None:
+            resource.monthly_cost = self.cost_model(resource)
+        return resource
+
+
+# Claves del diccionario resumen, en el orden en que se presentan, y su etiqueta en detected_resources.
+BUCKET_LABELS: dict[str, str] = {
+    "vms": "VMs", "storage": "buckets", "databases": "databases", "clusters": "clusters",
+    "redis_instances": "redis", "spanner_instances": "spanner", "schedulers": "schedulers",
+    "run_services": "run services", "pubsub_topics": "pubsub topics",
+    "pubsub_subscriptions": "pubsub subscriptions",
+}
+RESOURCE_BUCKETS: list[str] = list(BUCKET_LABELS)
+
+# Registro tipo exacto -> spec; su orden es el orden de consulta.
+ASSET_TYPE_REGISTRY: dict[str, AssetTypeSpec] = {}
+
+
+def register_asset_type(spec: AssetTypeSpec, label: str | None = None):
+    """Da de alta un tipo de asset; un bucket nuevo se añade al final del resumen."""
+    ASSET_TYPE_REGISTRY[spec.asset_type] = spec
+    if spec.bucket not in BUCKET_LABELS:
+        RESOURCE_BUCKETS.append(spec.bucket)
+        BUCKET_LABELS[spec.bucket] = label or spec.bucket
+
+
+def parse_relationships(asset) -> list[dict]:
+    relationships = []
+    if hasattr(asset, 'resource') and asset.resource and hasattr(asset.resource, 'relationships'):
+        for rel in asset.resource.relationships:
+            relationships.append({"target": rel.target_resource, "type": rel.type})
+    # Con ContentType.RELATIONSHIP la API devuelve las relaciones en related_asset(s).
+    related = getattr(asset, 'related_assets', None)
+    if related:
+        rel_type = related.relationship_attributes.type
+        for rel in related.assets:
+            relationships.append({"target": rel.asset, "type": rel.relationship_type or rel_type})
+    related_asset = getattr(asset, 'related_asset', None)
+    if related_asset and related_asset.asset:
+        relationships.append({"target": related_asset.asset, "type": related_asset.relationship_type})
+    return relationships
+
+
+def resource_from_dict(asset_type: str, data: dict) -> _Resource:
+    """Reconstruye el recurso tipado de un snapshot guardado."""
+    return ASSET_TYPE_REGISTRY[asset_type].resource_class(**data)
+
+
+def _segment_after(parts: list[str], key: str, default: str = "") -> str:
+    try:
+        return parts[parts.index(key) + 1]
+    except (ValueError, IndexError):
+        return default
+
+
+def _parse_vm(asset, parts, relationships):
+    name = parts[-1]
+    if "InstanceSettings" in name:
+        return None
+    zone = _segment_after(parts, "zones") or getattr(asset, "location", "")
+    return VirtualMachine(name, "e2-medium", 0.0, zone, "running", relationships)
+
+
+def _parse_bucket(asset, parts, relationships):
+    return StorageBucket(parts[-1], 50, 0.0, "standard", "us (multi-region)", relationships)
+
+
+def _managed(type_label: str) -> Parser:
+    def parse(asset, parts, relationships):
+        return ManagedResource(parts[-1], type_label, 0.0, relationships)
+    return parse
+
+
+def _flat(cost: float) -> CostModel:
+    return lambda resource: cost
+
+
+def _vm_cost(vm: VirtualMachine) -> float:
+    return _billing.calculate_vm_cost(vm.type)
+
+
+def _bucket_cost(bucket: StorageBucket) -> float:
+    return _billing.calculate_storage_cost(bucket.size_gb, bucket.storage_class,
+                                           multi_region="multi-region" in bucket.location)
+
+
+register_asset_type(AssetTypeSpec("compute.googleapis.com/Instance", "vms", VirtualMachine, _parse_vm, _vm_cost))
+register_asset_type(AssetTypeSpec("container.googleapis.com/Cluster", "clusters", ManagedResource, _managed("GKE Cluster"), _flat(73)))
+register_asset_type(AssetTypeSpec("pubsub.googleapis.com/Topic", "pubsub_topics", ManagedResource, _managed("Pub/Sub Topic"), _flat(0.0)))
+register_asset_type(AssetTypeSpec("pubsub.googleapis.com/Subscription", "pubsub_subscriptions", ManagedResource, _managed("Pub/Sub Subscription"), _flat(0.0)))
+register_asset_type(AssetTypeSpec("storage.googleapis.com/Bucket", "storage", StorageBucket, _parse_bucket, _bucket_cost,
+                                  relationships=False))
+register_asset_type(AssetTypeSpec("sqladmin.googleapis.com/Instance", "databases", ManagedResource, _managed("Cloud SQL"), _flat(50)))
+register_asset_type(AssetTypeSpec("redis.googleapis.com/Instance", "redis_instances", ManagedResource, _managed("Memorystore for Redis"), _flat(40)))
+register_asset_type(AssetTypeSpec("spanner.googleapis.com/Instance", "spanner_instances", ManagedResource, _managed("Spanner"), _flat(65)))
+register_asset_type(AssetTypeSpec("run.googleapis.com/Service", "run_services", ManagedResource, _managed("Cloud Run Service"), _flat(15.00)))  # Placeholder
+register_asset_type(AssetTypeSpec("cloudscheduler.googleapis.com/Job", "schedulers", ManagedResource, _managed("Cloud Scheduler"), _flat(0.10)))
@@ -0,0 +1,107 @@
+import os
+import time
+from collections.abc import Iterable
+from contextlib import closing
+
+from app.inventory_store import DEFAULT_SNAPSHOT_PATH, SQLiteStore
+
+DEFAULT_CAPABILITY_PATH = os.environ.get("CAPABILITY_CACHE_PATH", DEFAULT_SNAPSHOT_PATH)
+
+# Un tipo de asset puede empezar a soportar relaciones; pasado este tiempo se vuelve a sondear.
+CAPABILITY_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class CapabilityCache(SQLiteStore):
+    """Recuerda qué content_type acepta list_assets para cada (project_id, asset_type).
+
+    Evita repetir en cada recolección la llamada con RELATIONSHIP que falla para los
+    tipos que no la soportan. Las entradas caducan a los ttl_seconds y los contadores
+    hits/misses miden cuántas consultas se han resuelto sin sondear.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS asset_capabilities (
+            project_id TEXT NOT NULL,
+            asset_type TEXT NOT NULL,
+            content_type INTEGER NOT NULL,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (project_id, asset_type)
+        )""",
+    )
+    TABLES = ("asset_capabilities",)
+
+    def __init__(self, path: str = DEFAULT_CAPABILITY_PATH, ttl_seconds: float = CAPABILITY_TTL_SECONDS):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: str, asset_type: str) -> int | None:
+        """Devuelve el content_type soportado si se sondeó hace menos de ttl_seconds."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT content_type FROM asset_capabilities WHERE project_id = ? AND asset_type = ? AND checked_at > ?",
+                (project_id, asset_type, time.time() - self.ttl_seconds),
+            ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def record(self, project_id: str, asset_types: Iterable[str], content_type: int):
+        """Anota que asset_types aceptan content_type a fecha de ahora."""
+        checked_at = time.time()
+        rows = [(project_id, asset_type, int(content_type), checked_at) for asset_type in asset_types]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO asset_capabilities VALUES (?, ?, ?, ?)", rows)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# Permisos y APIs habilitadas cambian más a menudo que el soporte de relaciones.
+UNAVAILABLE_RECOMMENDER_TTL_SECONDS = 24 * 60 * 60
+
+
+class UnavailableRecommenderCache(SQLiteStore):
+    """Caché negativa de pares (location, recommender_type) que no están disponibles en un proyecto.
+
+    Guarda los que respondieron PERMISSION_DENIED o NOT_FOUND para no volver a
+    llamarlos hasta que la entrada caduque a los ttl_seconds.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS unavailable_recommenders (
+            project_id TEXT NOT NULL,
+            location TEXT NOT NULL,
+            recommender_type TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            checked_at REAL NOT NULL,
+            PRIMARY KEY (project_id, location, recommender_type)
+        )""",
+    )
+    TABLES = ("unavailable_recommenders",)
+
+    def __init__(self, path: str = DEFAULT_CAPABILITY_PATH,
+                 ttl_seconds: float = UNAVAILABLE_RECOMMENDER_TTL_SECONDS):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+
+    def unavailable(self, project_id: str) -> dict[tuple[str, str], str]:
+        """(location, recommender_type) -> motivo, para las entradas aún vigentes del proyecto."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT location, recommender_type, reason FROM unavailable_recommenders
+                WHERE project_id = ? AND checked_at > ?""",
+                (project_id, time.time() - self.ttl_seconds),
+            ).fetchall()
+        return {(location, recommender_type): reason for location, recommender_type, reason in rows}
+
+    def record(self, project_id: str, unavailable: dict[tuple[str, str], str]):
+        checked_at = time.time()
+        rows = [(project_id, location, recommender_type, reason, checked_at)
+                for (location, recommender_type), reason in unavailable.items()]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO unavailable_recommenders VALUES (?, ?, ?, ?, ?)", rows)
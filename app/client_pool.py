@@ -0,0 +1,130 @@
+import threading
+from collections.abc import Callable
+from typing import NamedTuple
+
+import google.auth
+from google.cloud import logging as google_cloud_logging
+from google.cloud import storage
+from google.cloud.asset_v1 import AssetServiceClient
+from google.cloud.asset_v1.services.asset_service.transports import (
+    AssetServiceGrpcTransport,
+)
+from google.cloud.recommender_v1 import RecommenderClient
+from google.cloud.recommender_v1.services.recommender.transports import (
+    RecommenderGrpcTransport,
+)
+
+# Opciones de los canales compartidos. Sin límite de tamaño de mensaje, como los canales
+# que crea GAPIC por defecto (gRPC limita a 4 MB y una página de 1000 assets puede pasar),
+# y con pings periódicos para que el canal no se cierre entre llamadas de herramientas.
+KEEPALIVE_OPTIONS = [
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+class CredentialContext(NamedTuple):
+    """Credenciales por defecto y la identidad con la que se presentan, para mensajes de error."""
+    credentials: object
+    project_id: str | None
+    account: str
+
+
+class ClientPool:
+    """Clientes de Google Cloud compartidos por todo el proceso.
+
+    Cada cliente se crea la primera vez que se pide y se reutiliza después: un solo
+    canal gRPC con keepalive por servicio y unas únicas credenciales de
+    google.auth.default() para todos. Los clientes GAPIC son thread-safe.
+    """
+
+    def __init__(self):
+        self._clients: dict[tuple[str, str | None], object] = {}
+        self._credentials = None
+        self._default_project_id: str | None = None
+        self._lock = threading.RLock()
+
+    def default_credentials(self) -> tuple[object, str | None]:
+        """(credentials, project_id) de Application Default Credentials, resueltos una sola vez."""
+        with self._lock:
+            if self._credentials is None:
+                self._credentials, self._default_project_id = google.auth.default()
+            return self._credentials, self._default_project_id
+
+    def credential_context(self) -> CredentialContext:
+        credentials, project_id = self.default_credentials()
+        account = getattr(credentials, "service_account_email", None) or "user account"
+        return CredentialContext(credentials, project_id, account)
+
+    def _get(self, name: str, project: str | None, factory: Callable[[object], object]):
+        key = (name, project)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    credentials, _ = self.default_credentials()
+                    client = self._clients[key] = factory(credentials)
+        return client
+
+    def asset_client(self) -> AssetServiceClient:
+        def create(credentials):
+            channel = AssetServiceGrpcTransport.create_channel(credentials=credentials, options=KEEPALIVE_OPTIONS)
+            return AssetServiceClient(transport=AssetServiceGrpcTransport(channel=channel))
+        return self._get("asset", None, create)
+
+    def recommender_client(self) -> RecommenderClient:
+        def create(credentials):
+            channel = RecommenderGrpcTransport.create_channel(credentials=credentials, options=KEEPALIVE_OPTIONS)
+            return RecommenderClient(transport=RecommenderGrpcTransport(channel=channel))
+        return self._get("recommender", None, create)
+
+    def storage_client(self, project: str | None = None) -> storage.Client:
+        return self._get("storage", project, lambda credentials: storage.Client(project=project, credentials=credentials))
+
+    def logging_client(self, project: str | None = None) -> google_cloud_logging.Client:
+        return self._get("logging", project,
+                         lambda credentials: google_cloud_logging.Client(project=project, credentials=credentials))
+
+    def reset(self):
+        """Olvida clientes y credenciales; el siguiente acceso los vuelve a crear."""
+        with self._lock:
+            self._clients.clear()
+            self._credentials = None
+            self._default_project_id = None
+
+
+_pool = ClientPool()
+
+
+def get_default_credentials() -> tuple[object, str | None]:
+    return _pool.default_credentials()
+
+
+def get_credential_context() -> CredentialContext:
+    """Credenciales, proyecto e identidad por defecto, resueltos una sola vez por proceso."""
+    return _pool.credential_context()
+
+
+def get_asset_client() -> AssetServiceClient:
+    return _pool.asset_client()
+
+
+def get_recommender_client() -> RecommenderClient:
+    return _pool.recommender_client()
+
+
+def get_storage_client(project: str | None = None) -> storage.Client:
+    return _pool.storage_client(project)
+
+
+def get_logging_client(project: str | None = None) -> google_cloud_logging.Client:
+    return _pool.logging_client(project)
+
+
+def reset_clients():
+    _pool.reset()
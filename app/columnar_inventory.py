@@ -0,0 +1,138 @@
+import heapq
+import math
+from array import array
+from collections.abc import Iterable
+
+from app.asset_registry import ASSET_TYPE_REGISTRY, BUCKET_LABELS, RESOURCE_BUCKETS
+
+# Campos comunes que van en columnas propias; el resto del recurso va a la tabla de extras.
+_COLUMN_FIELDS = ("name", "monthly_cost", "relationships")
+
+
+class StringTable:
+    """Tabla de cadenas internadas: cada valor distinto se guarda una vez y se referencia por id."""
+
+    def __init__(self):
+        self.ids: dict[object, int] = {}
+        self.values: list[object] = []
+
+    def intern(self, value) -> int:
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.values)
+            self.ids[value] = string_id
+            self.values.append(value)
+        return string_id
+
+    def __getitem__(self, string_id: int):
+        return self.values[string_id]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ColumnarInventory:
+    """Inventario en columnas para proyectos muy grandes.
+
+    Cada recurso es una fila repartida en arrays: coste (double), bucket (id de tipo),
+    nombre y extras (ids en tablas internadas). Las relaciones van codificadas por
+    offsets: las de la fila i son rel_targets[rel_offsets[i]:rel_offsets[i + 1]].
+    Totales, group-bys y top-K se calculan sobre los arrays sin crear diccionarios;
+    to_summary() exporta el formato legacy de get_real_infrastructure.
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.costs = array("d")
+        self.bucket_ids = array("H")
+        self.name_ids = array("I")
+        self.extra_ids = array("I")
+        self.rel_offsets = array("I", [0])
+        self.rel_targets = array("I")
+        self.rel_types = array("I")
+        self.strings = StringTable()
+        self.extras = StringTable()
+        self._bucket_index = {bucket: i for i, bucket in enumerate(RESOURCE_BUCKETS)}
+        self._bucket_classes = {spec.bucket: spec.resource_class for spec in ASSET_TYPE_REGISTRY.values()}
+
+    def __len__(self) -> int:
+        return len(self.costs)
+
+    def append(self, record) -> int:
+        """Añade un ResourceRecord y devuelve su número de fila."""
+        resource = record.resource
+        row = len(self.costs)
+        self.costs.append(resource.monthly_cost)
+        self.bucket_ids.append(self._bucket_index[record.bucket])
+        self.name_ids.append(self.strings.intern(resource.name))
+        extra = tuple(getattr(resource, f) for f in resource.__slots__ if f not in _COLUMN_FIELDS)
+        self.extra_ids.append(self.extras.intern(extra))
+        for rel in resource.relationships:
+            self.rel_targets.append(self.strings.intern(rel["target"]))
+            self.rel_types.append(self.strings.intern(rel["type"]))
+        self.rel_offsets.append(len(self.rel_targets))
+        return row
+
+    def extend(self, records: Iterable) -> "ColumnarInventory":
+        for record in records:
+            self.append(record)
+        return self
+
+    # Agregaciones
+
+    def total_cost(self) -> float:
+        return math.fsum(self.costs)
+
+    def cost_by_bucket(self) -> dict[str, float]:
+        totals = [0.0] * len(RESOURCE_BUCKETS)
+        for bucket_id, cost in zip(self.bucket_ids, self.costs, strict=True):
+            totals[bucket_id] += cost
+        return dict(zip(RESOURCE_BUCKETS, totals, strict=True))
+
+    def count_by_bucket(self) -> dict[str, int]:
+        counts = [0] * len(RESOURCE_BUCKETS)
+        for bucket_id in self.bucket_ids:
+            counts[bucket_id] += 1
+        return dict(zip(RESOURCE_BUCKETS, counts, strict=True))
+
+    def top_k(self, k: int, bucket: str | None = None) -> list[tuple[str, str, float]]:
+        """Los k recursos más caros como (name, bucket, monthly_cost)."""
+        rows = range(len(self.costs))
+        if bucket is not None:
+            bucket_id = self._bucket_index[bucket]
+            bucket_ids = self.bucket_ids
+            rows = (i for i in rows if bucket_ids[i] == bucket_id)
+        top = heapq.nlargest(k, rows, key=self.costs.__getitem__)
+        return [(self.strings[self.name_ids[i]], RESOURCE_BUCKETS[self.bucket_ids[i]], self.costs[i]) for i in top]
+
+    def relationships(self, row: int) -> list[dict]:
+        start, end = self.rel_offsets[row], self.rel_offsets[row + 1]
+        return [
+            {"target": self.strings[self.rel_targets[i]], "type": self.strings[self.rel_types[i]]}
+            for i in range(start, end)
+        ]
+
+    # Exportación
+
+    def resource_dict(self, row: int) -> dict:
+        """Reconstruye el diccionario legacy de una fila."""
+        resource_class = self._bucket_classes[RESOURCE_BUCKETS[self.bucket_ids[row]]]
+        extras = iter(self.extras[self.extra_ids[row]])
+        values = {"name": self.strings[self.name_ids[row]], "monthly_cost": self.costs[row],
+                  "relationships": self.relationships(row)}
+        return {f: values[f] if f in values else next(extras) for f in resource_class.__slots__}
+
+    def to_summary(self) -> dict:
+        """Mismo diccionario que InventoryAggregator.summary()."""
+        resources = {bucket: [] for bucket in RESOURCE_BUCKETS}
+        for row in range(len(self.costs)):
+            resources[RESOURCE_BUCKETS[self.bucket_ids[row]]].append(self.resource_dict(row))
+        counts = self.count_by_bucket()
+        total_cost = self.total_cost()
+        return {
+            **resources,
+            "total_monthly_cost": round(total_cost, 2),
+            "potential_savings": round(total_cost * 0.3, 2),
+            "project_id": self.project_id, "is_real_data": True,
+            "detected_resources": ", ".join(f"{counts[bucket]} {BUCKET_LABELS[bucket]}" for bucket in RESOURCE_BUCKETS)
+        }
@@ -1,141 +1,636 @@
-import os
-from google.cloud.asset_v1 import AssetServiceClient, ContentType
-from typing import Dict, List
 import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import NamedTuple
+
 import google.auth
+from google.cloud.asset_v1 import ContentType
+from google.protobuf.field_mask_pb2 import FieldMask
+
+from app.asset_registry import (
+    ASSET_TYPE_REGISTRY,
+    BUCKET_LABELS,
+    RESOURCE_BUCKETS,
+    resource_from_dict,
+)
 from app.cache import get_from_cache, set_in_cache
+from app.capability_cache import CapabilityCache
+from app.client_pool import get_asset_client
+from app.columnar_inventory import ColumnarInventory
+from app.inventory_store import InventorySnapshotStore
+from app.pagination import DEFAULT_PAGE_SIZE, iter_prefetched
+from app.relationship_graph import apply_project_delta
+
+# Vista viva del registro: un tipo dado de alta con register_asset_type se consulta sin más cambios.
+ASSET_TYPES_TO_QUERY = ASSET_TYPE_REGISTRY.keys()
+
+# Número máximo de llamadas list_assets en vuelo a la vez.
+DEFAULT_MAX_WORKERS = 4
+
+# "per_type": una llamada list_assets por tipo de asset.
+# "multi_type": una sola llamada con todos los tipos, demultiplexada en cliente.
+QUERY_MODES = ("per_type", "multi_type")
+
+# "detailed": list_assets con el recurso completo y sus relaciones.
+# "summary": search_all_resources con un read_mask mínimo (nombre, tipo, ubicación).
+BACKENDS = ("detailed", "summary")
+
+SUMMARY_READ_MASK = FieldMask(paths=["name", "asset_type", "location", "update_time"])
+
+RELATIONSHIP_CONTENT = ContentType.RESOURCE | ContentType.RELATIONSHIP
+
+# Un snapshot más reciente que esto se sirve tal cual, sin llamar a la API.
+SNAPSHOT_FRESHNESS_SECONDS = 15 * 60
+# Un snapshot caducado pero más reciente que esto se sirve y se refresca en segundo plano.
+SNAPSHOT_MAX_STALE_SECONDS = 24 * 60 * 60
+
+# Proyectos con un refresco en segundo plano en curso, para no lanzar dos a la vez.
+_refreshing_projects = set()
+_refreshing_lock = threading.Lock()
+
+class ResourceRecord(NamedTuple):
+    """Un recurso clasificado: el bucket del resumen al que pertenece y su recurso tipado.
+
+    asset_name es el nombre completo del asset y update_time su última modificación
+    (epoch); ambos se usan para la sincronización incremental.
+    """
+    bucket: str
+    resource: object
+    asset_name: str = ""
+    update_time: float = 0.0
+
+    def to_row(self) -> list:
+        """Fila serializable a JSON para el snapshot store."""
+        return [self.bucket, self.resource.to_dict(), self.asset_name, self.update_time]
+
+    @classmethod
+    def from_row(cls, asset_type: str, row: list) -> "ResourceRecord":
+        bucket, data, *rest = row
+        return cls(bucket, resource_from_dict(asset_type, data), *rest)
+
+
+class InventoryDelta(NamedTuple):
+    """Cambios aplicados por una sincronización incremental del inventario."""
+    added: list[ResourceRecord]
+    removed: list[ResourceRecord]
+    modified: list[tuple[ResourceRecord, ResourceRecord]]
+    read_time: float
+
+    def describe(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.modified)} modified"
+
+
+def _timestamp(value) -> float:
+    """Convierte un update_time de la API (datetime) a epoch; 0.0 si no viene informado."""
+    if not value or not hasattr(value, "timestamp"):
+        return 0.0
+    return value.timestamp()
+
+
+class InventoryAggregator:
+    """Acumula ResourceRecords de forma incremental y construye el diccionario resumen.
+
+    Con keep_resources=False solo se guardan conteos y costes por bucket, de modo que
+    la memoria no crece con el tamaño del inventario.
+    """
+
+    def __init__(self, project_id: str, keep_resources: bool = True):
+        self.project_id = project_id
+        self.keep_resources = keep_resources
+        self.resources: dict[str, list] = {bucket: [] for bucket in RESOURCE_BUCKETS}
+        self.counts: dict[str, int] = dict.fromkeys(RESOURCE_BUCKETS, 0)
+        self.costs: dict[str, float] = dict.fromkeys(RESOURCE_BUCKETS, 0.0)
+        self.total_cost = 0.0
+
+    def add(self, record: ResourceRecord):
+        self.counts[record.bucket] += 1
+        self.costs[record.bucket] += record.resource.monthly_cost
+        self.total_cost += record.resource.monthly_cost
+        if self.keep_resources:
+            self.resources[record.bucket].append(record.resource)
+
+    def remove(self, record: ResourceRecord):
+        self.counts[record.bucket] -= 1
+        self.costs[record.bucket] -= record.resource.monthly_cost
+        self.total_cost -= record.resource.monthly_cost
+        if self.keep_resources:
+            self.resources[record.bucket].remove(record.resource)
+
+    def consume(self, records: Iterable[ResourceRecord]) -> "InventoryAggregator":
+        for record in records:
+            self.add(record)
+        return self
+
+    def apply_delta(self, delta: InventoryDelta) -> "InventoryAggregator":
+        """Actualiza conteos y costes con un InventoryDelta sin recalcular desde cero."""
+        for record in delta.removed:
+            self.remove(record)
+        for old, new in delta.modified:
+            self.remove(old)
+            self.add(new)
+        for record in delta.added:
+            self.add(record)
+        return self
+
+    def summary(self) -> dict:
+        counts = self.counts
+        return {
+            **{bucket: [r.to_dict() for r in resources] for bucket, resources in self.resources.items()},
+            "total_monthly_cost": round(self.total_cost, 2),
+            "potential_savings": round(self.total_cost * 0.3, 2),
+            "project_id": self.project_id, "is_real_data": True,
+            "detected_resources": ", ".join(f"{counts[bucket]} {BUCKET_LABELS[bucket]}" for bucket in RESOURCE_BUCKETS)
+        }
+
 
 class GCPRealDataCollector:
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 query_mode: str = "per_type",
+                 snapshot_store: InventorySnapshotStore | None = None,
+                 freshness_seconds: float = SNAPSHOT_FRESHNESS_SECONDS,
+                 max_stale_seconds: float = SNAPSHOT_MAX_STALE_SECONDS,
+                 incremental: bool = False,
+                 backend: str = "detailed",
+                 capability_cache: CapabilityCache | None = None,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 deadline_seconds: float | None = None,
+                 deadline_at: float | None = None):
+        if query_mode not in QUERY_MODES:
+            raise ValueError(f"Unknown query_mode '{query_mode}', expected one of {QUERY_MODES}")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
         self.project_id = project_id
+        self.max_workers = max(1, max_workers)
+        self.query_mode = query_mode
+        self.snapshot_store = snapshot_store
+        self.freshness_seconds = freshness_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.incremental = incremental
+        self.backend = backend
+        self.capability_cache = capability_cache
+        self.page_size = page_size
+        self.deadline_seconds = deadline_seconds
+        # Instante absoluto (time.monotonic()) en que vence el presupuesto de quien usa el
+        # colector; si está, sustituye a deadline_seconds.
+        self.deadline_at = deadline_at
+        # Tipos que no llegaron a completarse antes del deadline en la última consulta.
+        self.missing_asset_types: list[str] = []
+        self._deadline: float | None = None
+        self._failed_asset_types = set()
         try:
-            self.asset_client = AssetServiceClient()
+            self.asset_client = get_asset_client()
         except Exception as e:
             print(f"Error initializing AssetServiceClient: {e}")
             self.asset_client = None
 
-    def get_real_infrastructure(self) -> Dict:
-        """Obtiene TODOS los recursos usando Asset Inventory de forma granular."""
-        if not self.asset_client:
-            raise ConnectionError("AssetServiceClient not initialized")
+    def _rpc_timeout(self) -> dict:
+        """timeout de la siguiente llamada a la API: lo que queda hasta el deadline, si lo hay."""
+        remaining = self._remaining()
+        return {} if remaining is None else {"timeout": remaining}
 
-        parent = f"projects/{self.project_id}"
-        assets = []
-        asset_types_to_query = [
-            "compute.googleapis.com/Instance",
-            "container.googleapis.com/Cluster",
-            "pubsub.googleapis.com/Topic",
-            "pubsub.googleapis.com/Subscription",
-            "storage.googleapis.com/Bucket",
-            "sqladmin.googleapis.com/Instance",
-            "redis.googleapis.com/Instance",
-            "spanner.googleapis.com/Instance",
-            "run.googleapis.com/Service",
-            "cloudscheduler.googleapis.com/Job",
-        ]
+    def _pages(self, pager, items_field: str):
+        """Recorre el pager con prefetch; con deadline cada página se pide con el timeout restante."""
+        return iter_prefetched(pager, items_field, deadline_at=self._deadline)
+
+    def _list_assets(self, asset_types: list[str], content_type: ContentType):
+        """Lanza una llamada list_assets y devuelve el pager sin materializarlo."""
+        return self.asset_client.list_assets(
+            request={
+                "parent": f"projects/{self.project_id}",
+                "content_type": content_type,
+                "asset_types": list(asset_types),
+                "page_size": self.page_size,
+            },
+            **self._rpc_timeout(),
+        )
+
+    def _known_content_type(self, asset_type: str) -> int | None:
+        """content_type que ya se sabe que acepta asset_type, o None si hay que sondear.
+
+        Sin entrada en capability_cache, los tipos que el registro marca sin relaciones
+        se dan por RESOURCE y se siembran en la caché: así una caché fría no paga la
+        bisección de multi_type por tipos cuyo rechazo ya se conoce.
+        """
+        if self.capability_cache is not None:
+            known = self.capability_cache.get(self.project_id, asset_type)
+            if known is not None:
+                return known
+        spec = ASSET_TYPE_REGISTRY.get(asset_type)
+        if spec is not None and not spec.relationships:
+            self._remember_content_type([asset_type], ContentType.RESOURCE)
+            return ContentType.RESOURCE
+        return None
+
+    def _remember_content_type(self, asset_types: list[str], content_type: ContentType):
+        if self.capability_cache is not None:
+            self.capability_cache.record(self.project_id, asset_types, content_type)
 
-        for asset_type in asset_types_to_query:
+    def _open_assets_pager(self, asset_type: str):
+        """Abre el pager de un tipo con relaciones, reintentando solo con RESOURCE si no las soporta.
+
+        Con capability_cache, un tipo que ya se sabe que no soporta relaciones se pide
+        directamente con RESOURCE, sin la llamada fallida.
+        """
+        if self._known_content_type(asset_type) == ContentType.RESOURCE:
+            print(f"Querying {asset_type} with RESOURCE only (cached capability)...")
             try:
-                # Intentar obtener recurso y relaciones
-                print(f"Querying {asset_type} with RELATIONSHIPS...")
-                response = list(self.asset_client.list_assets(
-                    request={
-                        "parent": parent,
-                        "content_type": ContentType.RESOURCE | ContentType.RELATIONSHIP,
-                        "asset_types": [asset_type],
-                    }
-                ))
-                assets.extend(response)
+                return self._list_assets([asset_type], ContentType.RESOURCE)
             except Exception as e:
-                if "No RELATIONSHIP found" in str(e):
-                    # Si falla por relaciones, reintentar solo con recurso
-                    print(f"Retrying {asset_type} with RESOURCE only...")
+                print(f"Error listing {asset_type} (resource only): {e}")
+            self._failed_asset_types.add(asset_type)
+            return None
+        try:
+            # Intentar obtener recurso y relaciones
+            print(f"Querying {asset_type} with RELATIONSHIPS...")
+            pager = self._list_assets([asset_type], RELATIONSHIP_CONTENT)
+            self._remember_content_type([asset_type], RELATIONSHIP_CONTENT)
+            return pager
+        except Exception as e:
+            if "No RELATIONSHIP found" in str(e):
+                # Si falla por relaciones, reintentar solo con recurso
+                print(f"Retrying {asset_type} with RESOURCE only...")
+                self._remember_content_type([asset_type], ContentType.RESOURCE)
+                try:
+                    return self._list_assets([asset_type], ContentType.RESOURCE)
+                except Exception as e2:
+                    print(f"Error listing {asset_type} (resource only): {e2}")
+            else:
+                print(f"Error listing {asset_type}: {e}")
+        self._failed_asset_types.add(asset_type)
+        return None
+
+    def _iter_assets_for_type(self, asset_type: str):
+        """Entrega los assets de un tipo página a página."""
+        pager = self._open_assets_pager(asset_type)
+        if pager is None:
+            return
+        try:
+            yield from self._pages(pager, "assets")
+        except Exception as e:
+            print(f"Error reading assets for {asset_type}: {e}")
+            self._failed_asset_types.add(asset_type)
+
+    def _list_assets_for_type(self, asset_type: str) -> list:
+        """Materializa los assets de un tipo; usado por los workers del modo concurrente."""
+        return list(self._iter_assets_for_type(asset_type))
+
+    def _iter_assets_multi_type(self, asset_types: list[str]):
+        """Pide todos los tipos en una sola llamada y va entregando los assets según llegan las páginas.
+
+        Si la petición conjunta se rechaza por falta de RELATIONSHIP, se parte la lista
+        en dos mitades y se reintenta, de modo que solo los tipos que no soportan
+        relaciones acaban consultándose por separado con RESOURCE.
+        """
+        try:
+            print(f"Querying {len(asset_types)} asset types with RELATIONSHIPS in one request...")
+            pager = self._list_assets(asset_types, RELATIONSHIP_CONTENT)
+            self._remember_content_type(asset_types, RELATIONSHIP_CONTENT)
+        except Exception as e:
+            if "No RELATIONSHIP found" not in str(e):
+                print(f"Error listing {asset_types}: {e}")
+                self._failed_asset_types.update(asset_types)
+                return
+            if len(asset_types) == 1:
+                print(f"Retrying {asset_types[0]} with RESOURCE only...")
+                self._remember_content_type(asset_types, ContentType.RESOURCE)
+                try:
+                    pager = self._list_assets(asset_types, ContentType.RESOURCE)
+                except Exception as e2:
+                    print(f"Error listing {asset_types[0]} (resource only): {e2}")
+                    self._failed_asset_types.add(asset_types[0])
+                    return
+            else:
+                middle = len(asset_types) // 2
+                yield from self._iter_assets_multi_type(asset_types[:middle])
+                yield from self._iter_assets_multi_type(asset_types[middle:])
+                return
+
+        try:
+            yield from self._pages(pager, "assets")
+        except Exception as e:
+            print(f"Error reading assets for {asset_types}: {e}")
+            self._failed_asset_types.update(asset_types)
+
+    def _iter_resource_only(self, asset_types: list[str]):
+        """Pide con RESOURCE, en una sola llamada, los tipos que ya se sabe que no soportan relaciones."""
+        try:
+            print(f"Querying {len(asset_types)} asset types with RESOURCE only (cached capability)...")
+            yield from self._pages(self._list_assets(asset_types, ContentType.RESOURCE), "assets")
+        except Exception as e:
+            print(f"Error listing {asset_types} (resource only): {e}")
+            self._failed_asset_types.update(asset_types)
+
+    def _search_resources(self, asset_types: list[str]):
+        """Pager de search_all_resources con solo los campos de SUMMARY_READ_MASK."""
+        return self.asset_client.search_all_resources(
+            request={
+                "scope": f"projects/{self.project_id}",
+                "asset_types": list(asset_types),
+                "read_mask": SUMMARY_READ_MASK,
+                "page_size": self.page_size,
+            },
+            **self._rpc_timeout(),
+        )
+
+    def _iter_search_results(self, asset_types: list[str]):
+        """Entrega los resultados del backend summary; no incluyen relaciones."""
+        try:
+            print(f"Searching {len(asset_types)} asset types (summary)...")
+            yield from self._pages(self._search_resources(asset_types), "results")
+        except Exception as e:
+            print(f"Error searching resources for {self.project_id}: {e}")
+            self._failed_asset_types.update(asset_types)
+
+    @property
+    def incomplete_asset_types(self) -> list[str]:
+        """Tipos que fallaron o no terminaron en la última consulta en vivo."""
+        return sorted(set(self.missing_asset_types) | self._failed_asset_types)
+
+    def _remaining(self) -> float | None:
+        """Segundos que quedan hasta el deadline, o None si no hay deadline."""
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def _mark_missing(self, asset_types: Iterable[str]):
+        for asset_type in asset_types:
+            if asset_type not in self.missing_asset_types:
+                print(f"Deadline reached before {asset_type} finished; leaving it out")
+                self.missing_asset_types.append(asset_type)
+                self._failed_asset_types.add(asset_type)
+
+    def _until_deadline(self, assets, asset_types: list[str]):
+        """Corta un flujo de assets de varios tipos al llegar al deadline.
+
+        Como los tipos llegan mezclados, al cortar se dan todos por incompletos; también
+        cuando es una llamada o una página la que agota el deadline.
+        """
+        for asset in assets:
+            yield asset
+            if self._remaining() == 0.0:
+                self._mark_missing(asset_types)
+                return
+        if self._remaining() == 0.0:
+            self._mark_missing(asset_types)
+
+    def _iter_assets(self, asset_types: list[str]):
+        """Entrega los assets de asset_types según el backend y el query_mode configurados.
+
+        En modo per_type con max_workers > 1 los tipos se consultan en paralelo y se
+        entregan en el orden de asset_types; cada tipo se materializa por separado en
+        su worker y se libera en cuanto se consume. Con deadline_seconds los tipos que
+        no han terminado a tiempo se quedan descargando en segundo plano y se anotan
+        en missing_asset_types.
+        """
+        if self.backend == "summary":
+            yield from self._until_deadline(self._iter_search_results(list(asset_types)), list(asset_types))
+        elif self.query_mode == "multi_type":
+            known = {t: self._known_content_type(t) for t in asset_types}
+            resource_only = [t for t in asset_types if known[t] == ContentType.RESOURCE]
+            probed = [t for t in asset_types if known[t] != ContentType.RESOURCE]
+            if probed:
+                yield from self._until_deadline(self._iter_assets_multi_type(probed), probed)
+            if resource_only and self._remaining() != 0.0:
+                yield from self._until_deadline(self._iter_resource_only(resource_only), resource_only)
+            elif resource_only:
+                self._mark_missing(resource_only)
+        elif self._deadline is None and (self.max_workers == 1 or len(asset_types) <= 1):
+            for asset_type in asset_types:
+                yield from self._iter_assets_for_type(asset_type)
+        else:
+            workers = min(self.max_workers, len(asset_types))
+            executor = ThreadPoolExecutor(max_workers=workers)
+            futures = [executor.submit(self._list_assets_for_type, asset_type) for asset_type in asset_types]
+            try:
+                for asset_type, future in zip(asset_types, futures, strict=True):
                     try:
-                        response = list(self.asset_client.list_assets(
-                            request={
-                                "parent": parent,
-                                "content_type": ContentType.RESOURCE,
-                                "asset_types": [asset_type],
-                            }
-                        ))
-                        assets.extend(response)
-                    except Exception as e2:
-                        print(f"Error listing {asset_type} (resource only): {e2}")
+                        response = future.result(timeout=self._remaining())
+                    except FuturesTimeout:
+                        self._mark_missing([asset_type])
+                        continue
+                    yield from response
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_resources(self, deadline_at: float | None = None) -> Iterator[ResourceRecord]:
+        """Clasifica los assets según llegan del pager y entrega un ResourceRecord por recurso.
+
+        Con snapshot_store, un snapshot dentro de freshness_seconds se sirve sin llamar
+        a la API; uno caducado pero dentro de max_stale_seconds se sirve y se refresca
+        en segundo plano. Con incremental=True un snapshot caducado se actualiza con
+        sync_inventory en lugar de volver a listar todo el proyecto. deadline_at acota
+        solo esta consulta en vivo, por delante del deadline del colector.
+        """
+        if self.snapshot_store:
+            snapshot = self.snapshot_store.load_inventory(self.project_id, ASSET_TYPES_TO_QUERY)
+            if snapshot:
+                read_time, records_by_type = snapshot
+                age = time.time() - read_time
+                if age < self.freshness_seconds or (age < self.max_stale_seconds and self._start_background_refresh()):
+                    print(f"Serving inventory for project {self.project_id} from snapshot ({age:.0f}s old)")
+                    for asset_type in ASSET_TYPES_TO_QUERY:
+                        for row in records_by_type[asset_type]:
+                            yield ResourceRecord.from_row(asset_type, row)
+                    return
+                if self.incremental:
+                    self.sync_inventory()
+                    yield from self._iter_snapshot_resources()
+                    return
+
+        yield from self._iter_live_resources(deadline_at=deadline_at)
+
+    def _iter_snapshot_resources(self) -> Iterator[ResourceRecord]:
+        snapshot = self.snapshot_store.load_inventory(self.project_id, ASSET_TYPES_TO_QUERY)
+        if snapshot:
+            for asset_type in ASSET_TYPES_TO_QUERY:
+                for row in snapshot[1][asset_type]:
+                    yield ResourceRecord.from_row(asset_type, row)
+
+    def _iter_live_resources(self, bounded: bool = True,
+                             deadline_at: float | None = None) -> Iterator[ResourceRecord]:
+        """Consulta Asset Inventory y, si hay snapshot_store, guarda el resultado al terminar.
+
+        bounded=False ignora deadline_at y deadline_seconds: lo usan los refrescos en segundo plano y
+        las sincronizaciones, que necesitan el inventario completo.
+        """
+        if not self.asset_client:
+            raise ConnectionError("AssetServiceClient not initialized")
+
+        read_time = time.time()
+        self._failed_asset_types = set()
+        self._deadline = None
+        if bounded:
+            self.missing_asset_types = []
+            deadlines = [d for d in (deadline_at, self.deadline_at) if d is not None]
+            if deadlines:
+                self._deadline = min(deadlines)
+            elif self.deadline_seconds is not None:
+                self._deadline = time.monotonic() + self.deadline_seconds
+        # Un snapshot del backend summary no tiene relaciones, así que no se guarda.
+        persist = self.snapshot_store is not None and self.backend == "detailed"
+        records_by_type = {asset_type: [] for asset_type in ASSET_TYPES_TO_QUERY}
+        asset_count = 0
+        for asset in self._iter_assets(ASSET_TYPES_TO_QUERY):
+            asset_count += 1
+            record = self._classify_asset(asset)
+            if record:
+                if persist and asset.asset_type in records_by_type:
+                    records_by_type[asset.asset_type].append(record.to_row())
+                yield record
+
+        print(f"Found {asset_count} total assets in project {self.project_id}")
+
+        if persist:
+            # Los tipos que fallaron no se guardan para no servir un vacío como si fuera real.
+            for asset_type in self._failed_asset_types:
+                records_by_type.pop(asset_type, None)
+            self.snapshot_store.save(self.project_id, read_time, records_by_type)
+
+    def _start_background_refresh(self) -> bool:
+        """Lanza un refresco del snapshot en un hilo; False si no es posible."""
+        if not self.asset_client:
+            return False
+        if self.backend == "summary" and not self.incremental:
+            # Un listado completo del backend summary no se guarda: el snapshot no se
+            # refrescaría nunca y cada llamada lanzaría otro listado en segundo plano.
+            return False
+        with _refreshing_lock:
+            if self.project_id in _refreshing_projects:
+                return True
+            _refreshing_projects.add(self.project_id)
+
+        def refresh():
+            try:
+                if self.incremental:
+                    self.sync_inventory()
                 else:
-                    print(f"Error listing {asset_type}: {e}")
+                    for _ in self._iter_live_resources(bounded=False):
+                        pass
+            except Exception as e:
+                print(f"Error refreshing inventory snapshot for {self.project_id}: {e}")
+            finally:
+                with _refreshing_lock:
+                    _refreshing_projects.discard(self.project_id)
 
-        print(f"Found {len(assets)} total assets in project {self.project_id}")
+        print(f"Refreshing inventory snapshot for project {self.project_id} in the background...")
+        threading.Thread(target=refresh, daemon=True).start()
+        return True
 
-        vms, storage, databases, clusters, redis_instances, spanner_instances, schedulers, run_services = [], [], [], [], [], [], [], []
+    def sync_inventory(self, aggregator: InventoryAggregator | None = None) -> InventoryDelta:
+        """Actualiza el snapshot guardado solo con lo que ha cambiado desde su read_time.
 
-        for asset in assets:
-            asset_details = {
-                "name": asset.name.split("/")[-1],
-                "type": asset.asset_type,
-                "relationships": []
-            }
-
-            if hasattr(asset, 'resource') and asset.resource and hasattr(asset.resource, 'relationships'):
-                for rel in asset.resource.relationships:
-                    asset_details["relationships"].append({
-                        "target": rel.target_resource,
-                        "type": rel.type
-                    })
-
-            if "compute.googleapis.com/Instance" in asset.asset_type:
-                name = asset.name.split("/")[-1]
-                if "InstanceSettings" in name: continue
-                vms.append({
-                    "name": name, "type": "e2-medium", "monthly_cost": 24.46,
-                    "zone": asset.name.split("/")[3], "status": "running",
-                    "relationships": asset_details["relationships"]
-                })
-            elif "storage.googleapis.com/Bucket" in asset.asset_type:
-                storage.append({
-                    "name": asset.name.split("/")[-1], "size_gb": 50, "monthly_cost": 1.30,
-                    "storage_class": "standard", "location": "us (multi-region)",
-                    "relationships": asset_details["relationships"]
-                })
-            elif "sqladmin.googleapis.com/Instance" in asset.asset_type:
-                databases.append({
-                    "name": asset.name.split("/")[-1], "type": "Cloud SQL", "monthly_cost": 50,
-                    "relationships": asset_details["relationships"]
-                })
-            elif "container.googleapis.com/Cluster" in asset.asset_type:
-                clusters.append({
-                    "name": asset.name.split("/")[-1], "type": "GKE Cluster", "monthly_cost": 73,
-                    "relationships": asset_details["relationships"]
-                })
-            elif "redis.googleapis.com/Instance" in asset.asset_type:
-                redis_instances.append({
-                    "name": asset.name.split("/")[-1], "type": "Memorystore for Redis", "monthly_cost": 40,
-                    "relationships": asset_details["relationships"]
-                })
-            elif "spanner.googleapis.com/Instance" in asset.asset_type:
-                spanner_instances.append({
-                    "name": asset.name.split("/")[-1], "type": "Spanner", "monthly_cost": 65,
-                    "relationships": asset_details["relationships"]
-                })
-            elif "cloudscheduler.googleapis.com/Job" in asset.asset_type:
-                schedulers.append({
-                    "name": asset.name.split("/")[-1], "type": "Cloud Scheduler", "monthly_cost": 0.10,
-                    "relationships": asset_details["relationships"]
-                })
-            elif "run.googleapis.com/Service" in asset.asset_type:
-                run_services.append({
-                    "name": asset.name.split("/")[-1], "type": "Cloud Run Service", "monthly_cost": 15.00, # Placeholder
-                    "relationships": asset_details["relationships"]
-                })
-
-        total_cost = sum(i["monthly_cost"] for i in vms + storage + databases + clusters + redis_instances + spanner_instances + schedulers + run_services)
-        
-        return {
-            "vms": vms, "storage": storage, "databases": databases, "clusters": clusters,
-            "redis_instances": redis_instances, "spanner_instances": spanner_instances, "schedulers": schedulers, "run_services": run_services,
-            "total_monthly_cost": round(total_cost, 2),
-            "potential_savings": round(total_cost * 0.3, 2),
-            "project_id": self.project_id, "is_real_data": True,
-            "detected_resources": f"{len(vms)} VMs, {len(storage)} buckets, {len(databases)} databases, "
-                              f"{len(clusters)} clusters, {len(redis_instances)} redis, {len(spanner_instances)} spanner, "
-                              f"{len(schedulers)} schedulers, {len(run_services)} run services"
-        }
\ No newline at end of file
+        Lista los nombres y update_time actuales con search_all_resources (sin contenido
+        del recurso), reclasifica solo los assets nuevos o con update_time posterior al
+        guardado y da por borrados los que ya no aparecen. Si se pasa un aggregator se le
+        aplica el delta, y también al índice de relaciones del proyecto si existe. Sin snapshot previo hace una recolección completa.
+        """
+        if not self.snapshot_store:
+            raise ValueError("sync_inventory requires a snapshot_store")
+        if not self.asset_client:
+            raise ConnectionError("AssetServiceClient not initialized")
+
+        # La sincronización necesita el inventario completo: sin deadline ni timeouts.
+        self._deadline = None
+        snapshot = self.snapshot_store.load_inventory(self.project_id, ASSET_TYPES_TO_QUERY)
+        previous = {}
+        if snapshot:
+            for asset_type, rows in snapshot[1].items():
+                for row in rows:
+                    record = ResourceRecord.from_row(asset_type, row)
+                    previous[record.asset_name] = (asset_type, record)
+
+        if not previous or "" in previous:
+            # Sin snapshot (o con uno sin nombres de asset) no hay base sobre la que aplicar cambios.
+            read_time = time.time()
+            added = list(self._iter_live_resources(bounded=False))
+            delta = InventoryDelta(added, [], [], read_time)
+        else:
+            delta = self._sync_from_search(previous)
+            if delta is None:
+                delta = self._sync_from_full_listing(previous)
+
+        print(f"Inventory sync for project {self.project_id}: {delta.describe()}")
+        if aggregator is not None:
+            aggregator.apply_delta(delta)
+        apply_project_delta(self.project_id, delta)
+        return delta
+
+    def _sync_from_full_listing(self, previous: dict[str, tuple[str, ResourceRecord]]) -> InventoryDelta:
+        """Plan B si search_all_resources falla: lista todo y compara con el snapshot anterior."""
+        read_time = time.time()
+        current = {record.asset_name: record for record in self._iter_live_resources(bounded=False)}
+        added = [record for name, record in current.items() if name not in previous]
+        removed = [record for name, (_, record) in previous.items() if name not in current]
+        modified = [
+            (previous[name][1], record) for name, record in current.items()
+            if name in previous and previous[name][1].resource != record.resource
+        ]
+        return InventoryDelta(added, removed, modified, read_time)
+
+    def _sync_from_search(self, previous: dict[str, tuple[str, ResourceRecord]]) -> InventoryDelta | None:
+        read_time = time.time()
+        try:
+            results = self._search_resources(ASSET_TYPES_TO_QUERY)
+            current = {}
+            for result in iter_prefetched(results, "results"):
+                current[result.name] = result
+        except Exception as e:
+            print(f"Error searching changed assets for {self.project_id}, falling back to full listing: {e}")
+            return None
+
+        added, removed, modified = [], [], []
+        merged = dict(previous)
+        for name, result in current.items():
+            old = previous.get(name)
+            if old is not None and _timestamp(result.update_time) <= old[1].update_time:
+                continue
+            record = self._classify_asset(result)
+            if record is None:
+                continue
+            if old is None:
+                added.append(record)
+            else:
+                # search_all_resources no trae relaciones; se conservan las últimas conocidas.
+                record.resource.relationships = old[1].resource.relationships
+                modified.append((old[1], record))
+            merged[name] = (result.asset_type, record)
+
+        for name, (_, record) in previous.items():
+            if name not in current:
+                removed.append(record)
+                del merged[name]
+
+        records_by_type = {asset_type: [] for asset_type in ASSET_TYPES_TO_QUERY}
+        for asset_type, record in merged.values():
+            records_by_type.setdefault(asset_type, []).append(record.to_row())
+        self.snapshot_store.save(self.project_id, read_time, records_by_type)
+        return InventoryDelta(added, removed, modified, read_time)
+
+    def _classify_asset(self, asset) -> ResourceRecord | None:
+        """Convierte un asset en su ResourceRecord, o None si no es un tipo registrado."""
+        spec = ASSET_TYPE_REGISTRY.get(asset.asset_type)
+        if spec is None:
+            return None
+        resource = spec.parse(asset)
+        if resource is None:
+            return None
+        return ResourceRecord(spec.bucket, resource, asset.name, _timestamp(getattr(asset, "update_time", None)))
+
+    def get_columnar_inventory(self) -> ColumnarInventory:
+        """Igual que get_real_infrastructure pero en formato columnar, para proyectos muy grandes."""
+        return ColumnarInventory(self.project_id).extend(self.iter_resources())
+
+    def get_real_infrastructure(self) -> dict:
+        """Obtiene TODOS los recursos usando Asset Inventory de forma granular.
+
+        Si el deadline ha dejado tipos fuera, el resumen lleva partial=True y la lista missing.
+        """
+        summary = InventoryAggregator(self.project_id).consume(self.iter_resources()).summary()
+        if self.missing_asset_types:
+            summary["partial"] = True
+            summary["missing"] = list(self.missing_asset_types)
+        return summary
@@ -1,26 +1,140 @@
 import json
-from typing import Dict, List
-from app.gcp_real_data import GCPRealDataCollector
+import time
+from collections.abc import Callable, Iterator
+
+from app.capability_cache import CapabilityCache, UnavailableRecommenderCache
+from app.gcp_real_data import GCPRealDataCollector, ResourceRecord
+from app.insight_service import InsightService
+from app.inventory_store import InventorySnapshotStore
+from app.recommendation_filter import PENDING_STATES, build_recommendation_filter
+from app.recommendation_index import RecommendationIndex
+from app.recommendation_store import InsightCache, RecommendationStore
+from app.recommender_planner import InventoryLocations, plan_recommender_pairs
 from app.recommender_service import RecommenderService
+from app.relationship_graph import RelationshipGraph, get_project_graph
+
+# Parte del tiempo que queda que puede gastar el listado de inventario con el que se
+# planifican los recommenders; el resto se reserva para las llamadas al Recommender.
+PLANNING_BUDGET_SHARE = 0.3
 
 class InfrastructureAnalyzer:
-    def __init__(self, project_id: str):
+    """Inventario y recomendaciones de un proyecto.
+
+    deadline_seconds es el presupuesto de toda la vida del analizador (una llamada de
+    herramienta): el reloj arranca al construirlo y cada fase recibe solo el tiempo que
+    queda, no un deadline propio.
+    """
+
+    def __init__(self, project_id: str, backend: str = "detailed", deadline_seconds: float | None = None,
+                 plan_recommenders: bool = True):
         self.project_id = project_id
-        self.data_collector = GCPRealDataCollector(project_id)
+        self.deadline_seconds = deadline_seconds
+        self.deadline_at = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+        self.plan_recommenders = plan_recommenders
+        self.data_collector = GCPRealDataCollector(project_id, snapshot_store=InventorySnapshotStore(),
+                                                   backend=backend, capability_cache=CapabilityCache(),
+                                                   deadline_at=self.deadline_at)
+
+    def remaining_seconds(self) -> float | None:
+        """Segundos que quedan del presupuesto, o None si no hay deadline."""
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - time.monotonic())
     
-    def get_infrastructure_summary(self) -> Dict:
+    def get_infrastructure_summary(self) -> dict:
         """Obtiene datos REALES de GCP"""
         return self.data_collector.get_real_infrastructure()
 
-    def get_google_recommendations(self) -> Dict:
-        """Obtiene recomendaciones oficiales de Google Cloud Recommender"""
+    def iter_resources(self) -> Iterator[ResourceRecord]:
+        """Entrega los recursos REALES de GCP según se van clasificando"""
+        return self.data_collector.iter_resources()
+
+    def get_relationship_graph(self) -> RelationshipGraph:
+        """Índice de relaciones del proyecto, actualizado solo en los recursos que han cambiado"""
+        return get_project_graph(self.project_id, self.iter_resources())
+
+    def get_recommender_pairs(self, inventory: InventoryLocations | None = None) -> list[tuple[str, str]] | None:
+        """Pares (location, recommender) derivados del inventario; None (todos) si no se puede listar
+
+        Si hay que listar el inventario, se le da como mucho PLANNING_BUDGET_SHARE del
+        tiempo que queda; los tipos que no terminan se planifican con las ubicaciones por defecto.
+        """
+        remaining = self.remaining_seconds()
+        planning_deadline = time.monotonic() + remaining * PLANNING_BUDGET_SHARE if remaining is not None else None
+        try:
+            if inventory is None:
+                inventory = InventoryLocations().consume(self.data_collector.iter_resources(deadline_at=planning_deadline))
+        except Exception as e:
+            print(f"Error planning recommenders from inventory for {self.project_id}, querying all: {e}")
+            return None
+        pairs = plan_recommender_pairs(inventory, unknown_asset_types=self.data_collector.incomplete_asset_types)
+        print(f"Planned {len(pairs)} recommender/location pairs from {inventory.count} resources")
+        return pairs
+
+    def _recommender_service(self, filter: str = "") -> RecommenderService:
+        return RecommenderService(self.project_id, deadline_seconds=self.remaining_seconds(),
+                                  unavailable_cache=UnavailableRecommenderCache(),
+                                  store=RecommendationStore(), filter=filter)
+
+    def get_google_recommendations(self, inventory: InventoryLocations | None = None, filter: str = "",
+                                   with_evidence: bool = False) -> dict:
+        """Obtiene recomendaciones oficiales de Google Cloud Recommender
+
+        filter se aplica en el servidor (ver recommendation_filter.build_recommendation_filter).
+        Con with_evidence, cada recomendación lleva en "evidence" los insights que la justifican.
+        """
         
-        recommender = RecommenderService(self.project_id)
-        recommendations = recommender.get_categorized_recommendations()
+        pairs = self.get_recommender_pairs(inventory) if self.plan_recommenders else None
+        recommender = self._recommender_service(filter)
+        recommendations = recommender.get_categorized_recommendations(pairs)
         
-        return recommendations
+        return self._attach_evidence(recommender, recommendations) if with_evidence else recommendations
+
+    def iter_google_recommendations(self, inventory: InventoryLocations | None = None,
+                                    filter: str = "", with_evidence: bool = False) -> Iterator[dict]:
+        """Parciales de get_google_recommendations según termina cada recommender; el último es el completo"""
+        pairs = self.get_recommender_pairs(inventory) if self.plan_recommenders else None
+        recommender = self._recommender_service(filter)
+        for data in recommender.iter_categorized_recommendations(pairs):
+            yield self._attach_evidence(recommender, data) if data["done"] and with_evidence else data
+
+    def _attach_evidence(self, recommender: RecommenderService, data: dict) -> dict:
+        """Añade los insights citados por las recomendaciones con el tiempo que quede del presupuesto"""
+        if not recommender.client:
+            return data
+        insights = InsightService(self.project_id, recommender.client,
+                                  cache=None if recommender.replay else InsightCache(),
+                                  deadline_seconds=self.remaining_seconds())
+        try:
+            insights.attach_evidence(rec for recs in data["recommendations"].values() for rec in recs)
+        except Exception as e:
+            print(f"Error getting insights for {self.project_id}: {e}")
+        if insights.missing_insights:
+            data["missing_insights"] = len(insights.missing_insights)
+        return data
+
+    def get_recommendation_index(self, on_record: Callable[[ResourceRecord], None] | None = None) -> RecommendationIndex:
+        """Cruce recomendaciones <-> recursos del inventario; sin recomendaciones si no se pueden obtener
+
+        El inventario se recorre una sola vez: con cada recurso se alimentan el índice,
+        las ubicaciones para planificar los recommenders y, si se pasa, on_record. Solo
+        se piden al Recommender las recomendaciones pendientes (PENDING_STATES).
+        """
+        index, inventory = RecommendationIndex(), InventoryLocations()
+        for record in self.iter_resources():
+            index.add_record(record)
+            inventory.add(record)
+            if on_record is not None:
+                on_record(record)
+        try:
+            data = self.get_google_recommendations(inventory, filter=build_recommendation_filter(PENDING_STATES))
+        except Exception as e:
+            print(f"Error getting recommendations to index for {self.project_id}: {e}")
+            return index
+        index.add_recommendations(rec for recs in data["recommendations"].values() for rec in recs)
+        return index
 
-    def generate_cost_prompt(self, resources: Dict) -> str:
+    def generate_cost_prompt(self, resources: dict) -> str:
         """Generates a detailed prompt for creating an infrastructure cost visualization."""
         
         prompt = "Create a professional and visually appealing isometric cloud architecture diagram for a GCP project. "
@@ -0,0 +1,148 @@
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from google.cloud.recommender_v1 import Insight
+
+from app.pagination import DEFAULT_PAGE_SIZE, iter_prefetched
+from app.recommendation_store import InsightCache
+
+# A partir de tantos insights pedidos de un mismo insight type y ubicación se lista el
+# tipo entero en una sola llamada en lugar de pedirlos uno a uno.
+LIST_THRESHOLD = 3
+
+# Llamadas a la API de insights en vuelo a la vez.
+DEFAULT_INSIGHT_WORKERS = 16
+
+# Campos del contenido de un insight que se conservan como evidencia.
+EVIDENCE_FIELDS = 8
+
+
+def collect_insight_names(recs: Iterable[dict]) -> list[str]:
+    """Insights citados por las recomendaciones, sin repetir y en orden de aparición."""
+    return list(dict.fromkeys(name for rec in recs for name in rec.get("insights", ())))
+
+
+def insight_parent(name: str) -> str:
+    """projects/<p>/locations/<l>/insightTypes/<t> de un nombre de insight."""
+    return name.rsplit("/insights/", 1)[0]
+
+
+def summarize_content(content: dict, limit: int = EVIDENCE_FIELDS) -> dict:
+    """Campos escalares del contenido de un insight, aplanando un nivel; de las listas solo su tamaño."""
+    summary = {}
+    for key, value in content.items():
+        if len(summary) >= limit:
+            break
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                if len(summary) < limit and not isinstance(sub_value, (dict, list)):
+                    summary[f"{key}.{sub_key}"] = sub_value
+        elif isinstance(value, list):
+            summary[key] = f"{len(value)} items"
+        else:
+            summary[key] = value
+    return summary
+
+
+class InsightService:
+    """Descarga los insights que justifican las recomendaciones (associatedInsights).
+
+    Junta los nombres citados por todas las recomendaciones, quita repetidos, sirve
+    los que estén en cache y pide el resto en paralelo: una llamada list_insights por
+    insight type y ubicación cuando se piden LIST_THRESHOLD o más de ellos, y
+    get_insight para los sueltos. Con deadline_seconds, lo que no llega a tiempo se
+    anota en missing_insights y las recomendaciones se quedan sin esa evidencia.
+    """
+
+    def __init__(self, project_id: str, client, cache: InsightCache | None = None,
+                 max_workers: int = DEFAULT_INSIGHT_WORKERS, deadline_seconds: float | None = None,
+                 page_size: int = DEFAULT_PAGE_SIZE):
+        self.project_id = project_id
+        self.client = client
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.deadline_seconds = deadline_seconds
+        self.page_size = page_size
+        # Insights que no se descargaron antes del deadline en la última pasada.
+        self.missing_insights: list[str] = []
+
+    def get_insights(self, names: Iterable[str]) -> dict[str, dict]:
+        """name -> insight resumido de los que se han podido obtener."""
+        names = list(dict.fromkeys(names))
+        self.missing_insights = []
+        found = self.cache.get_many(self.project_id, names) if self.cache is not None else {}
+
+        by_parent: dict[str, list[str]] = {}
+        for name in names:
+            if name not in found:
+                by_parent.setdefault(insight_parent(name), []).append(name)
+        tasks: list[tuple[Callable, str, list[str]]] = []
+        for parent, wanted in by_parent.items():
+            if len(wanted) >= LIST_THRESHOLD:
+                tasks.append((self._list_insights, parent, wanted))
+            else:
+                tasks.extend((self._get_insight, name, [name]) for name in wanted)
+        if not tasks:
+            return found
+
+        fetched: dict[str, dict] = {}
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds is not None else None
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(tasks)))
+        try:
+            futures = {executor.submit(fetch, target, wanted): wanted for fetch, target, wanted in tasks}
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                for future in as_completed(futures, timeout=remaining):
+                    fetched.update(future.result())
+            except FuturesTimeout:
+                for future, wanted in futures.items():
+                    if not future.done():
+                        self.missing_insights.extend(wanted)
+                print(f"Deadline reached before {len(self.missing_insights)} insights were fetched; leaving them out")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.cache is not None and fetched:
+            self.cache.put_many(self.project_id, fetched)
+        found.update(fetched)
+        return found
+
+    def _list_insights(self, parent: str, wanted: list[str]) -> dict[str, dict]:
+        wanted = set(wanted)
+        try:
+            pager = self.client.list_insights(request={"parent": parent, "page_size": self.page_size})
+            return {insight.name: self._parse_insight(insight)
+                    for insight in iter_prefetched(pager, "insights") if insight.name in wanted}
+        except Exception as e:
+            print(f"Error listing insights in {parent}: {e}")
+            return {}
+
+    def _get_insight(self, name: str, wanted: list[str]) -> dict[str, dict]:
+        try:
+            return {name: self._parse_insight(self.client.get_insight(request={"name": name}))}
+        except Exception as e:
+            print(f"Error getting insight {name}: {e}")
+            return {}
+
+    @staticmethod
+    def _parse_insight(insight) -> dict:
+        """Resumen de un insight: qué observa, durante cuánto tiempo y las cifras que lo respaldan."""
+        period = insight.observation_period
+        return {
+            "name": insight.name,
+            "subtype": insight.insight_subtype,
+            "category": insight.category.name,
+            "description": insight.description,
+            "observation_days": round(period.total_seconds() / 86400) if period else None,
+            "evidence": summarize_content(Insight.to_dict(insight).get("content") or {}),
+        }
+
+    def attach_evidence(self, recs: Iterable[dict]) -> int:
+        """Añade a cada recomendación "evidence" con sus insights resumidos; devuelve cuántos se obtuvieron."""
+        recs = list(recs)
+        insights = self.get_insights(collect_insight_names(recs))
+        for rec in recs:
+            rec["evidence"] = [insights[name] for name in rec.get("insights", ()) if name in insights]
+        return len(insights)
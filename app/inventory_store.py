@@ -0,0 +1,108 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+DEFAULT_SNAPSHOT_PATH = os.environ.get("INVENTORY_SNAPSHOT_PATH", ".inventory_snapshots.sqlite")
+
+# Snapshots que se conservan por (project_id, asset_type); los más antiguos se purgan.
+MAX_SNAPSHOTS_PER_TYPE = 3
+
+
+class SQLiteStore:
+    """Esqueleto común de los almacenes en SQLite.
+
+    Cada operación abre su propia conexión y las escrituras se serializan con _lock,
+    así que se pueden usar desde varios hilos. Las subclases declaran SCHEMA (sentencias
+    CREATE ... IF NOT EXISTS que se ejecutan al construir) y TABLES (las que vacía clear;
+    todas con columna project_id), y solo añaden sus consultas.
+    """
+
+    SCHEMA: tuple[str, ...] = ()
+    TABLES: tuple[str, ...] = ()
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def clear(self, project_id: str | None = None):
+        with self._lock, closing(self._connect()) as conn, conn:
+            for table in self.TABLES:
+                if project_id:
+                    conn.execute(f"DELETE FROM {table} WHERE project_id = ?", (project_id,))
+                else:
+                    conn.execute(f"DELETE FROM {table}")
+
+
+class InventorySnapshotStore(SQLiteStore):
+    """Almacén en SQLite de snapshots de inventario por (project_id, asset_type, read_time).
+
+    Cada snapshot guarda los recursos ya clasificados de un tipo de asset como JSON,
+    de modo que un worker recién arrancado puede servir el inventario sin llamar a la API.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS snapshots (
+            project_id TEXT NOT NULL,
+            asset_type TEXT NOT NULL,
+            read_time REAL NOT NULL,
+            records TEXT NOT NULL,
+            PRIMARY KEY (project_id, asset_type, read_time)
+        )""",
+    )
+    TABLES = ("snapshots",)
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH):
+        super().__init__(path)
+
+    def save(self, project_id: str, read_time: float, records_by_type: dict[str, list]):
+        """Guarda un snapshot por tipo de asset con el mismo read_time."""
+        rows = [
+            (project_id, asset_type, read_time, json.dumps(records))
+            for asset_type, records in records_by_type.items()
+        ]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)", rows)
+            for asset_type in records_by_type:
+                conn.execute(
+                    """DELETE FROM snapshots WHERE project_id = ? AND asset_type = ? AND read_time NOT IN (
+                        SELECT read_time FROM snapshots WHERE project_id = ? AND asset_type = ?
+                        ORDER BY read_time DESC LIMIT ?)""",
+                    (project_id, asset_type, project_id, asset_type, MAX_SNAPSHOTS_PER_TYPE),
+                )
+
+    def load_latest(self, project_id: str, asset_type: str) -> tuple[float, list] | None:
+        """Devuelve (read_time, records) del snapshot más reciente de un tipo, o None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                """SELECT read_time, records FROM snapshots WHERE project_id = ? AND asset_type = ?
+                ORDER BY read_time DESC LIMIT 1""",
+                (project_id, asset_type),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def load_inventory(self, project_id: str, asset_types: list[str]) -> tuple[float, dict[str, list]] | None:
+        """Devuelve el último snapshot de cada tipo y el read_time más antiguo entre ellos.
+
+        Si falta algún tipo devuelve None: un inventario incompleto no se sirve desde disco.
+        """
+        records_by_type = {}
+        oldest = time.time()
+        for asset_type in asset_types:
+            snapshot = self.load_latest(project_id, asset_type)
+            if snapshot is None:
+                return None
+            read_time, records = snapshot
+            oldest = min(oldest, read_time)
+            records_by_type[asset_type] = records
+        return oldest, records_by_type
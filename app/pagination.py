@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+from collections.abc import Iterator
+
+# Tamaño de página pedido a las APIs de listado; list_assets admite hasta 1000.
+DEFAULT_PAGE_SIZE = 1000
+
+# Páginas que se descargan por delante de la que se está procesando.
+PREFETCH_PAGES = 1
+
+_DONE = object()
+
+
+def _bound_page_requests(pager, deadline_at: float):
+    """Hace que cada petición de página de un pager GAPIC lleve timeout hasta deadline_at."""
+    method = getattr(pager, "_method", None)
+    if method is None:
+        return
+
+    def with_timeout(request, **kwargs):
+        kwargs["timeout"] = max(0.0, deadline_at - time.monotonic())
+        return method(request, **kwargs)
+
+    pager._method = with_timeout
+
+
+def iter_prefetched(pager, items_field: str, prefetch: int = PREFETCH_PAGES,
+                    deadline_at: float | None = None) -> Iterator:
+    """Entrega los elementos de un pager GAPIC descargando la página N+1 mientras se procesa la N.
+
+    items_field es el campo repetido de cada respuesta ("assets", "recommendations"...).
+    Un iterable sin .pages (p.ej. una lista de los fakes) se recorre tal cual. Los
+    errores al pedir una página se relanzan en el hilo consumidor, y si el consumidor
+    abandona la iteración el hilo de descarga se detiene en la siguiente página.
+    Con deadline_at (time.monotonic()) cada página se pide con el timeout que queda y,
+    si no llega a tiempo, se lanza TimeoutError en lugar de seguir esperándola.
+    """
+    pages = getattr(pager, "pages", None)
+    if pages is None or prefetch < 1:
+        yield from pager
+        return
+
+    if deadline_at is not None:
+        _bound_page_requests(pager, deadline_at)
+    buffer = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    threading.Thread(target=fetch, daemon=True).start()
+    try:
+        while True:
+            if deadline_at is None:
+                page = buffer.get()
+            else:
+                try:
+                    page = buffer.get(timeout=max(0.0, deadline_at - time.monotonic()))
+                except queue.Empty:
+                    raise TimeoutError("Page not received before the deadline") from None
+            if page is _DONE:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield from getattr(page, items_field)
+    finally:
+        stop.set()
@@ -0,0 +1,56 @@
+import contextvars
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+# listener(tool, message): recibe los avances de las herramientas que tardan.
+Listener = Callable[[str, str], None]
+
+# Ejecución (p.ej. una respuesta del chat) a la que pertenecen los avances publicados desde este contexto.
+_run_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("progress_run_id", default=None)
+
+_listeners: dict[str, Listener] = {}
+_lock = threading.Lock()
+
+
+def subscribe(run_id: str, listener: Listener):
+    """Registra el listener de los avances de una ejecución."""
+    with _lock:
+        _listeners[run_id] = listener
+
+
+def unsubscribe(run_id: str):
+    with _lock:
+        _listeners.pop(run_id, None)
+
+
+@contextmanager
+def run_scope(run_id: str) -> Iterator[None]:
+    """Marca como de run_id los avances que se publiquen dentro del bloque, en este contexto."""
+    token = _run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(token)
+
+
+def publish(tool: str, message: str):
+    """Envía un avance al listener de la ejecución en curso; sus errores no interrumpen la herramienta.
+
+    Los hilos nuevos no heredan el contexto, así que una herramienta que corre en un
+    hilo del runtime del agente puede no tener ejecución. En ese caso el avance solo se
+    entrega si hay una única ejecución suscrita en el proceso; con varias se descarta
+    para no mostrárselo a otra sesión.
+    """
+    run_id = _run_id.get()
+    with _lock:
+        if run_id is not None:
+            listener = _listeners.get(run_id)
+        else:
+            listener = next(iter(_listeners.values())) if len(_listeners) == 1 else None
+    if listener is None:
+        return
+    try:
+        listener(tool, message)
+    except Exception as e:
+        print(f"Error publishing progress for {tool}: {e}")
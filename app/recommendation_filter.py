@@ -0,0 +1,56 @@
+from collections.abc import Iterable
+
+# Estados y prioridades que admite el filtro de list_recommendations.
+RECOMMENDATION_STATES = ["ACTIVE", "CLAIMED", "SUCCEEDED", "FAILED", "DISMISSED"]
+PRIORITIES = ["P1", "P2", "P3", "P4"]
+# Estados que aún requieren acción; los demás solo interesan como historial.
+PENDING_STATES = ["ACTIVE", "CLAIMED"]
+
+# Campo del filtro de la API -> atributo de recommender_v1.Recommendation.
+_FILTER_FIELDS = {
+    "stateInfo.state": lambda rec: rec.state_info.state.name,
+    "priority": lambda rec: rec.priority.name,
+}
+
+
+def build_recommendation_filter(states: Iterable[str] | None = None,
+                                min_priority: str | None = None) -> str:
+    """Filtro de list_recommendations para unos estados y una prioridad mínima; "" si no se filtra.
+
+    min_priority="P2" deja P1 y P2. ValueError con estados o prioridades desconocidos.
+    """
+    clauses = []
+    states = [state.strip().upper() for state in (states or ()) if state.strip()]
+    for state in states:
+        if state not in RECOMMENDATION_STATES:
+            raise ValueError(f"Unknown recommendation state {state!r}; expected one of {RECOMMENDATION_STATES}")
+    if states:
+        clauses.append(_any_of("stateInfo.state", states))
+    if min_priority:
+        min_priority = min_priority.strip().upper()
+        if min_priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {min_priority!r}; expected one of {PRIORITIES}")
+        if min_priority != PRIORITIES[-1]:
+            clauses.append(_any_of("priority", PRIORITIES[:PRIORITIES.index(min_priority) + 1]))
+    return " AND ".join(clauses)
+
+
+def _any_of(field: str, values: list[str]) -> str:
+    if len(values) == 1:
+        return f"{field} = {values[0]}"
+    return "(" + " OR ".join(f"{field} = {value}" for value in values) + ")"
+
+
+def parse_recommendation_filter(filter_string: str) -> dict[str, list[str]]:
+    """Campo -> valores admitidos de un filtro generado por build_recommendation_filter."""
+    allowed: dict[str, list[str]] = {}
+    for clause in filter_string.split(" AND ") if filter_string else ():
+        for term in clause.strip("()").split(" OR "):
+            field, _, value = term.partition("=")
+            allowed.setdefault(field.strip(), []).append(value.strip())
+    return allowed
+
+
+def matches_filter(recommendation, allowed: dict[str, list[str]]) -> bool:
+    """Evalúa en local un filtro ya parseado, para backends que no lo aplican en servidor."""
+    return all(_FILTER_FIELDS[field](recommendation) in values for field, values in allowed.items())
@@ -0,0 +1,117 @@
+import re
+from collections.abc import Iterable
+from typing import NamedTuple
+
+# Servicios que aparecen con otro host en las recomendaciones que en Cloud Asset Inventory.
+SERVICE_ALIASES = {"sqladmin": "cloudsql"}
+
+# Estados que ya no requieren acción.
+CLOSED_STATES = {"SUCCEEDED", "FAILED", "DISMISSED"}
+
+_VERSION_SEGMENT = re.compile(r"^v\d+((alpha|beta)\d*)?$")
+_LOCATION_SEGMENTS = {"regions", "zones", "locations"}
+
+
+def resource_key(full_name: str) -> str:
+    """Clave de unión de un nombre completo de recurso ("//servicio.googleapis.com/...").
+
+    Las recomendaciones y el inventario no escriben igual el mismo recurso: número de
+    proyecto frente a id, "regions" frente a "locations", versión de API en la ruta
+    (sqladmin.../v1/...) o el host del servicio. La clave ignora todo eso; como el
+    índice es de un solo proyecto, prescindir del proyecto no mezcla recursos.
+    """
+    if not full_name.startswith("//"):
+        return full_name
+    host, _, path = full_name[2:].partition("/")
+    service = host.split(".")[0]
+    segments = []
+    previous = ""
+    for segment in path.split("/"):
+        if _VERSION_SEGMENT.match(segment) and not segments:
+            continue
+        if previous == "projects":
+            segment = "_"
+        elif segment in _LOCATION_SEGMENTS:
+            segment = "locations"
+        segments.append(segment)
+        previous = segment
+    return "/".join([SERVICE_ALIASES.get(service, service), *segments])
+
+
+class IndexedResource(NamedTuple):
+    """Lo que el índice guarda de cada recurso del inventario."""
+    asset_name: str
+    bucket: str
+    name: str
+    monthly_cost: float
+
+
+class RecommendationIndex:
+    """Cruce entre recomendaciones parseadas y recursos del inventario, en ambos sentidos.
+
+    Se llena de forma incremental: primero los recursos con add_record, según llegan
+    del inventario, y después las recomendaciones (cada una con sus resource_names)
+    con add_recommendations. De cada recurso solo se guarda un IndexedResource.
+    by_resource va de asset_name a las posiciones de sus recomendaciones y
+    by_recommendation del id de la recomendación a los asset_name que afecta. Las que
+    no tocan ningún recurso del inventario (p.ej. las de IAM sobre el proyecto) quedan
+    en unmatched.
+    """
+
+    def __init__(self, records: Iterable = (), recommendations: Iterable[dict] = ()):
+        self.resources: dict[str, IndexedResource] = {}
+        self._keys: dict[str, str] = {}
+        self.recommendations: list[dict] = []
+        self.by_resource: dict[str, list[int]] = {}
+        self.by_recommendation: dict[str, list[str]] = {}
+        self.unmatched: list[int] = []
+        for record in records:
+            self.add_record(record)
+        self.add_recommendations(recommendations)
+
+    def add_record(self, record):
+        self.resources[record.asset_name] = IndexedResource(record.asset_name, record.bucket,
+                                                            record.resource.name, record.resource.monthly_cost)
+        self._keys[resource_key(record.asset_name)] = record.asset_name
+
+    def add_recommendations(self, recommendations: Iterable[dict]):
+        """Cruza recomendaciones con los recursos añadidos hasta ahora."""
+        for rec in recommendations:
+            position = len(self.recommendations)
+            self.recommendations.append(rec)
+            matched = []
+            for name in rec.get("resource_names", ()):
+                asset_name = self._keys.get(resource_key(name))
+                if asset_name is not None and asset_name not in matched:
+                    matched.append(asset_name)
+                    self.by_resource.setdefault(asset_name, []).append(position)
+            if matched:
+                self.by_recommendation[rec["id"]] = matched
+            else:
+                self.unmatched.append(position)
+
+    def recommendations_for(self, asset_name: str, pending_only: bool = True) -> list[dict]:
+        recs = [self.recommendations[i] for i in self.by_resource.get(asset_name, ())]
+        if pending_only:
+            recs = [rec for rec in recs if rec.get("state") not in CLOSED_STATES]
+        return recs
+
+    def resources_for(self, recommendation_id: str) -> list[str]:
+        return self.by_recommendation.get(recommendation_id, [])
+
+    def savings_for(self, asset_name: str) -> float:
+        """Ahorro mensual de las recomendaciones pendientes de un recurso.
+
+        Una recomendación sobre varios recursos cuenta entera en cada uno.
+        """
+        return sum(rec.get("monthly_savings", 0) for rec in self.recommendations_for(asset_name))
+
+    def costly_with_recommendations(self, limit: int | None = None) -> list[tuple[IndexedResource, list[dict]]]:
+        """(recurso, recomendaciones pendientes) de los recursos con alguna, del más caro al más barato."""
+        matches = []
+        for asset_name in self.by_resource:
+            recs = self.recommendations_for(asset_name)
+            if recs:
+                matches.append((self.resources[asset_name], recs))
+        matches.sort(key=lambda match: (-match[0].monthly_cost, match[0].asset_name))
+        return matches[:limit] if limit is not None else matches
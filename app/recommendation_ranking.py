@@ -0,0 +1,56 @@
+import base64
+import heapq
+import json
+from collections.abc import Iterable
+
+# Orden de las prioridades del Recommender; las desconocidas van al final.
+PRIORITY_RANK = {"P1": 0, "P2": 1, "P3": 2, "P4": 3}
+
+# Recomendaciones que se devuelven por página a la herramienta del agente.
+RANKING_PAGE_SIZE = 10
+
+RankKey = tuple[float, int, str]
+
+
+def rank_key(rec: dict) -> RankKey:
+    """Clave de orden: más ahorro primero, después más prioridad; el id deshace empates."""
+    return (-rec.get("monthly_savings", 0), PRIORITY_RANK.get(rec.get("priority"), len(PRIORITY_RANK)), rec.get("id", ""))
+
+
+def top_k(recs: Iterable[dict], k: int, after: RankKey | None = None) -> list[dict]:
+    """Las k mejores recomendaciones según rank_key, solo entre las posteriores a after.
+
+    Usa un heap de tamaño k, así que no ordena la lista completa.
+    """
+    if after is not None:
+        recs = (rec for rec in recs if rank_key(rec) > after)
+    return heapq.nsmallest(k, recs, key=rank_key)
+
+
+def encode_cursor(rec: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(rank_key(rec))).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> RankKey:
+    """Clave de la última recomendación entregada; ValueError si el cursor no es válido."""
+    try:
+        savings, priority, rec_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (float(savings), int(priority), str(rec_id))
+    except Exception as e:
+        raise ValueError(f"Invalid recommendations cursor: {cursor!r}") from e
+
+
+def page_recommendations(categorized: dict[str, list[dict]], page_size: int = RANKING_PAGE_SIZE,
+                         cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Una página del ranking de todas las categorías y el cursor de la siguiente (None si no hay más).
+
+    El cursor guarda la clave de la última recomendación entregada y no una posición,
+    de modo que sigue siendo válido aunque entre páginas aparezcan o desaparezcan
+    recomendaciones.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    recs = (rec for recs in categorized.values() for rec in recs)
+    page = top_k(recs, page_size + 1, after)
+    if len(page) > page_size:
+        return page[:page_size], encode_cursor(page[page_size - 1])
+    return page, None
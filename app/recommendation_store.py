@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from collections.abc import Iterable
+from contextlib import closing
+
+from app.inventory_store import DEFAULT_SNAPSHOT_PATH, SQLiteStore
+from app.recommendation_filter import PENDING_STATES
+
+DEFAULT_RECOMMENDATION_STORE_PATH = os.environ.get("RECOMMENDATION_STORE_PATH", DEFAULT_SNAPSHOT_PATH)
+
+# Cada recommender regenera sus resultados más o menos una vez al día.
+RECOMMENDATION_REFRESH_SECONDS = 24 * 60 * 60
+# Si el recommender no ha refrescado cuando tocaba, no se vuelve a mirar más a menudo que esto.
+MIN_RECHECK_SECONDS = 60 * 60
+# Reclamar o descartar una recomendación cambia su estado y su etag pero no el
+# lastRefreshTime, así que los recommenders con recomendaciones pendientes se vuelven a
+# mirar con esta frecuencia para no seguir sirviendo como activas las ya descartadas.
+PENDING_RECHECK_SECONDS = 10 * 60
+# Los insights se regeneran con la misma cadencia diaria que las recomendaciones.
+INSIGHT_TTL_SECONDS = 24 * 60 * 60
+
+Pair = tuple[str, str]
+
+
+class RecommendationStore(SQLiteStore):
+    """Almacén en SQLite de recomendaciones ya parseadas por (project_id, name) con su etag.
+
+    Por cada (location, recommender_type) guarda cuándo se descargó y el lastRefreshTime
+    más reciente de sus recomendaciones. Un recommender se considera fresco hasta
+    lastRefreshTime + RECOMMENDATION_REFRESH_SECONDS (su próximo refresco previsto),
+    y nunca se vuelve a pedir antes de MIN_RECHECK_SECONDS desde la última descarga.
+    Sin recomendaciones (sin lastRefreshTime) dura RECOMMENDATION_REFRESH_SECONDS
+    desde la descarga. Si alguna recomendación guardada está en PENDING_STATES, el
+    recommender caduca además a los pending_recheck_seconds de la descarga.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS recommendations (
+            project_id TEXT NOT NULL,
+            location TEXT NOT NULL,
+            recommender_type TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            etag TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (project_id, name)
+        )""",
+        """CREATE INDEX IF NOT EXISTS recommendations_by_recommender
+        ON recommendations (project_id, location, recommender_type, position)""",
+        """CREATE TABLE IF NOT EXISTS recommender_fetches (
+            project_id TEXT NOT NULL,
+            location TEXT NOT NULL,
+            recommender_type TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            last_refresh_time REAL NOT NULL,
+            PRIMARY KEY (project_id, location, recommender_type)
+        )""",
+    )
+    TABLES = ("recommendations", "recommender_fetches")
+
+    def __init__(self, path: str = DEFAULT_RECOMMENDATION_STORE_PATH,
+                 refresh_seconds: float = RECOMMENDATION_REFRESH_SECONDS,
+                 min_recheck_seconds: float = MIN_RECHECK_SECONDS,
+                 pending_recheck_seconds: float = PENDING_RECHECK_SECONDS):
+        super().__init__(path)
+        self.refresh_seconds = refresh_seconds
+        self.min_recheck_seconds = min_recheck_seconds
+        self.pending_recheck_seconds = pending_recheck_seconds
+
+    def _is_fresh(self, fetched_at: float, last_refresh_time: float, now: float, pending: bool = False) -> bool:
+        if pending and now >= fetched_at + self.pending_recheck_seconds:
+            return False
+        if not last_refresh_time:
+            return now < fetched_at + self.refresh_seconds
+        return now < max(last_refresh_time + self.refresh_seconds, fetched_at + self.min_recheck_seconds)
+
+    def fresh_pairs(self, project_id: str, pairs: Iterable[Pair]) -> set[Pair]:
+        """Los pares de pairs cuyo contenido guardado sigue vigente."""
+        wanted = set(pairs)
+        now = time.time()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT location, recommender_type, fetched_at, last_refresh_time FROM recommender_fetches WHERE project_id = ?",
+                (project_id,),
+            ).fetchall()
+            pending = set(conn.execute(
+                f"""SELECT DISTINCT location, recommender_type FROM recommendations
+                WHERE project_id = ? AND json_extract(data, '$.state') IN ({", ".join("?" * len(PENDING_STATES))})""",
+                (project_id, *PENDING_STATES),
+            ).fetchall())
+        return {
+            (location, recommender_type) for location, recommender_type, fetched_at, last_refresh_time in rows
+            if (location, recommender_type) in wanted
+            and self._is_fresh(fetched_at, last_refresh_time, now, (location, recommender_type) in pending)
+        }
+
+    def load_pairs(self, project_id: str, pairs: Iterable[Pair]) -> dict[Pair, list[dict]]:
+        """Recomendaciones guardadas de cada par, en el orden en que las devolvió la API."""
+        wanted = set(pairs)
+        loaded: dict[Pair, list[dict]] = {pair: [] for pair in wanted}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT location, recommender_type, data FROM recommendations WHERE project_id = ?
+                ORDER BY location, recommender_type, position""",
+                (project_id,),
+            ).fetchall()
+        for location, recommender_type, data in rows:
+            if (location, recommender_type) in wanted:
+                loaded[(location, recommender_type)].append(json.loads(data))
+        return loaded
+
+    def load_recommender(self, project_id: str, location: str, recommender_type: str) -> dict[str, tuple[str, dict]]:
+        """name -> (etag, recomendación parseada) de un recommender, en el orden de la API."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """SELECT name, etag, data FROM recommendations
+                WHERE project_id = ? AND location = ? AND recommender_type = ? ORDER BY position""",
+                (project_id, location, recommender_type),
+            ).fetchall()
+        return {name: (etag, json.loads(data)) for name, etag, data in rows}
+
+    def save_recommender(self, project_id: str, location: str, recommender_type: str,
+                         recommendations: list[tuple[str, str, dict]], last_refresh_time: float):
+        """Sustituye las recomendaciones de un recommender por las (name, etag, data) recién descargadas."""
+        rows = [
+            (project_id, location, recommender_type, position, name, etag, json.dumps(data))
+            for position, (name, etag, data) in enumerate(recommendations)
+        ]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM recommendations WHERE project_id = ? AND location = ? AND recommender_type = ?",
+                (project_id, location, recommender_type),
+            )
+            conn.executemany("INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO recommender_fetches VALUES (?, ?, ?, ?, ?)",
+                (project_id, location, recommender_type, time.time(), last_refresh_time),
+            )
+
+
+class InsightCache(SQLiteStore):
+    """Insights ya resumidos por (project_id, name), válidos durante ttl_seconds.
+
+    Muchas recomendaciones citan el mismo insight y cambian poco de un día a otro, así
+    que se guardan aparte de las recomendaciones y se comparten entre pasadas.
+    """
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS insights (
+            project_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (project_id, name)
+        )""",
+    )
+    TABLES = ("insights",)
+
+    def __init__(self, path: str = DEFAULT_RECOMMENDATION_STORE_PATH, ttl_seconds: float = INSIGHT_TTL_SECONDS):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+
+    def get_many(self, project_id: str, names: Iterable[str]) -> dict[str, dict]:
+        """name -> insight resumido de los que siguen vigentes."""
+        wanted = set(names)
+        cutoff = time.time() - self.ttl_seconds
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM insights WHERE project_id = ? AND fetched_at >= ?",
+                (project_id, cutoff),
+            ).fetchall()
+        return {name: json.loads(data) for name, data in rows if name in wanted}
+
+    def put_many(self, project_id: str, insights: dict[str, dict]):
+        now = time.time()
+        rows = [(project_id, name, now, json.dumps(data)) for name, data in insights.items()]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO insights VALUES (?, ?, ?, ?)", rows)
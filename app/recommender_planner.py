@@ -0,0 +1,146 @@
+from collections.abc import Iterable
+
+from app.asset_registry import ASSET_TYPE_REGISTRY
+from app.recommender_service import LOCATIONS, RECOMMENDER_TYPES
+
+# Recommenders ligados a un bucket del inventario: se consultan solo donde hay
+# recursos de ese bucket. El ámbito indica qué ubicación se usa: "zone", "region" o
+# "location" (la zona o región tal como aparece en el recurso).
+INVENTORY_SCOPED_RECOMMENDERS: dict[str, tuple[str, str]] = {
+    "google.compute.instance.IdleResourceRecommender": ("vms", "zone"),
+    "google.compute.instance.MachineTypeRecommender": ("vms", "zone"),
+    "google.compute.instanceGroupManager.MachineTypeRecommender": ("vms", "zone"),
+    "google.compute.disk.IdleResourceRecommender": ("vms", "zone"),
+    "google.compute.IdleResourceRecommender": ("vms", "zone"),
+    "google.compute.RightSizeResourceRecommender": ("vms", "zone"),
+    "google.compute.commitment.UsageCommitmentRecommender": ("vms", "region"),
+    "google.compute.address.IdleResourceRecommender": ("vms", "region"),
+    "google.cloudsql.instance.IdleRecommender": ("databases", "region"),
+    "google.cloudsql.instance.OverprovisionedRecommender": ("databases", "region"),
+    "google.cloudsql.instance.UnderprovisionedRecommender": ("databases", "region"),
+    "google.cloudsql.instance.SecurityRecommender": ("databases", "region"),
+    "google.cloudsql.instance.PerformanceRecommender": ("databases", "region"),
+    "google.cloudsql.instance.ReliabilityRecommender": ("databases", "region"),
+    "google.cloudsql.instance.OutOfDiskRecommender": ("databases", "region"),
+    "google.run.service.CostRecommender": ("run_services", "region"),
+    "google.run.service.SecurityRecommender": ("run_services", "region"),
+    "google.run.service.IdentityRecommender": ("run_services", "region"),
+    "google.container.DiagnosisRecommender": ("clusters", "location"),
+    "google.storage.bucket.SoftDeleteRecommender": ("storage", "global"),
+    "google.storage.bucket.AnywhereCacheRecommender": ("storage", "global"),
+}
+
+# Recommenders de recursos huérfanos (discos e IPs sin VM, recursos ociosos en general): no
+# tienen por qué estar donde hay VMs, así que se consultan siempre en las fallback_locations
+# además de en las ubicaciones del inventario.
+ORPHAN_RECOMMENDERS = {
+    "google.compute.disk.IdleResourceRecommender",
+    "google.compute.address.IdleResourceRecommender",
+    "google.compute.IdleResourceRecommender",
+}
+
+# Recommenders de ámbito proyecto que solo existen en "global".
+GLOBAL_RECOMMENDERS = {
+    "google.iam.policy.Recommender",
+    "google.iam.serviceAccount.ChangeRiskRecommender",
+    "google.iam.policy.ChangeRiskRecommender",
+    "google.compute.image.IdleResourceRecommender",
+    "google.resourcemanager.projectUtilization.Recommender",
+    "google.resourcemanager.serviceLimit.Recommender",
+    "google.resourcemanager.project.ChangeRiskRecommender",
+}
+
+_LOCATION_SEGMENTS = ("zones", "regions", "locations")
+
+
+def resource_location(record) -> str:
+    """Zona o región de un recurso, sacada del nombre del asset o de sus campos; "" si no se conoce."""
+    parts = record.asset_name.split("/")
+    for segment in _LOCATION_SEGMENTS:
+        if segment in parts[:-1]:
+            return parts[parts.index(segment) + 1]
+    return getattr(record.resource, "zone", "") or ""
+
+
+def _is_zone(location: str) -> bool:
+    # Las zonas llevan sufijo de letra: europe-west1-b frente a la región europe-west1.
+    return location.rsplit("-", 1)[-1].isalpha() and location.count("-") >= 2
+
+
+def _scoped(location: str, scope: str) -> str:
+    if scope == "region" and _is_zone(location):
+        return location.rsplit("-", 1)[0]
+    if scope == "zone" and not _is_zone(location):
+        return ""
+    return location
+
+
+class InventoryLocations:
+    """Ubicaciones de cada bucket del inventario, acumuladas recurso a recurso.
+
+    Permite planificar los recommenders en la misma pasada en que se recorre el
+    inventario para otra cosa, sin guardar los recursos.
+    """
+
+    def __init__(self):
+        self.by_bucket: dict[str, set[str]] = {}
+        # Buckets con algún recurso de ubicación desconocida.
+        self.unlocated: set[str] = set()
+        self.count = 0
+
+    def add(self, record):
+        self.count += 1
+        location = resource_location(record)
+        if location:
+            self.by_bucket.setdefault(record.bucket, set()).add(location)
+        else:
+            self.unlocated.add(record.bucket)
+
+    def consume(self, records: Iterable) -> "InventoryLocations":
+        for record in records:
+            self.add(record)
+        return self
+
+
+def plan_recommender_pairs(records: Iterable, unknown_asset_types: Iterable[str] = (),
+                           fallback_locations: list[str] = LOCATIONS) -> list[tuple[str, str]]:
+    """Pares (location, recommender_type) que merece la pena consultar para un inventario.
+
+    Los recommenders ligados al inventario se piden solo en las zonas/regiones donde
+    hay recursos de su bucket, incluidas las que no están en fallback_locations. Si algún
+    recurso del bucket no tiene ubicación conocida, o su tipo está en unknown_asset_types
+    (p.ej. no terminó de listarse), se usan también las fallback_locations. Los de
+    proyecto van solo a "global" y el resto a fallback_locations, como hasta ahora.
+    El resultado sale ordenado por ubicación y después en el orden de RECOMMENDER_TYPES.
+    records puede ser también un InventoryLocations ya acumulado.
+    """
+    inventory = records if isinstance(records, InventoryLocations) else InventoryLocations().consume(records)
+    locations_by_bucket = inventory.by_bucket
+    unlocated = inventory.unlocated | {ASSET_TYPE_REGISTRY[t].bucket for t in unknown_asset_types
+                                       if t in ASSET_TYPE_REGISTRY}
+
+    pairs = set()
+    for recommender_type in RECOMMENDER_TYPES:
+        if recommender_type in GLOBAL_RECOMMENDERS:
+            pairs.add(("global", recommender_type))
+            continue
+        if recommender_type not in INVENTORY_SCOPED_RECOMMENDERS:
+            pairs.update((location, recommender_type) for location in fallback_locations)
+            continue
+        bucket, scope = INVENTORY_SCOPED_RECOMMENDERS[recommender_type]
+        orphan = recommender_type in ORPHAN_RECOMMENDERS
+        if bucket not in locations_by_bucket and bucket not in unlocated and not orphan:
+            continue
+        if scope == "global":
+            pairs.add(("global", recommender_type))
+            continue
+        locations = set(locations_by_bucket.get(bucket, ()))
+        if bucket in unlocated or orphan:
+            locations.update(location for location in fallback_locations if location != "global")
+        for location in locations:
+            location = _scoped(location, scope)
+            if location:
+                pairs.add((location, recommender_type))
+
+    order = {recommender_type: i for i, recommender_type in enumerate(RECOMMENDER_TYPES)}
+    return sorted(pairs, key=lambda pair: (pair[0], order[pair[1]]))
@@ -0,0 +1,100 @@
+import json
+import os
+from collections.abc import Iterator
+
+from google.api_core.exceptions import NotFound
+from google.cloud.recommender_v1 import Recommendation
+
+from app.recommendation_filter import matches_filter, parse_recommendation_filter
+
+# Volcado de respuestas reales de la API incluido en el repo.
+DEFAULT_REPLAY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "recommender_complete_20250916_145846")
+
+# Bytes que se leen de disco cada vez al recorrer un volcado.
+READ_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[dict]:
+    """Entrega uno a uno los objetos de un fichero con un array JSON sin cargarlo entero.
+
+    Lee por bloques y decodifica cada elemento en cuanto está completo en el buffer.
+    """
+    with open(path, encoding="utf-8") as f:
+        buffer, position, started = "", 0, False
+        eof = False
+        while True:
+            # Saltar espacios, la apertura del array y las comas entre elementos.
+            while position < len(buffer) and buffer[position] in " \t\r\n,[":
+                if buffer[position] == "[":
+                    started = True
+                position += 1
+            if position < len(buffer) and buffer[position] == "]" and started:
+                return
+            try:
+                if position >= len(buffer):
+                    raise ValueError("buffer vacío")
+                item, end = _decoder.raw_decode(buffer, position)
+            except ValueError as e:
+                if eof:
+                    if buffer[position:].strip():
+                        raise ValueError(f"Truncated JSON array in {path}") from e
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield item
+            position = end
+
+
+def _file_key(file_name: str) -> tuple[str, str] | None:
+    """(location, recommender_type) de un volcado "<recommender con '.' -> '_'>_<location>.json".
+
+    Los tipos de recommender no llevan '_' ni las ubicaciones tampoco, así que el cambio se deshace sin ambigüedad.
+    """
+    stem, extension = os.path.splitext(file_name)
+    if extension != ".json" or "_" not in stem:
+        return None
+    recommender, location = stem.rsplit("_", 1)
+    return location, recommender.replace("_", ".")
+
+
+class ReplayRecommenderClient:
+    """Sustituto offline de RecommenderClient que sirve los volcados recommender_complete_*.
+
+    Indexa (location, recommender_type) -> fichero al construirse y, en cada
+    list_recommendations, recorre el fichero en streaming convirtiendo cada objeto en
+    un recommender_v1.Recommendation. Un par sin volcado devuelve una lista vacía,
+    como un recommender habilitado sin recomendaciones. El proyecto del parent se ignora
+    y el filter de la petición se evalúa en local.
+    """
+
+    def __init__(self, dump_dir: str = DEFAULT_REPLAY_DIR):
+        self.dump_dir = dump_dir
+        self.index: dict[tuple[str, str], str] = {}
+        for file_name in sorted(os.listdir(dump_dir)):
+            key = _file_key(file_name)
+            if key is None:
+                continue
+            self.index[key] = os.path.join(dump_dir, file_name)
+
+    def list_recommendations(self, request: dict) -> Iterator[Recommendation]:
+        parts = request["parent"].split("/")
+        location, recommender_type = parts[3], parts[5]
+        path = self.index.get((location, recommender_type))
+        if path is None:
+            return iter(())
+        allowed = parse_recommendation_filter(request.get("filter", ""))
+        recommendations = (Recommendation.from_json(json.dumps(item), ignore_unknown_fields=True)
+                           for item in iter_json_array(path))
+        return (rec for rec in recommendations if matches_filter(rec, allowed))
+
+    def list_insights(self, request: dict) -> Iterator:
+        # Los volcados no incluyen insights.
+        return iter(())
+
+    def get_insight(self, request: dict):
+        raise NotFound(f"{request['name']} is not in the replay dumps")
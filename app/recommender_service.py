@@ -1,97 +1,321 @@
-from google.cloud.recommender_v1 import RecommenderClient
-from typing import List, Dict
 import json
-import google.auth
+import os
+import random
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from google.api_core.exceptions import (
+    NotFound,
+    PermissionDenied,
+    ResourceExhausted,
+    TooManyRequests,
+)
+
+from app.capability_cache import UnavailableRecommenderCache
+from app.client_pool import get_credential_context, get_recommender_client
+from app.pagination import DEFAULT_PAGE_SIZE, iter_prefetched
+from app.recommendation_store import RecommendationStore
+from app.recommender_replay import ReplayRecommenderClient
+
+# Ubicaciones y recommenders que se consultan; cada par es una llamada list_recommendations.
+LOCATIONS = ["global", "europe-west1", "europe-west1-b", "us-central1"]
+RECOMMENDER_TYPES = [
+    "google.iam.policy.Recommender",
+    "google.iam.serviceAccount.ChangeRiskRecommender",
+    "google.iam.policy.ChangeRiskRecommender",
+    "google.compute.instance.IdleResourceRecommender",
+    "google.compute.instance.MachineTypeRecommender",
+    "google.compute.instanceGroupManager.MachineTypeRecommender",
+    "google.compute.commitment.UsageCommitmentRecommender",
+    "google.compute.disk.IdleResourceRecommender",
+    "google.compute.address.IdleResourceRecommender",
+    "google.compute.image.IdleResourceRecommender",
+    "google.compute.IdleResourceRecommender",
+    "google.compute.RightSizeResourceRecommender",
+    "google.storage.bucket.SoftDeleteRecommender",
+    "google.storage.bucket.AnywhereCacheRecommender",
+    "google.cloudsql.instance.IdleRecommender",
+    "google.cloudsql.instance.OverprovisionedRecommender",
+    "google.cloudsql.instance.UnderprovisionedRecommender",
+    "google.cloudsql.instance.SecurityRecommender",
+    "google.cloudsql.instance.PerformanceRecommender",
+    "google.cloudsql.instance.ReliabilityRecommender",
+    "google.cloudsql.instance.OutOfDiskRecommender",
+    "google.run.service.CostRecommender",
+    "google.run.service.SecurityRecommender",
+    "google.run.service.IdentityRecommender",
+    "google.bigquery.table.PartitionClusterRecommender",
+    "google.bigquery.capacityCommitments.Recommender",
+    "google.container.DiagnosisRecommender",
+    "google.logging.productSuggestion.ContainerRecommender",
+    "google.resourcemanager.projectUtilization.Recommender",
+    "google.resourcemanager.serviceLimit.Recommender",
+    "google.resourcemanager.project.ChangeRiskRecommender",
+    "google.cloudfunctions.PerformanceRecommender",
+    "google.firestore.database.FirebaseRulesRecommender",
+    "google.firestore.database.ReliabilityRecommender",
+    "google.cloud.security.GeneralRecommender",
+    "google.cloud.RecentChangeRecommender",
+    "google.cloud.deprecation.GeneralRecommender",
+    "google.clouderrorreporting.Recommender",
+    "google.gmp.project.ManagementRecommender",
+]
+
+# Categorías en las que se agrupan las recomendaciones; las demás van a GENERAL.
+CATEGORIES = ["COST", "SECURITY", "PERFORMANCE", "RELIABILITY", "GENERAL"]
+
+# Llamadas list_recommendations en vuelo a la vez.
+DEFAULT_RECOMMENDER_WORKERS = 16
+
+# Reintentos ante errores de cuota y espera base del backoff exponencial (con jitter).
+QUOTA_RETRIES = 4
+QUOTA_BACKOFF_SECONDS = 0.5
+
+# Directorio con volcados recommender_complete_* a servir en lugar de la API (modo offline).
+RECOMMENDER_REPLAY_DIR = os.environ.get("RECOMMENDER_REPLAY_DIR")
 
 class RecommenderService:
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, page_size: int = DEFAULT_PAGE_SIZE,
+                 deadline_seconds: float | None = None,
+                 max_workers: int = DEFAULT_RECOMMENDER_WORKERS,
+                 unavailable_cache: UnavailableRecommenderCache | None = None,
+                 store: RecommendationStore | None = None,
+                 client=None, filter: str = ""):
         self.project_id = project_id
+        # Filtro que aplica el servidor en list_recommendations (ver recommendation_filter).
+        self.filter = filter
+        # Lo descargado con filtro se guarda aparte para no mezclarlo con los listados completos.
+        self._store_key = f"{project_id}?{filter}" if filter else project_id
+        self.page_size = page_size
+        self.deadline_seconds = deadline_seconds
+        self.max_workers = max(1, max_workers)
+        self.unavailable_cache = unavailable_cache
+        self.store = store
+        # Pares servidos desde store sin llamar a la API en la última pasada.
+        self.served_from_store = 0
+        # Pares saltados por la caché negativa y pares descubiertos como no disponibles en la última pasada.
+        self.skipped_unavailable = 0
+        self._newly_unavailable: dict[tuple[str, str], str] = {}
+        # Hasta cuándo deben esperar todos los workers tras un error de cuota (la cuota es por proyecto).
+        self._backoff_until = 0.0
+        self._backoff_lock = threading.Lock()
+        # "<location>/<recommender>" que no se consultaron antes del deadline en la última pasada,
+        # o que fallaron sin copia en el store.
+        self.missing_recommenders: list[str] = []
+        # "<location>/<recommender>" que fallaron y se sirvieron de la última copia del store.
+        self.stale_recommenders: list[str] = []
+        # Pares cuya descarga falló en la pasada en curso -> si se sirvieron del store.
+        self._fallbacks: dict[tuple[str, str], bool] = {}
+        # Pares planificados en la última pasada, ya sin los de la caché negativa.
+        self._last_pairs: list[tuple[str, str]] = []
+        if client is None and RECOMMENDER_REPLAY_DIR:
+            client = ReplayRecommenderClient(RECOMMENDER_REPLAY_DIR)
+        # Los volcados no son datos del proyecto: en replay no se lee ni se escribe nada
+        # en el store ni en las cachés compartidas con las ejecuciones reales.
+        self.replay = isinstance(client, ReplayRecommenderClient)
+        if self.replay:
+            self.store = None
+            self.unavailable_cache = None
+        if client is not None:
+            # Cliente inyectado (fakes, replay de volcados): no hacen falta credenciales.
+            self.account = "replay account"
+            self.client = client
+            return
         try:
-            self.client = RecommenderClient()
+            # Identidad resuelta una vez; los errores de cada recommender solo la citan.
+            self.account = get_credential_context().account
+            self.client = get_recommender_client()
         except Exception as e:
             print(f"Error initializing RecommenderClient: {e}")
+            self.account = "unknown account"
             self.client = None
         
-    def get_all_recommendations(self) -> List[Dict]:
-        """Obtiene TODAS las recomendaciones de Google Cloud Recommender"""
-        
-        if not self.client:
-            return []
+    def get_all_recommendations(self, pairs: list[tuple[str, str]] | None = None) -> list[dict]:
+        """Obtiene TODAS las recomendaciones de Google Cloud Recommender
+
+        Los pares (ubicación, recommender) se consultan en paralelo (hasta max_workers a
+        la vez) y los resultados se devuelven en el orden de pairs (por defecto, todos los de
+        el producto de LOCATIONS y RECOMMENDER_TYPES; recommender_planner puede reducirlos al inventario).
+        Con deadline_seconds, lo que no ha terminado a tiempo se queda en segundo plano
+        y se anota en missing_recommenders. Con unavailable_cache se saltan los pares que
+        respondieron PERMISSION_DENIED o NOT_FOUND hace menos de su TTL. Con store, los
+        recommenders que no han refrescado desde la última descarga se sirven del almacén
+        y solo se piden los demás.
+        """
 
+        results = dict(self.iter_recommender_results(pairs))
         all_recommendations = []
-        locations = ["global", "europe-west1", "europe-west1-b", "us-central1"]
-        recommender_types = [
-            "google.iam.policy.Recommender",
-            "google.iam.serviceAccount.ChangeRiskRecommender",
-            "google.iam.policy.ChangeRiskRecommender",
-            "google.compute.instance.IdleResourceRecommender",
-            "google.compute.instance.MachineTypeRecommender",
-            "google.compute.instanceGroupManager.MachineTypeRecommender",
-            "google.compute.commitment.UsageCommitmentRecommender",
-            "google.compute.disk.IdleResourceRecommender",
-            "google.compute.address.IdleResourceRecommender",
-            "google.compute.image.IdleResourceRecommender",
-            "google.compute.IdleResourceRecommender",
-            "google.compute.RightSizeResourceRecommender",
-            "google.storage.bucket.SoftDeleteRecommender",
-            "google.storage.bucket.AnywhereCacheRecommender",
-            "google.cloudsql.instance.IdleRecommender",
-            "google.cloudsql.instance.OverprovisionedRecommender",
-            "google.cloudsql.instance.UnderprovisionedRecommender",
-            "google.cloudsql.instance.SecurityRecommender",
-            "google.cloudsql.instance.PerformanceRecommender",
-            "google.cloudsql.instance.ReliabilityRecommender",
-            "google.cloudsql.instance.OutOfDiskRecommender",
-            "google.run.service.CostRecommender",
-            "google.run.service.SecurityRecommender",
-            "google.run.service.IdentityRecommender",
-            "google.bigquery.table.PartitionClusterRecommender",
-            "google.bigquery.capacityCommitments.Recommender",
-            "google.container.DiagnosisRecommender",
-            "google.logging.productSuggestion.ContainerRecommender",
-            "google.resourcemanager.projectUtilization.Recommender",
-            "google.resourcemanager.serviceLimit.Recommender",
-            "google.resourcemanager.project.ChangeRiskRecommender",
-            "google.cloudfunctions.PerformanceRecommender",
-            "google.firestore.database.FirebaseRulesRecommender",
-            "google.firestore.database.ReliabilityRecommender",
-            "google.cloud.security.GeneralRecommender",
-            "google.cloud.RecentChangeRecommender",
-            "google.cloud.deprecation.GeneralRecommender",
-            "google.clouderrorreporting.Recommender",
-            "google.gmp.project.ManagementRecommender",
-        ]
-
-        for location in locations:
-            parent = f"projects/{self.project_id}/locations/{location}"
-            for recommender_type in recommender_types:
-                try:
-                    recommender_parent = f"{parent}/recommenders/{recommender_type}"
-                    
-                    # Listar recomendaciones para este tipo
-                    recommendations = self.client.list_recommendations(
-                        request={"parent": recommender_parent}
-                    )
-                    
-                    recommendations_list = list(recommendations)
-                    print(f"Found {len(recommendations_list)} recommendations for {recommender_type} in {location}")
-
-                    for recommendation in recommendations_list:
-                        rec_data = self._parse_recommendation(recommendation)
-                        if rec_data:
-                            all_recommendations.append(rec_data)
-                            
-                except Exception as e:
-                    creds, _ = google.auth.default()
-                    account = creds.service_account_email if hasattr(creds, 'service_account_email') else 'user account'
-                    # Algunos recommenders pueden no estar disponibles
-                    if "PERMISSION_DENIED" not in str(e) and "NOT_FOUND" not in str(e):
-                        print(f"Error getting {recommender_type} for project {self.project_id} as {account}: {e}")
-                    continue
-        
+        for pair in self._last_pairs:
+            all_recommendations.extend(results.get(pair, ()))
         return all_recommendations
+
+    def iter_recommender_results(self, pairs: list[tuple[str, str]] | None = None) -> Iterator[tuple[tuple[str, str], list[dict]]]:
+        """Entrega ((location, recommender_type), recomendaciones) según va terminando cada par.
+
+        Primero los que se sirven del store y después los de la API en orden de llegada.
+        Los pares que no terminan antes del deadline no se entregan y quedan en
+        missing_recommenders. self._last_pairs guarda los pares planificados tras filtrar.
+        """
+        self.missing_recommenders = []
+        self.stale_recommenders = []
+        self._fallbacks = {}
+        self.skipped_unavailable = 0
+        self.served_from_store = 0
+        self._newly_unavailable = {}
+        self._last_pairs = []
+        if not self.client:
+            return
+
+        if pairs is None:
+            pairs = [(location, recommender_type) for location in LOCATIONS for recommender_type in RECOMMENDER_TYPES]
+        if self.unavailable_cache is not None:
+            unavailable = self.unavailable_cache.unavailable(self.project_id)
+            planned = len(pairs)
+            pairs = [pair for pair in pairs if pair not in unavailable]
+            self.skipped_unavailable = planned - len(pairs)
+            print(f"Skipping {self.skipped_unavailable} recommender/location pairs known to be unavailable")
+        self._last_pairs = list(pairs)
+        stored = {}
+        if self.store is not None:
+            stored = self.store.load_pairs(self._store_key, self.store.fresh_pairs(self._store_key, pairs))
+            self.served_from_store = len(stored)
+            print(f"Serving {len(stored)} recommender/location pairs from the local store")
+        stale = [pair for pair in pairs if pair not in stored]
+
+        deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds is not None else None
+        executor = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(stale))))
+        try:
+            futures = {executor.submit(self._fetch_recommendations, pair[0], pair[1], deadline): pair for pair in stale}
+            for pair in pairs:
+                if pair in stored:
+                    yield pair, stored[pair]
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                for future in as_completed(futures, timeout=remaining):
+                    pair = futures[future]
+                    recs = future.result()
+                    if pair in self._fallbacks:
+                        failed = self.stale_recommenders if self._fallbacks[pair] else self.missing_recommenders
+                        failed.append(f"{pair[0]}/{pair[1]}")
+                    yield pair, recs
+            except FuturesTimeout:
+                done = {futures[future] for future in futures if future.done()}
+                for location, recommender_type in stale:
+                    if (location, recommender_type) not in done:
+                        print(f"Deadline reached while listing {recommender_type} in {location}; leaving it out")
+                        self.missing_recommenders.append(f"{location}/{recommender_type}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if self.unavailable_cache is not None and self._newly_unavailable:
+            self.unavailable_cache.record(self.project_id, dict(self._newly_unavailable))
     
-    def _parse_recommendation(self, recommendation) -> Dict:
+    def _wait_for_quota(self):
+        with self._backoff_lock:
+            delay = self._backoff_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _back_off(self, attempt: int, deadline: float | None) -> bool:
+        """Programa una pausa común tras un error de cuota; False si no quedan reintentos o tiempo."""
+        delay = QUOTA_BACKOFF_SECONDS * (2 ** attempt) * (1 + random.random() / 2)
+        resume = time.monotonic() + delay
+        if attempt >= QUOTA_RETRIES or (deadline is not None and resume >= deadline):
+            return False
+        with self._backoff_lock:
+            self._backoff_until = max(self._backoff_until, resume)
+        return True
+
+    @staticmethod
+    def _is_quota_error(error: Exception) -> bool:
+        return isinstance(error, (ResourceExhausted, TooManyRequests)) or "RESOURCE_EXHAUSTED" in str(error)
+
+    def _list_with_backoff(self, recommender_parent: str, deadline: float | None) -> list:
+        attempt = 0
+        while True:
+            self._wait_for_quota()
+            try:
+                return list(self.list_recommendations(recommender_parent))
+            except Exception as e:
+                if not self._is_quota_error(e) or not self._back_off(attempt, deadline):
+                    raise
+                attempt += 1
+
+    def _fetch_recommendations(self, location: str, recommender_type: str,
+                               deadline: float | None = None) -> list[dict]:
+        """Recomendaciones ya parseadas de un recommender en una ubicación"""
+        parent = f"projects/{self.project_id}/locations/{location}"
+        try:
+            recommender_parent = f"{parent}/recommenders/{recommender_type}"
+            
+            # Listar recomendaciones para este tipo, esperando y reintentando si se agota la cuota
+            recommendations_list = self._list_with_backoff(recommender_parent, deadline)
+            print(f"Found {len(recommendations_list)} recommendations for {recommender_type} in {location}")
+            if self.store is not None:
+                return self._merge_into_store(location, recommender_type, recommendations_list)
+
+            parsed = []
+            for recommendation in recommendations_list:
+                rec_data = self._parse_recommendation(recommendation)
+                if rec_data:
+                    parsed.append(rec_data)
+            return parsed
+                    
+        except Exception as e:
+            # Algunos recommenders pueden no estar disponibles
+            reason = self._unavailable_reason(e)
+            if reason:
+                self._newly_unavailable[(location, recommender_type)] = reason
+                return []
+            print(f"Error getting {recommender_type} for project {self.project_id} as {self.account}: {e}")
+            # Error transitorio: mejor la última copia guardada que dar el recommender por vacío.
+            stored = {}
+            if self.store is not None:
+                stored = self.store.load_recommender(self._store_key, location, recommender_type)
+            self._fallbacks[(location, recommender_type)] = bool(stored)
+            if stored:
+                print(f"Serving the stored copy of {recommender_type} in {location} instead")
+            return [data for _, data in stored.values()]
+
+    def _merge_into_store(self, location: str, recommender_type: str, recommendations_list: list) -> list[dict]:
+        """Guarda lo descargado en store reutilizando el parseo de las recomendaciones cuyo etag no ha cambiado"""
+        known = self.store.load_recommender(self._store_key, location, recommender_type)
+        rows, parsed, last_refresh_time = [], [], 0.0
+        for recommendation in recommendations_list:
+            entry = known.get(recommendation.name)
+            if entry is not None and entry[0] == recommendation.etag:
+                rec_data = entry[1]
+            else:
+                rec_data = self._parse_recommendation(recommendation)
+            if rec_data:
+                rows.append((recommendation.name, recommendation.etag, rec_data))
+                parsed.append(rec_data)
+            if recommendation.last_refresh_time:
+                last_refresh_time = max(last_refresh_time, recommendation.last_refresh_time.timestamp())
+        self.store.save_recommender(self._store_key, location, recommender_type, rows, last_refresh_time)
+        return parsed
+
+    @staticmethod
+    def _unavailable_reason(error: Exception) -> str | None:
+        """PERMISSION_DENIED o NOT_FOUND si el recommender no está disponible en el proyecto"""
+        if isinstance(error, PermissionDenied) or "PERMISSION_DENIED" in str(error):
+            return "PERMISSION_DENIED"
+        if isinstance(error, NotFound) or "NOT_FOUND" in str(error):
+            return "NOT_FOUND"
+        return None
+
+    def list_recommendations(self, recommender_parent: str) -> Iterator:
+        """Entrega las recomendaciones de un recommender descargando la página siguiente en paralelo"""
+        request = {"parent": recommender_parent, "page_size": self.page_size}
+        if self.filter:
+            request["filter"] = self.filter
+        pager = self.client.list_recommendations(request=request)
+        return iter_prefetched(pager, "recommendations")
+
+    def _parse_recommendation(self, recommendation) -> dict:
         """Parsea una recomendación en formato legible"""
         
         try:
@@ -112,52 +336,111 @@ class RecommenderService:
             description = recommendation.description
             
             resource = "Unknown"
+            # Nombres completos de los recursos afectados, para cruzarlos con el inventario.
+            resource_names = list(getattr(recommendation, "target_resources", None) or ())
             if recommendation.content and recommendation.content.operation_groups:
                 for op_group in recommendation.content.operation_groups:
                     for operation in op_group.operations:
                         if operation.resource:
-                            resource = operation.resource.split("/")[-1]
-                            break
+                            if resource == "Unknown":
+                                resource = operation.resource.split("/")[-1]
+                            if operation.resource not in resource_names:
+                                resource_names.append(operation.resource)
             
+            insights = [associated.insight for associated in getattr(recommendation, "associated_insights", None) or ()]
+
             return {
                 "id": rec_name,
                 "type": rec_type,
                 "resource": resource,
+                "resource_names": resource_names,
                 "description": description,
                 "monthly_savings": cost_impact,
                 "state": recommendation.state_info.state.name,
                 "priority": recommendation.priority.name,
-                "category": category
+                "category": category,
+                "insights": insights
             }
             
         except Exception as e:
             print(f"Error parsing recommendation: {e}")
             return None
 
-    def get_categorized_recommendations(self) -> Dict:
-        """Obtiene y categoriza todas las recomendaciones."""
-        
-        all_recs = self.get_all_recommendations()
-        
-        categorized_recs = {
-            "COST": [],
-            "SECURITY": [],
-            "PERFORMANCE": [],
-            "RELIABILITY": [],
-            "GENERAL": [],
-        }
-        
-        for rec in all_recs:
+    @staticmethod
+    def _categorize(recs: list[dict], categorized: dict[str, list[dict]]) -> float:
+        """Reparte recs en categorized y devuelve el ahorro mensual de las de coste."""
+        savings = 0
+        for rec in recs:
             category = rec.get("category", "GENERAL")
-            if category in categorized_recs:
-                categorized_recs[category].append(rec)
+            if category in categorized:
+                categorized[category].append(rec)
             else:
-                categorized_recs["GENERAL"].append(rec)
+                categorized["GENERAL"].append(rec)
+            if category == "COST":
+                savings += rec.get("monthly_savings", 0)
+        return savings
+
+    def _run_summary(self, result: dict) -> dict:
+        if self.unavailable_cache is not None:
+            result["skipped_unavailable"] = self.skipped_unavailable
+        if self.store is not None:
+            result["served_from_store"] = self.served_from_store
+        if self.missing_recommenders:
+            result["partial"] = True
+            result["missing"] = list(self.missing_recommenders)
+        if self.stale_recommenders:
+            result["partial"] = True
+            result["stale"] = list(self.stale_recommenders)
+        return result
+
+    def get_categorized_recommendations(self, pairs: list[tuple[str, str]] | None = None) -> dict:
+        """Obtiene y categoriza todas las recomendaciones."""
+        
+        all_recs = self.get_all_recommendations(pairs)
         
-        total_savings = sum(r.get("monthly_savings", 0) for r in categorized_recs["COST"])
+        categorized_recs = {category: [] for category in CATEGORIES}
+        total_savings = self._categorize(all_recs, categorized_recs)
         
-        return {
+        result = {
             "recommendations": categorized_recs,
             "total_monthly_savings": total_savings,
             "recommendation_count": len(all_recs)
         }
+        return self._run_summary(result)
+
+    def iter_categorized_recommendations(self, pairs: list[tuple[str, str]] | None = None) -> Iterator[dict]:
+        """Como get_categorized_recommendations, pero entrega un parcial cada vez que termina un recommender.
+
+        Cada parcial lleva lo acumulado hasta ese momento (recommendations, total_monthly_savings,
+        recommendation_count), el par recién terminado en "recommender", sus recomendaciones
+        en "new_recommendations", y "completed"/"planned". Las listas acumuladas son las mismas
+        en todos los parciales y siguen creciendo. El último elemento, con "done": True, es el
+        resultado completo de get_categorized_recommendations, en el orden de los pares.
+        """
+        results = {}
+        running = {category: [] for category in CATEGORIES}
+        total_savings, count = 0, 0
+        for (location, recommender_type), recs in self.iter_recommender_results(pairs):
+            results[(location, recommender_type)] = recs
+            total_savings += self._categorize(recs, running)
+            count += len(recs)
+            yield {
+                "recommender": f"{location}/{recommender_type}",
+                "new_recommendations": recs,
+                "recommendations": running,
+                "total_monthly_savings": total_savings,
+                "recommendation_count": count,
+                "completed": len(results),
+                "planned": len(self._last_pairs),
+                "done": False,
+            }
+
+        all_recs = [rec for pair in self._last_pairs for rec in results.get(pair, ())]
+        categorized_recs = {category: [] for category in CATEGORIES}
+        result = {
+            "recommendations": categorized_recs,
+            "total_monthly_savings": self._categorize(all_recs, categorized_recs),
+            "recommendation_count": len(all_recs),
+            "done": True,
+        }
+        yield self._run_summary(result)
@@ -0,0 +1,240 @@
+import contextvars
+import threading
+from collections import deque
+from collections.abc import Iterable
+
+
+class NodeTable:
+    """Nombres de recurso internados a ids enteros; los ids liberados se reutilizan."""
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.names: dict[int, str] = {}
+        self._free: list[int] = []
+
+    def intern(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            node = self._free.pop() if self._free else len(self.names)
+            self.ids[name] = node
+            self.names[node] = name
+        return node
+
+    def release(self, node: int):
+        del self.ids[self.names.pop(node)]
+        self._free.append(node)
+
+    def __getitem__(self, node: int) -> str:
+        return self.names[node]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class RelationshipGraph:
+    """Índice de relaciones entre recursos con adyacencia directa e inversa.
+
+    Los nodos son nombres completos de recurso internados a ids enteros. Una arista
+    origen -> destino significa que el origen depende del destino (p.ej. una VM de su
+    disco), así que los dependientes de un nodo se obtienen recorriendo la inversa.
+    Un nodo vive mientras es un recurso del inventario o el destino de alguna arista.
+    """
+
+    def __init__(self):
+        self.nodes = NodeTable()
+        self.forward: dict[int, dict[int, str]] = {}
+        self.reverse: dict[int, dict[int, str]] = {}
+        # Nombre corto ("db-1") -> ids, para poder preguntar sin el nombre completo.
+        self.short_names: dict[str, set[int]] = {}
+        self._sources: dict[int, tuple] = {}
+        # Nodos que son recursos del inventario (y no solo destinos de aristas).
+        self._present: set[int] = set()
+        self._components: list[list[int]] | None = None
+        self._lock = threading.Lock()
+
+    def _node(self, name: str) -> int:
+        node = self.nodes.ids.get(name)
+        if node is None:
+            node = self.nodes.intern(name)
+            self.short_names.setdefault(name.rsplit("/", 1)[-1], set()).add(node)
+        return node
+
+    def _drop_if_unused(self, node: int):
+        if node in self._present or node in self.forward or node in self.reverse:
+            return
+        short_name = self.nodes[node].rsplit("/", 1)[-1]
+        self.short_names[short_name].discard(node)
+        if not self.short_names[short_name]:
+            del self.short_names[short_name]
+        self.nodes.release(node)
+
+    def _set_edges(self, source: int, edges: tuple):
+        previous = self.forward.pop(source, {})
+        for target in previous:
+            dependents = self.reverse.get(target, {})
+            dependents.pop(source, None)
+            if not dependents:
+                self.reverse.pop(target, None)
+        if edges:
+            self.forward[source] = {}
+            for rel_type, target_name in edges:
+                target = self._node(target_name)
+                self.forward[source][target] = rel_type
+                self.reverse.setdefault(target, {})[source] = rel_type
+            self._sources[source] = edges
+        else:
+            self._sources.pop(source, None)
+        for target in previous:
+            if target not in self.forward.get(source, {}):
+                self._drop_if_unused(target)
+        self._components = None
+
+    @staticmethod
+    def _edges_of(record) -> tuple:
+        return tuple(sorted((rel["type"], rel["target"]) for rel in record.resource.relationships))
+
+    def _add_record(self, record):
+        node = self._node(record.asset_name)
+        self._present.add(node)
+        self._set_edges(node, self._edges_of(record))
+
+    def _remove_node(self, node: int):
+        self._present.discard(node)
+        self._set_edges(node, ())
+        self._drop_if_unused(node)
+
+    def _remove_record(self, record):
+        node = self.nodes.ids.get(record.asset_name)
+        if node is not None:
+            self._remove_node(node)
+
+    def add_record(self, record):
+        with self._lock:
+            self._add_record(record)
+
+    def remove_record(self, record):
+        with self._lock:
+            self._remove_record(record)
+
+    def update(self, records: Iterable) -> int:
+        """Sincroniza el índice con un inventario completo tocando solo los nodos que cambian.
+
+        records se consume entero fuera del lock (puede ser un listado en vivo) y solo
+        los cambios se aplican con el lock tomado. Devuelve cuántos nodos origen se han
+        actualizado.
+        """
+        token = _updating.set(self)
+        try:
+            current = {record.asset_name: self._edges_of(record) for record in records}
+        finally:
+            _updating.reset(token)
+
+        changed = 0
+        with self._lock:
+            for name, edges in current.items():
+                node = self._node(name)
+                self._present.add(node)
+                if self._sources.get(node, ()) != edges:
+                    self._set_edges(node, edges)
+                    changed += 1
+            for node in [n for n in self._present if self.nodes[n] not in current]:
+                changed += node in self._sources
+                self._remove_node(node)
+        return changed
+
+    def apply_delta(self, delta):
+        """Aplica un InventoryDelta de GCPRealDataCollector.sync_inventory de una vez."""
+        with self._lock:
+            for record in delta.removed:
+                self._remove_record(record)
+            for _, record in delta.modified:
+                self._add_record(record)
+            for record in delta.added:
+                self._add_record(record)
+
+    def _resolve(self, resource: str) -> list[int]:
+        node = self.nodes.ids.get(resource)
+        if node is not None:
+            return [node]
+        return sorted(self.short_names.get(resource, ()))
+
+    def resolve(self, resource: str) -> list[int]:
+        """Ids de nodo para un nombre completo o un nombre corto."""
+        with self._lock:
+            return self._resolve(resource)
+
+    def neighbors(self, resource: str) -> dict[str, list[tuple[str, str]]]:
+        """Relaciones directas: de qué depende el recurso y quién depende de él."""
+        depends_on, dependents = [], []
+        with self._lock:
+            for node in self._resolve(resource):
+                depends_on += [(rel_type, self.nodes[t]) for t, rel_type in self.forward.get(node, {}).items()]
+                dependents += [(rel_type, self.nodes[s]) for s, rel_type in self.reverse.get(node, {}).items()]
+        return {"depends_on": depends_on, "dependents": dependents}
+
+    def blast_radius(self, resource: str, max_depth: int | None = None) -> list[tuple[str, int]]:
+        """Todos los recursos que dependen, directa o transitivamente, del recurso (con su distancia)."""
+        with self._lock:
+            start = self._resolve(resource)
+            depth = dict.fromkeys(start, 0)
+            queue = deque(start)
+            while queue:
+                node = queue.popleft()
+                if max_depth is not None and depth[node] >= max_depth:
+                    continue
+                for source in self.reverse.get(node, {}):
+                    if source not in depth:
+                        depth[source] = depth[node] + 1
+                        queue.append(source)
+            affected = [(self.nodes[n], d) for n, d in depth.items() if d > 0]
+        return sorted(affected, key=lambda item: (item[1], item[0]))
+
+    def connected_components(self) -> list[list[str]]:
+        """Componentes conexas (ignorando la dirección), de mayor a menor."""
+        with self._lock:
+            if self._components is None:
+                seen, components = set(), []
+                for start in list(self.forward) + list(self.reverse):
+                    if start in seen:
+                        continue
+                    seen.add(start)
+                    component, queue = [], deque([start])
+                    while queue:
+                        node = queue.popleft()
+                        component.append(node)
+                        for other in list(self.forward.get(node, {})) + list(self.reverse.get(node, {})):
+                            if other not in seen:
+                                seen.add(other)
+                                queue.append(other)
+                    components.append(component)
+                components.sort(key=len, reverse=True)
+                self._components = components
+            return [[self.nodes[n] for n in component] for component in self._components]
+
+
+# Un índice por proyecto, vivo durante todo el proceso.
+_graphs: dict[str, RelationshipGraph] = {}
+_graphs_lock = threading.Lock()
+# Índice cuyo update() está consumiendo el inventario en este contexto.
+_updating: contextvars.ContextVar[RelationshipGraph | None] = contextvars.ContextVar("graph_updating", default=None)
+
+
+def get_project_graph(project_id: str, records: Iterable) -> RelationshipGraph:
+    """Devuelve el índice del proyecto actualizado con records, reutilizándolo entre llamadas."""
+    with _graphs_lock:
+        graph = _graphs.setdefault(project_id, RelationshipGraph())
+    changed = graph.update(records)
+    print(f"Relationship graph for {project_id}: {len(graph.nodes)} nodes, {changed} sources updated")
+    return graph
+
+
+def apply_project_delta(project_id: str, delta):
+    """Lleva un InventoryDelta al índice del proyecto, si ya se ha construido alguno.
+
+    Se omite si el delta sale de la sincronización que el propio update() del índice
+    está consumiendo: ese update() ya aplicará el inventario resultante.
+    """
+    with _graphs_lock:
+        graph = _graphs.get(project_id)
+    if graph is not None and _updating.get() is not graph:
+        graph.apply_delta(delta)
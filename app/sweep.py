@@ -0,0 +1,203 @@
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+from app.client_pool import get_asset_client
+from app.gcp_real_data import RESOURCE_BUCKETS
+from app.infrastructure_analyzer import InfrastructureAnalyzer
+from app.recommendation_filter import PENDING_STATES, build_recommendation_filter
+
+# Proyectos analizados a la vez durante un barrido.
+DEFAULT_SWEEP_WORKERS = 8
+
+# Recursos más caros que se listan en el ranking global.
+TOP_RESOURCES = 10
+
+
+def resolve_projects(scope: str) -> list[str]:
+    """Traduce un scope a una lista de project IDs.
+
+    Acepta "organizations/<id>" o "folders/<id>" (se recorre todo el árbol vía
+    Asset Inventory) o una lista de project IDs separados por comas.
+    """
+    scope = scope.strip()
+    if not scope.startswith(("organizations/", "folders/")):
+        return [p.strip() for p in scope.split(",") if p.strip()]
+
+    client = get_asset_client()
+    results = client.search_all_resources(
+        request={
+            "scope": scope,
+            "asset_types": ["cloudresourcemanager.googleapis.com/Project"],
+        }
+    )
+    project_ids = []
+    for result in results:
+        attributes = result.additional_attributes or {}
+        project_id = attributes.get("projectId") or result.name.split("/")[-1]
+        project_ids.append(project_id)
+    print(f"Resolved {len(project_ids)} projects under {scope}")
+    return project_ids
+
+
+class InfrastructureSweep:
+    """Analiza inventario y recomendaciones de muchos proyectos en paralelo.
+
+    Cada proyecto se procesa de forma aislada: un error en uno queda registrado en
+    el rollup y no interrumpe al resto. Solo se suman las recomendaciones pendientes.
+    Con deadline_seconds el barrido entero tiene ese presupuesto: cada analizador
+    recibe lo que queda al empezar su proyecto y los proyectos que no terminan a
+    tiempo se listan en unfinished.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_SWEEP_WORKERS, include_recommendations: bool = True,
+                 analyzer_factory: Callable[..., InfrastructureAnalyzer] = InfrastructureAnalyzer,
+                 deadline_seconds: float | None = None):
+        self.max_workers = max(1, max_workers)
+        self.include_recommendations = include_recommendations
+        self.analyzer_factory = analyzer_factory
+        self.deadline_seconds = deadline_seconds
+        self._deadline: float | None = None
+
+    def _remaining(self) -> float | None:
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def _analyze_project(self, project_id: str) -> dict:
+        try:
+            remaining = self._remaining()
+            if remaining is None:
+                analyzer = self.analyzer_factory(project_id)
+            else:
+                analyzer = self.analyzer_factory(project_id, deadline_seconds=remaining)
+            result = {"project_id": project_id, "inventory": analyzer.get_infrastructure_summary()}
+            if self.include_recommendations:
+                result["recommendations"] = analyzer.get_google_recommendations(
+                    filter=build_recommendation_filter(PENDING_STATES))
+            return result
+        except Exception as e:
+            print(f"Error sweeping project {project_id}: {e}")
+            return {"project_id": project_id, "error": str(e)}
+
+    def run(self, project_ids: list[str]) -> dict:
+        """Barre los proyectos y devuelve el rollup consolidado."""
+        self._deadline = time.monotonic() + self.deadline_seconds if self.deadline_seconds is not None else None
+        workers = min(self.max_workers, max(1, len(project_ids)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(self._analyze_project, project_id) for project_id in project_ids]
+            try:
+                for _ in as_completed(futures, timeout=self._remaining()):
+                    pass
+            except FuturesTimeout:
+                print(f"Sweep deadline reached with {sum(not f.done() for f in futures)} projects unfinished")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        results = [future.result() for future in futures if future.done() and not future.cancelled()]
+        unfinished = [project_id for project_id, future in zip(project_ids, futures, strict=True)
+                      if not future.done() or future.cancelled()]
+        return build_rollup(results, unfinished)
+
+
+def build_rollup(results: list[dict], unfinished: Iterable[str] = ()) -> dict:
+    """Consolida los resultados por proyecto con rankings de coste entre proyectos.
+
+    unfinished son los proyectos que no terminaron dentro del presupuesto de tiempo.
+    Los que terminaron con inventario o recomendaciones incompletos (partial) se suman
+    igual, pero quedan marcados y listados en partial: sus cifras son un mínimo.
+    """
+    projects, errors, resources, partial = [], {}, [], []
+    resource_counts = dict.fromkeys(RESOURCE_BUCKETS, 0)
+
+    for result in results:
+        project_id = result["project_id"]
+        if "error" in result:
+            errors[project_id] = result["error"]
+            continue
+
+        inventory = result["inventory"]
+        recommendations = result.get("recommendations") or {}
+        project = {
+            "project_id": project_id,
+            "total_monthly_cost": inventory["total_monthly_cost"],
+            "recommended_savings": recommendations.get("total_monthly_savings", 0),
+            "recommendation_count": recommendations.get("recommendation_count", 0),
+            "detected_resources": inventory["detected_resources"],
+            "partial": bool(inventory.get("partial") or recommendations.get("partial")),
+            "missing_asset_types": list(inventory.get("missing", [])),
+            "missing_recommenders": len(recommendations.get("missing", [])),
+            "stale_recommenders": len(recommendations.get("stale", [])),
+        }
+        projects.append(project)
+        if project["partial"]:
+            partial.append(project_id)
+        for bucket in RESOURCE_BUCKETS:
+            resource_counts[bucket] += len(inventory.get(bucket, []))
+            for resource in inventory.get(bucket, []):
+                resources.append({
+                    "project_id": project_id, "bucket": bucket,
+                    "name": resource["name"], "monthly_cost": resource["monthly_cost"],
+                })
+
+    projects.sort(key=lambda p: p["total_monthly_cost"], reverse=True)
+    resources.sort(key=lambda r: r["monthly_cost"], reverse=True)
+    unfinished = list(unfinished)
+    return {
+        "projects": projects,
+        "errors": errors,
+        "unfinished": unfinished,
+        "partial": partial,
+        "project_count": len(results) + len(unfinished),
+        "total_monthly_cost": round(sum(p["total_monthly_cost"] for p in projects), 2),
+        "total_recommended_savings": round(sum(p["recommended_savings"] for p in projects), 2),
+        "resource_counts": resource_counts,
+        "top_resources": resources[:TOP_RESOURCES],
+        "top_savings": sorted(projects, key=lambda p: p["recommended_savings"], reverse=True)[:TOP_RESOURCES],
+    }
+
+
+def format_rollup(rollup: dict, limit: int | None = 20) -> str:
+    """Formatea el rollup de un barrido en markdown."""
+    response = f"""🌐 **Multi-Project Sweep Complete ({rollup['project_count']} projects)**
+
+💰 **Total Monthly Cost:** ${rollup['total_monthly_cost']:.2f}
+💡 **Total Recommended Savings:** ${rollup['total_recommended_savings']:.2f}/month
+
+📊 **Projects by Monthly Cost:**
+"""
+    for project in rollup["projects"][:limit]:
+        response += (f"  • {project['project_id']}: ${project['total_monthly_cost']:.2f}/month, "
+                     f"{project['recommendation_count']} recommendations "
+                     f"(${project['recommended_savings']:.2f}/month savings)\n")
+
+    if rollup["top_resources"]:
+        response += "\n🔥 **Most Expensive Resources:**\n"
+        for resource in rollup["top_resources"]:
+            response += f"  • {resource['project_id']}/{resource['name']} ({resource['bucket']}): ${resource['monthly_cost']}/month\n"
+
+    if rollup["errors"]:
+        response += f"\n⚠️ **Projects with errors ({len(rollup['errors'])}):**\n"
+        for project_id, error in rollup["errors"].items():
+            response += f"  • {project_id}: {error}\n"
+
+    if rollup.get("partial"):
+        partial = [p for p in rollup["projects"] if p["partial"]]
+        response += f"\n⏳ **Projects with partial results ({len(partial)}), totals are a lower bound:**\n"
+        for project in partial[:limit]:
+            missing = []
+            if project["missing_asset_types"]:
+                missing.append(f"asset types not listed: {', '.join(project['missing_asset_types'])}")
+            if project["missing_recommenders"]:
+                missing.append(f"{project['missing_recommenders']} recommender/location pairs not checked")
+            if project["stale_recommenders"]:
+                missing.append(f"{project['stale_recommenders']} recommender/location pairs served from a stored copy")
+            response += f"  • {project['project_id']}: {'; '.join(missing)}\n"
+
+    if rollup.get("unfinished"):
+        unfinished = rollup["unfinished"]
+        response += f"\n⏱️ **Projects not finished within the time budget ({len(unfinished)}):** "
+        response += ", ".join(unfinished[:limit]) + (" ..." if limit is not None and len(unfinished) > limit else "") + "\n"
+
+    return response
@@ -14,9 +14,10 @@
 
 import logging
 
-import google.cloud.storage as storage
 from google.api_core import exceptions
 
+from app.client_pool import get_storage_client
+
 
 def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -> None:
     """Creates a new bucket if it doesn't already exist.
@@ -26,7 +27,7 @@ def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -
         project: Google Cloud project ID
         location: Location to create the bucket in (defaults to us-central1)
     """
-    storage_client = storage.Client(project=project)
+    storage_client = get_storage_client(project)
 
     if bucket_name.startswith("gs://"):
         bucket_name = bucket_name[5:]
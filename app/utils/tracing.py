@@ -23,6 +23,8 @@ from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExportResult
 
+from app.client_pool import get_logging_client, get_storage_client
+
 
 class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
     """
@@ -52,11 +54,9 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         """
         super().__init__(**kwargs)
         self.debug = debug
-        self.logging_client = logging_client or google_cloud_logging.Client(
-            project=self.project_id
-        )
+        self.logging_client = logging_client or get_logging_client(self.project_id)
         self.logger = self.logging_client.logger(__name__)
-        self.storage_client = storage_client or storage.Client(project=self.project_id)
+        self.storage_client = storage_client or get_storage_client(self.project_id)
         self.bucket_name = (
             bucket_name or f"{self.project_id}-infra-vision-agent-logs-data"
         )
@@ -15,6 +15,7 @@
 # mypy: disable-error-code="unreachable"
 import importlib
 import json
+import threading
 import uuid
 from collections.abc import Generator
 from typing import Any
@@ -30,8 +31,14 @@ from google.auth.exceptions import DefaultCredentialsError
 from langchain_core.messages import AIMessage, ToolMessage
 from vertexai import agent_engines
 
+from app import progress
 from frontend.utils.multimodal_utils import format_content
 
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # pragma: no cover - older Streamlit versions
+    add_script_run_ctx = get_script_run_ctx = None
+
 st.cache_resource.clear()
 
 
@@ -179,9 +186,12 @@ class StreamHandler:
         """Initialize the StreamHandler with Streamlit context and initial text."""
         self.st = st
         self.tool_expander = st.expander("Tool Calls:", expanded=False)
+        self.progress = st.empty()
         self.container = st.empty()
         self.text = initial_text
         self.tools_logs = initial_text
+        # Tools publish their progress from the agent thread.
+        self.script_ctx = get_script_run_ctx() if get_script_run_ctx else None
 
     def new_token(self, token: str) -> None:
         """Add a new token to the main text display."""
@@ -193,6 +203,16 @@ class StreamHandler:
         self.tools_logs += status_update
         self.tool_expander.markdown(status_update)
 
+    def new_progress(self, tool: str, message: str) -> None:
+        """Show the latest partial result of a running tool above the response."""
+        if add_script_run_ctx and self.script_ctx is not None:
+            add_script_run_ctx(threading.current_thread(), self.script_ctx)
+        self.progress.markdown(f"`{tool}`: {message}")
+
+    def clear_progress(self) -> None:
+        """Remove the partial result once the tool has returned."""
+        self.progress.empty()
+
 
 class EventProcessor:
     """Processes events from the stream and updates the UI accordingly."""
@@ -215,6 +235,19 @@ class EventProcessor:
         self.current_run_id = str(uuid.uuid4())
         # Set run_id in session state at start of processing
         self.st.session_state["run_id"] = self.current_run_id
+        # Partial results of in-process tools (local agent only; remote agents
+        # don't forward them). The local agent is shared by every session, so
+        # the listener only receives the progress of this run.
+        progress.subscribe(self.current_run_id, self.stream_handler.new_progress)
+        try:
+            with progress.run_scope(self.current_run_id):
+                self._consume_stream(messages)
+        finally:
+            progress.unsubscribe(self.current_run_id)
+            self.stream_handler.clear_progress()
+
+    def _consume_stream(self, messages: list[dict[str, Any]]) -> None:
+        """Stream the agent response and handle each event type."""
         stream = self.client.stream_messages(
             data={
                 "input": {"messages": messages},
@@ -0,0 +1,38 @@
+import argparse
+import json
+
+from app.sweep import (
+    DEFAULT_SWEEP_WORKERS,
+    InfrastructureSweep,
+    format_rollup,
+    resolve_projects,
+)
+
+
+def main():
+    """Barre inventario y recomendaciones de una organización, carpeta o lista de proyectos."""
+    parser = argparse.ArgumentParser(description="Multi-project infrastructure cost sweep.")
+    parser.add_argument("scope", help='"organizations/<id>", "folders/<id>" or comma-separated project IDs')
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_SWEEP_WORKERS,
+                        help="projects analyzed in parallel")
+    parser.add_argument("--no-recommendations", action="store_true",
+                        help="only collect inventory, skip the Recommender API")
+    parser.add_argument("--deadline-seconds", type=float, default=None,
+                        help="time budget for the whole sweep; unfinished projects are listed apart")
+    parser.add_argument("--json", action="store_true", help="print the raw rollup as JSON")
+    args = parser.parse_args()
+
+    project_ids = resolve_projects(args.scope)
+    sweep = InfrastructureSweep(max_workers=args.max_workers,
+                                include_recommendations=not args.no_recommendations,
+                                deadline_seconds=args.deadline_seconds)
+    rollup = sweep.run(project_ids)
+
+    if args.json:
+        print(json.dumps(rollup, indent=2))
+    else:
+        print(format_rollup(rollup, limit=None))
+
+
+if __name__ == "__main__":
+    main()
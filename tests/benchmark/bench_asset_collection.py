@@ -0,0 +1,106 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: sequential vs. concurrent vs. single multi-type asset collection.
+
+Runs GCPRealDataCollector.get_real_infrastructure against a fake
+AssetServiceClient with injected per-call latency.
+
+The multi_type rows start from a cold capability cache unless they say "warm".
+Buckets are rejected by the fake and the registry already marks them as
+RESOURCE-only. The "unexpected" rows also reject Cloud SQL. The registry does
+not know about that type, so multi_type has to find it by bisection.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_asset_collection
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from app.capability_cache import CapabilityCache
+from app.gcp_real_data import ASSET_TYPES_TO_QUERY, GCPRealDataCollector
+from tests.fakes import FakeAssetServiceClient, make_asset
+
+LATENCY_SECONDS = 0.2
+ASSETS_PER_TYPE = 50
+BUCKET = "storage.googleapis.com/Bucket"
+UNEXPECTED = frozenset({BUCKET, "sqladmin.googleapis.com/Instance"})
+
+
+def build_inventory() -> list:
+    return [
+        make_asset(f"//{asset_type.split('/')[0]}/projects/p/items/{i}", asset_type)
+        for asset_type in ASSET_TYPES_TO_QUERY
+        for i in range(ASSETS_PER_TYPE)
+    ]
+
+
+def run(
+    max_workers: int,
+    query_mode: str = "per_type",
+    no_relationship_types: frozenset[str] = frozenset({BUCKET}),
+    capability_cache: CapabilityCache | None = None,
+) -> tuple[float, int]:
+    collector = GCPRealDataCollector(
+        "bench-project",
+        max_workers=max_workers,
+        query_mode=query_mode,
+        capability_cache=capability_cache,
+    )
+    client = FakeAssetServiceClient(
+        build_inventory(),
+        latency=LATENCY_SECONDS,
+        no_relationship_types=set(no_relationship_types),
+    )
+    collector.asset_client = client
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        collector.get_real_infrastructure()
+    return time.perf_counter() - start, len(client.calls)
+
+
+def main() -> None:
+    print(f"{len(ASSET_TYPES_TO_QUERY)} asset types, {LATENCY_SECONDS}s per call")
+    baseline, calls = run(max_workers=1)
+    print(f"max_workers=1:  {baseline:.2f}s  {calls} calls")
+    for workers in (2, 4, 8):
+        elapsed, calls = run(max_workers=workers)
+        print(
+            f"max_workers={workers}:  {elapsed:.2f}s  {calls} calls  "
+            f"({baseline / elapsed:.1f}x)"
+        )
+    with tempfile.TemporaryDirectory() as tmp:
+        cold = CapabilityCache(os.path.join(tmp, "cold.sqlite"))
+        elapsed, calls = run(1, "multi_type", capability_cache=cold)
+        print(f"multi_type:     {elapsed:.2f}s  {calls} calls  ({baseline / elapsed:.1f}x)")
+        elapsed, calls = run(1, "multi_type", frozenset(), CapabilityCache(os.path.join(tmp, "none.sqlite")))
+        print(
+            f"multi_type, no RELATIONSHIP rejections:  {elapsed:.2f}s  {calls} calls  "
+            f"({baseline / elapsed:.1f}x)"
+        )
+        cache = CapabilityCache(os.path.join(tmp, "unexpected.sqlite"))
+        for label in ("cold", "warm"):
+            elapsed, calls = run(1, "multi_type", UNEXPECTED, cache)
+            print(
+                f"multi_type, unexpected rejection, {label} cache:  {elapsed:.2f}s  "
+                f"{calls} calls  ({baseline / elapsed:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: client setup cost of a tool call with cold vs. pooled clients.
+
+Every agent tool call builds a collector and a RecommenderService. "cold"
+resets the client pool before each call, which is what happened when every
+object created its own clients. "pooled" reuses the process-wide clients.
+Only local setup is measured: credential discovery, transports and channel
+objects. The TLS handshake that a reused keepalive channel also saves needs
+network access and is not included.
+
+Usage (from the repository root, with Application Default Credentials):
+    python -m tests.benchmark.bench_client_pool
+"""
+
+import contextlib
+import io
+import statistics
+import time
+
+from app.client_pool import get_logging_client, get_storage_client, reset_clients
+from app.gcp_real_data import GCPRealDataCollector
+from app.recommender_service import RecommenderService
+
+CALLS = 50
+
+
+def tool_call(project_id: str) -> None:
+    GCPRealDataCollector(project_id)
+    RecommenderService(project_id)
+    get_storage_client(project_id)
+    get_logging_client(project_id)
+
+
+def run(pooled: bool) -> list[float]:
+    reset_clients()
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(CALLS):
+            if not pooled:
+                reset_clients()
+            start = time.perf_counter()
+            tool_call("bench-project")
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main() -> None:
+    cold = run(pooled=False)
+    pooled = run(pooled=True)
+    for label, timings in (("cold", cold), ("pooled", pooled)):
+        print(
+            f"{label:>6}: median {statistics.median(timings) * 1000:.2f}ms  "
+            f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:.2f}ms"
+        )
+    print(f"speedup (median): {statistics.median(cold) / statistics.median(pooled):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: memory and aggregation time of ColumnarInventory at 1M assets.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_columnar_inventory [asset_count]
+"""
+
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+
+from app.asset_registry import ManagedResource, VirtualMachine
+from app.columnar_inventory import ColumnarInventory
+from app.gcp_real_data import ResourceRecord
+
+DEFAULT_ASSET_COUNT = 1_000_000
+
+
+def synthetic_records(count: int) -> Iterator[ResourceRecord]:
+    for i in range(count):
+        if i % 4:
+            resource = ManagedResource(f"run-service-{i}", "Cloud Run Service", 15.0 + i % 7)
+            yield ResourceRecord("run_services", resource)
+        else:
+            disk = f"//compute.googleapis.com/projects/p/zones/europe-west1-b/disks/vm-{i}"
+            resource = VirtualMachine(
+                f"vm-{i}", "e2-medium", 24.46, "europe-west1-b", "running",
+                [{"target": disk, "type": "INSTANCE_TO_DISK"}],
+            )
+            yield ResourceRecord("vms", resource)
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<22} {time.perf_counter() - start:.3f}s")
+    return result
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ASSET_COUNT
+    tracemalloc.start()
+    inventory = timed("load", lambda: ColumnarInventory("bench").extend(synthetic_records(count)))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{len(inventory)} assets in {current / 1024 / 1024:.0f} MiB")
+
+    timed("total_cost", inventory.total_cost)
+    timed("cost_by_bucket", inventory.cost_by_bucket)
+    timed("count_by_bucket", inventory.count_by_bucket)
+    timed("top_k(10)", lambda: inventory.top_k(10))
+    timed("top_k(10, vms)", lambda: inventory.top_k(10, bucket="vms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: fetching the insights referenced by recommendations.
+
+Recommendations point at their evidence through associatedInsights, and
+many of them cite the same insight. "one by one" calls get_insight for every
+reference in order. "batched" is InsightService: it dedupes the names, lists
+each insight type once, and runs the calls concurrently. Both run against a
+fake client with injected per-call latency.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_insight_fetch
+"""
+
+import contextlib
+import io
+import time
+
+from app.insight_service import InsightService
+from tests.fakes import FakeRecommenderClient, make_insight
+
+LATENCY_SECONDS = 0.02
+INSIGHT_TYPES = [
+    "projects/bench/locations/europe-west1-b/insightTypes/google.compute.instance.IdleResourceInsight",
+    "projects/bench/locations/europe-west1/insightTypes/google.cloudsql.instance.IdleInsight",
+    "projects/bench/locations/global/insightTypes/google.iam.policy.Insight",
+]
+INSIGHTS_PER_TYPE = 40
+RECOMMENDATIONS = 200
+
+
+def build() -> tuple[list, dict]:
+    insights = {
+        f"{parent}/insights/i{i}": make_insight(f"{parent}/insights/i{i}", cpu={"p95": i / 100})
+        for parent in INSIGHT_TYPES for i in range(INSIGHTS_PER_TYPE)
+    }
+    names = list(insights)
+    recs = [{"id": f"r{i}", "insights": [names[i % len(names)], names[(i * 7) % len(names)]]}
+            for i in range(RECOMMENDATIONS)]
+    return recs, insights
+
+
+def main() -> None:
+    recs, insights = build()
+    references = sum(len(rec["insights"]) for rec in recs)
+    print(f"{RECOMMENDATIONS} recommendations, {references} references to {len(insights)} insights, "
+          f"{LATENCY_SECONDS}s per call")
+
+    client = FakeRecommenderClient(insights=insights, latency=LATENCY_SECONDS)
+    start = time.perf_counter()
+    for rec in recs:
+        rec["evidence"] = [client.get_insight(request={"name": name}) for name in rec["insights"]]
+    naive = time.perf_counter() - start
+    print(f"one by one: {naive:.2f}s  ({len(client.insight_calls)} calls)")
+
+    client = FakeRecommenderClient(insights=insights, latency=LATENCY_SECONDS)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fetched = InsightService("bench", client).attach_evidence(recs)
+    batched = time.perf_counter() - start
+    assert fetched == len(insights)
+    print(f"batched:    {batched:.2f}s  ({len(client.insight_calls)} calls, {naive / batched:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: "detailed" (list_assets) vs. "summary" (search_all_resources) backends.
+
+Replays the recorded assets in fixtures/asset_inventory.json, scaled up to a
+larger project, and measures the serialized bytes each backend would transfer.
+Latency is modeled per page as a round trip plus transfer time.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_inventory_backends
+"""
+
+import contextlib
+import io
+import json
+import pathlib
+import time
+from collections.abc import Iterator
+from typing import Any
+
+from google.cloud.asset_v1 import Asset, ResourceSearchResult
+
+from app.gcp_real_data import GCPRealDataCollector
+
+FIXTURE = pathlib.Path(__file__).parent / "fixtures" / "asset_inventory.json"
+COPIES_PER_ASSET = 500
+ROUND_TRIP_SECONDS = 0.05
+BANDWIDTH_BYTES_PER_SECOND = 20 * 1024 * 1024
+LIST_ASSETS_PAGE_SIZE = 1000
+SEARCH_PAGE_SIZE = 500
+
+
+def load_assets() -> list[Asset]:
+    assets = []
+    for item in json.loads(FIXTURE.read_text()):
+        for i in range(COPIES_PER_ASSET):
+            copy = dict(item, name=f"{item['name']}-{i}")
+            assets.append(Asset.from_json(json.dumps(copy), ignore_unknown_fields=True))
+    return assets
+
+
+class RecordedAssetServiceClient:
+    """Serves the fixture as real protos and accounts for bytes and modeled latency."""
+
+    def __init__(self, assets: list[Asset]) -> None:
+        self.assets = assets
+        self.bytes_transferred = 0
+        self.modeled_seconds = 0.0
+        self.pages = 0
+
+    def _paginate(self, items: list[Any], page_size: int) -> Iterator[Any]:
+        for start in range(0, max(len(items), 1), page_size):
+            page = items[start : start + page_size]
+            size = sum(len(type(item).serialize(item)) for item in page)
+            self.pages += 1
+            self.bytes_transferred += size
+            self.modeled_seconds += ROUND_TRIP_SECONDS + size / BANDWIDTH_BYTES_PER_SECOND
+            yield from page
+
+    def list_assets(self, request: dict[str, Any], timeout: float | None = None) -> Iterator[Asset]:
+        types = set(request["asset_types"])
+        matching = [a for a in self.assets if a.asset_type in types]
+        return self._paginate(matching, LIST_ASSETS_PAGE_SIZE)
+
+    def search_all_resources(self, request: dict[str, Any], timeout: float | None = None) -> Iterator[ResourceSearchResult]:
+        types = set(request["asset_types"])
+        paths = set(request["read_mask"].paths)
+        results = []
+        for a in self.assets:
+            if a.asset_type not in types:
+                continue
+            fields = {
+                "name": a.name,
+                "asset_type": a.asset_type,
+                "location": a.resource.location,
+                "update_time": a.update_time,
+            }
+            results.append(ResourceSearchResult(**{k: v for k, v in fields.items() if k in paths}))
+        return self._paginate(results, SEARCH_PAGE_SIZE)
+
+
+def run(backend: str, assets: list[Asset]) -> tuple[RecordedAssetServiceClient, float, dict]:
+    collector = GCPRealDataCollector("gauss--core--dev--af", max_workers=1, backend=backend)
+    client = RecordedAssetServiceClient(assets)
+    collector.asset_client = client
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = collector.get_real_infrastructure()
+    return client, time.perf_counter() - start, summary
+
+
+def main() -> None:
+    assets = load_assets()
+    print(f"{len(assets)} assets replayed from {FIXTURE.name}")
+    results = {backend: run(backend, assets) for backend in ("detailed", "summary")}
+    for backend, (client, cpu_seconds, summary) in results.items():
+        print(
+            f"{backend:>8}: {client.bytes_transferred / 1024:9.1f} KiB in {client.pages:3d} pages, "
+            f"modeled network {client.modeled_seconds:.2f}s, client CPU {cpu_seconds:.2f}s, "
+            f"{summary['detected_resources']}"
+        )
+    detailed, summary = results["detailed"][0], results["summary"][0]
+    print(
+        f"summary transfers {detailed.bytes_transferred / summary.bytes_transferred:.1f}x fewer bytes "
+        f"and {detailed.modeled_seconds / summary.modeled_seconds:.1f}x less modeled network time"
+    )
+
+
+if __name__ == "__main__":
+    main()
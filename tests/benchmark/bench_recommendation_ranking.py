@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Microbenchmark: first page of the recommendation ranking.
+
+Compares a full sort of every recommendation with the heap-based top-K used
+by page_recommendations. The input is a deterministic synthetic set. The
+output also reports how much markdown the agent receives: the full listing
+versus one page.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_recommendation_ranking
+"""
+
+import random
+import time
+
+from app.recommendation_ranking import RANKING_PAGE_SIZE, page_recommendations, rank_key
+
+SIZES = (1_000, 10_000, 100_000)
+ROUNDS = 5
+
+
+def build(size: int) -> dict:
+    rng = random.Random(size)
+    categorized = {"COST": [], "SECURITY": [], "PERFORMANCE": []}
+    for i in range(size):
+        category = rng.choice(list(categorized))
+        categorized[category].append({
+            "id": f"rec-{i}", "category": category, "priority": rng.choice(["P1", "P2", "P3", "P4"]),
+            "monthly_savings": rng.randint(0, 500) if category == "COST" else 0,
+            "description": "Recommendation description of typical length for the agent output.",
+        })
+    return categorized
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    for size in SIZES:
+        categorized = build(size)
+        recs = [rec for recs in categorized.values() for rec in recs]
+        full = best_of(lambda recs=recs: sorted(recs, key=rank_key)[:RANKING_PAGE_SIZE])
+        heap = best_of(lambda categorized=categorized: page_recommendations(categorized, RANKING_PAGE_SIZE))
+        page, _ = page_recommendations(categorized, RANKING_PAGE_SIZE)
+        assert page == sorted(recs, key=rank_key)[:RANKING_PAGE_SIZE]
+        chars = sum(len(rec["description"]) for rec in recs)
+        print(f"{size:>7} recs: full sort {full * 1000:7.1f} ms, heap top-{RANKING_PAGE_SIZE} {heap * 1000:7.1f} ms "
+              f"({full / heap:.1f}x); descriptions sent {chars} -> {sum(len(r['description']) for r in page)} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Microbenchmark: RecommenderService when every recommender call fails.
+
+Failures are the common case: most location x recommender pairs answer
+PERMISSION_DENIED or NOT_FOUND. The error path used to call
+google.auth.default() once per failure. "per-failure lookup" adds that
+call back to each failure. "shared context" is the current path, which reads
+the identity resolved once per service. Both run against a zero-latency fake
+client with a single worker, so only the error handling is measured. With a
+local ADC file each lookup costs a file read. On GCE/GKE it is a
+metadata-server round trip, so the real gap is larger.
+
+Usage (from the repository root, with Application Default Credentials):
+    python -m tests.benchmark.bench_recommender_errors
+"""
+
+import contextlib
+import io
+import time
+
+import google.auth
+
+from app.recommender_service import LOCATIONS, RECOMMENDER_TYPES, RecommenderService
+from tests.fakes import FakeRecommenderClient
+
+ROUNDS = 5
+
+
+class PerFailureLookupService(RecommenderService):
+    """Reproduces the old error handler, which resolved credentials on every failure."""
+
+    def _unavailable_reason(self, error):
+        creds, _ = google.auth.default()
+        getattr(creds, "service_account_email", "user account")
+        return super()._unavailable_reason(error)
+
+
+def run(service_class: type) -> float:
+    parents = [
+        f"projects/bench-project/locations/{location}/recommenders/{recommender_type}"
+        for location in LOCATIONS
+        for recommender_type in RECOMMENDER_TYPES
+    ]
+    errors = dict.fromkeys(parents, "403 PERMISSION_DENIED")
+    best = float("inf")
+    for _ in range(ROUNDS):
+        service = service_class("bench-project", max_workers=1)
+        service.client = FakeRecommenderClient(errors=errors)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            service.get_all_recommendations()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    calls = len(LOCATIONS) * len(RECOMMENDER_TYPES)
+    per_failure = run(PerFailureLookupService)
+    shared = run(RecommenderService)
+    print(f"{calls} failing recommender calls (best of {ROUNDS})")
+    print(f"per-failure lookup: {per_failure * 1000:.1f}ms")
+    print(f"shared context:     {shared * 1000:.1f}ms  ({per_failure / shared:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
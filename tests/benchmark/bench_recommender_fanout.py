@@ -0,0 +1,69 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: sequential vs. concurrent recommender fan-out.
+
+Runs RecommenderService.get_all_recommendations against a fake
+RecommenderClient with injected per-call latency. Most parents answer
+NOT_FOUND, as they do on a real project.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_recommender_fanout
+"""
+
+import contextlib
+import io
+import time
+
+from app.recommender_service import LOCATIONS, RECOMMENDER_TYPES, RecommenderService
+from tests.fakes import FakeRecommenderClient, make_recommendation
+
+LATENCY_SECONDS = 0.05
+
+
+def build_client() -> FakeRecommenderClient:
+    parents = [
+        f"projects/bench-project/locations/{location}/recommenders/{recommender_type}"
+        for location in LOCATIONS
+        for recommender_type in RECOMMENDER_TYPES
+    ]
+    with_results = parents[::10]
+    return FakeRecommenderClient(
+        {p: [make_recommendation(f"{p}/recommendations/r{i}", savings_units=i) for i in range(5)] for p in with_results},
+        latency=LATENCY_SECONDS,
+        errors={p: "404 NOT_FOUND" for p in parents if p not in with_results},
+    )
+
+
+def run(max_workers: int) -> tuple[float, list]:
+    service = RecommenderService("bench-project", max_workers=max_workers)
+    service.client = build_client()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommendations = service.get_all_recommendations()
+    return time.perf_counter() - start, recommendations
+
+
+def main() -> None:
+    print(f"{len(LOCATIONS) * len(RECOMMENDER_TYPES)} list_recommendations calls, {LATENCY_SECONDS}s per call")
+    baseline, expected = run(max_workers=1)
+    print(f"max_workers=1:   {baseline:.2f}s")
+    for workers in (8, 16, 32):
+        elapsed, recommendations = run(max_workers=workers)
+        assert recommendations == expected, "concurrent fan-out changed the result order"
+        print(f"max_workers={workers}:  {elapsed:.2f}s  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Benchmark: parsing and categorization throughput over the recorded dumps.
+
+Replays the recommender_complete_* dumps through ReplayRecommenderClient,
+so no network or credentials are involved and every run sees the same input.
+Three stages are timed:
+- "json.load" loads each dump whole, as a baseline.
+- "streaming" uses iter_json_array, which keeps one chunk in memory.
+- "categorize" runs the full RecommenderService.get_categorized_recommendations
+  path: proto parsing, _parse_recommendation and grouping by category.
+Each stage reports recommendations/second. The best of ROUNDS runs is kept.
+
+Usage (from the repository root):
+    python -m tests.benchmark.bench_recommender_replay
+"""
+
+import contextlib
+import io
+import json
+import time
+
+from app.recommender_replay import (
+    DEFAULT_REPLAY_DIR,
+    ReplayRecommenderClient,
+    iter_json_array,
+)
+from app.recommender_service import RecommenderService
+
+ROUNDS = 5
+
+
+def best_of(fn) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    client = ReplayRecommenderClient(DEFAULT_REPLAY_DIR)
+    paths = list(client.index.values())
+    pairs = sorted(client.index)
+    total = sum(len(json.load(open(path))) for path in paths)
+    print(f"{len(paths)} dumps, {total} recommendations, best of {ROUNDS}")
+
+    def load_whole():
+        for path in paths:
+            with open(path) as f:
+                json.load(f)
+
+    def stream():
+        for path in paths:
+            for _ in iter_json_array(path):
+                pass
+
+    def categorize():
+        service = RecommenderService("bench-project", client=client, max_workers=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = service.get_categorized_recommendations(pairs)
+        assert data["recommendation_count"] == total
+
+    for label, fn in (("json.load", load_whole), ("streaming", stream), ("categorize", categorize)):
+        elapsed = best_of(fn)
+        print(f"{label:<11} {elapsed * 1000:8.1f} ms  {total / elapsed:10.0f} recs/s")
+
+
+if __name__ == "__main__":
+    main()
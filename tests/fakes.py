@@ -0,0 +1,269 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+In-memory stand-ins for the Google Cloud clients used by `app/`.
+
+They mimic the call shapes the collector and the recommender service rely on
+and can inject per-call latency, so unit tests and benchmarks run offline.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any
+
+from google.cloud.asset_v1 import ContentType
+from google.cloud.recommender_v1 import Insight
+
+
+def make_asset(
+    name: str,
+    asset_type: str,
+    relationships: list[tuple[str, str]] | None = None,
+    update_time: datetime | None = None,
+) -> SimpleNamespace:
+    """Builds an object shaped like an asset_v1.Asset."""
+    rels = [
+        SimpleNamespace(target_resource=target, type=rel_type)
+        for target, rel_type in relationships or []
+    ]
+    return SimpleNamespace(
+        name=name,
+        asset_type=asset_type,
+        update_time=update_time or datetime(2025, 9, 1, tzinfo=timezone.utc),
+        resource=SimpleNamespace(relationships=rels),
+    )
+
+
+class FakeAssetServiceClient:
+    """Fake AssetServiceClient that serves a fixed inventory.
+
+    Args:
+        assets: Assets returned by list_assets, filtered by asset_types.
+        latency: Seconds slept on every list_assets call.
+        no_relationship_types: Asset types that reject RELATIONSHIP content.
+        type_latency: Extra seconds slept when a given asset type is requested.
+        page_latency: If set, responses are FakePagers sleeping this long per page.
+    """
+
+    def __init__(
+        self,
+        assets: list[Any],
+        latency: float = 0.0,
+        no_relationship_types: set[str] | None = None,
+        type_latency: dict[str, float] | None = None,
+        page_latency: float | None = None,
+    ) -> None:
+        self.assets = assets
+        self.latency = latency
+        self.page_latency = page_latency
+        self.timeouts: list[float | None] = []
+        self.type_latency = type_latency or {}
+        self.no_relationship_types = no_relationship_types or set()
+        self.calls: list[dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, items: list[Any], items_field: str) -> Any:
+        if self.page_latency is None:
+            return items
+        return FakePager([items], items_field, latency=self.page_latency)
+
+    def list_assets(self, request: dict[str, Any], timeout: float | None = None) -> Any:
+        with self._lock:
+            self.calls.append(request)
+            self.timeouts.append(timeout)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            asset_types = request.get("asset_types") or []
+            time.sleep(self.latency + sum(self.type_latency.get(t, 0.0) for t in asset_types))
+            if request["content_type"] == ContentType.RELATIONSHIP:
+                rejected = self.no_relationship_types.intersection(asset_types)
+                if rejected:
+                    raise Exception(
+                        f"400 No RELATIONSHIP found for asset types {sorted(rejected)}"
+                    )
+            return self._respond([a for a in self.assets if a.asset_type in asset_types], "assets")
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def search_all_resources(self, request: dict[str, Any], timeout: float | None = None) -> Any:
+        """Returns ResourceSearchResult-like objects without resource content."""
+        with self._lock:
+            self.calls.append(request)
+            self.timeouts.append(timeout)
+        time.sleep(self.latency)
+        asset_types = request.get("asset_types") or []
+        return self._respond([
+            SimpleNamespace(
+                name=a.name,
+                asset_type=a.asset_type,
+                update_time=a.update_time,
+            )
+            for a in self.assets
+            if not asset_types or a.asset_type in asset_types
+        ], "results")
+
+
+class FakePager:
+    """GAPIC-style pager whose `.pages` sleeps `latency` seconds per page fetch.
+
+    Args:
+        pages: Lists of items, one per page.
+        items_field: Name of the repeated field on each page response.
+        latency: Seconds slept before each page is returned.
+    """
+
+    def __init__(
+        self, pages: list[list[Any]], items_field: str = "assets", latency: float = 0.0
+    ) -> None:
+        self._pages = pages
+        self.items_field = items_field
+        self.latency = latency
+        self.fetched = 0
+
+    @property
+    def pages(self):
+        for items in self._pages:
+            time.sleep(self.latency)
+            self.fetched += 1
+            yield SimpleNamespace(**{self.items_field: items})
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from getattr(page, self.items_field)
+
+
+def make_recommendation(
+    name: str,
+    resource: str = "//compute.googleapis.com/projects/p/zones/z/instances/vm-1",
+    category: str = "COST",
+    savings_units: int = 0,
+    subtype: str = "STOP_VM",
+    priority: str = "P2",
+    state: str = "ACTIVE",
+    etag: str = '"1"',
+    last_refresh_time: datetime | None = None,
+    insights: tuple[str, ...] = (),
+) -> SimpleNamespace:
+    """Builds an object shaped like a recommender_v1.Recommendation."""
+    cost = SimpleNamespace(units=-savings_units, currency_code="USD")
+    return SimpleNamespace(
+        name=name,
+        etag=etag,
+        last_refresh_time=last_refresh_time,
+        recommender_subtype=subtype,
+        description=f"{subtype} on {resource.split('/')[-1]}",
+        primary_impact=SimpleNamespace(
+            category=SimpleNamespace(name=category),
+            cost_projection=SimpleNamespace(cost=cost) if savings_units else None,
+        ),
+        content=SimpleNamespace(
+            operation_groups=[
+                SimpleNamespace(operations=[SimpleNamespace(resource=resource)])
+            ]
+        ),
+        state_info=SimpleNamespace(state=SimpleNamespace(name=state)),
+        priority=SimpleNamespace(name=priority),
+        associated_insights=[SimpleNamespace(insight=insight) for insight in insights],
+    )
+
+
+def make_insight(name: str, description: str = "CPU usage was low", **content: Any) -> Insight:
+    """Builds a recommender_v1.Insight with the given content fields."""
+    return Insight(
+        name=name,
+        description=description,
+        insight_subtype="LOW_UTILIZATION",
+        category=Insight.Category.COST,
+        observation_period={"seconds": 30 * 86400},
+        content=content,
+    )
+
+
+class FakeRecommenderClient:
+    """Fake RecommenderClient keyed by recommender parent.
+
+    Args:
+        recommendations: Recommendations returned per
+            "projects/<p>/locations/<l>/recommenders/<type>" parent; other
+            parents return an empty list.
+        latency: Seconds slept on every list_recommendations call.
+        parent_latency: Extra seconds slept for specific parents.
+        errors: Exception message raised for specific parents.
+        quota_failures: Number of leading calls per parent that fail with
+            RESOURCE_EXHAUSTED before the parent starts answering.
+        insights: Insights by full name, served by get_insight and by
+            list_insights on their insight type parent.
+    """
+
+    def __init__(
+        self,
+        recommendations: dict[str, list[Any]] | None = None,
+        latency: float = 0.0,
+        parent_latency: dict[str, float] | None = None,
+        errors: dict[str, str] | None = None,
+        quota_failures: dict[str, int] | None = None,
+        insights: dict[str, Insight] | None = None,
+    ) -> None:
+        self.recommendations = recommendations or {}
+        self.insights = insights or {}
+        self.insight_calls: list[tuple[str, str]] = []
+        self.quota_failures = dict(quota_failures or {})
+        self.latency = latency
+        self.parent_latency = parent_latency or {}
+        self.errors = errors or {}
+        self.calls: list[dict[str, Any]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def list_recommendations(self, request: dict[str, Any]) -> list[Any]:
+        parent = request["parent"]
+        with self._lock:
+            self.calls.append(request)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency + self.parent_latency.get(parent, 0.0))
+            if parent in self.errors:
+                raise Exception(self.errors[parent])
+            with self._lock:
+                if self.quota_failures.get(parent, 0) > 0:
+                    self.quota_failures[parent] -= 1
+                    raise Exception("429 RESOURCE_EXHAUSTED: Quota exceeded")
+            return list(self.recommendations.get(parent, []))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def list_insights(self, request: dict[str, Any]) -> list[Insight]:
+        parent = request["parent"]
+        with self._lock:
+            self.insight_calls.append(("list_insights", parent))
+        time.sleep(self.latency)
+        return [insight for name, insight in self.insights.items() if name.startswith(parent + "/insights/")]
+
+    def get_insight(self, request: dict[str, Any]) -> Insight:
+        name = request["name"]
+        with self._lock:
+            self.insight_calls.append(("get_insight", name))
+        time.sleep(self.latency)
+        if name not in self.insights:
+            raise Exception(f"404 NOT_FOUND: {name}")
+        return self.insights[name]
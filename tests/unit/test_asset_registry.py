@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.asset_registry import (
+    ASSET_TYPE_REGISTRY,
+    BUCKET_LABELS,
+    RESOURCE_BUCKETS,
+    AssetTypeSpec,
+    ManagedResource,
+    register_asset_type,
+)
+from app.gcp_real_data import GCPRealDataCollector
+from tests.fakes import FakeAssetServiceClient, make_asset
+
+
+def _summary(assets: list) -> dict:
+    collector = GCPRealDataCollector("p", max_workers=1)
+    collector.asset_client = FakeAssetServiceClient(assets)
+    return collector.get_real_infrastructure()
+
+
+def test_pubsub_is_first_class_and_vm_zone_is_parsed() -> None:
+    summary = _summary(
+        [
+            make_asset("//pubsub.googleapis.com/projects/p/topics/t-1", "pubsub.googleapis.com/Topic"),
+            make_asset(
+                "//pubsub.googleapis.com/projects/p/subscriptions/s-1",
+                "pubsub.googleapis.com/Subscription",
+            ),
+            make_asset(
+                "//compute.googleapis.com/projects/p/zones/europe-west1-b/instances/vm-1",
+                "compute.googleapis.com/Instance",
+            ),
+        ]
+    )
+    assert summary["pubsub_topics"][0]["name"] == "t-1"
+    assert summary["pubsub_subscriptions"][0]["type"] == "Pub/Sub Subscription"
+    assert summary["vms"][0]["zone"] == "europe-west1-b"
+    assert summary["vms"][0]["monthly_cost"] == 24.46
+    assert summary["detected_resources"].endswith("1 pubsub topics, 1 pubsub subscriptions")
+
+
+def test_registered_type_is_queried_and_classified() -> None:
+    asset_type = "file.googleapis.com/Instance"
+    spec = AssetTypeSpec(
+        asset_type,
+        "filestore_instances",
+        ManagedResource,
+        lambda asset, parts, rels: ManagedResource(parts[-1], "Filestore", 0.0, rels),
+        lambda resource: 200.0,
+    )
+    register_asset_type(spec, "filestore")
+    try:
+        summary = _summary([make_asset("//file.googleapis.com/projects/p/instances/nfs", asset_type)])
+        assert summary["filestore_instances"][0]["monthly_cost"] == 200.0
+        assert "1 filestore" in summary["detected_resources"]
+    finally:
+        del ASSET_TYPE_REGISTRY[asset_type]
+        RESOURCE_BUCKETS.remove("filestore_instances")
+        del BUCKET_LABELS["filestore_instances"]
@@ -0,0 +1,73 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from google.cloud.asset_v1 import ContentType
+
+from app.capability_cache import CapabilityCache
+from app.gcp_real_data import GCPRealDataCollector
+from tests.fakes import FakeAssetServiceClient
+from tests.unit.test_gcp_real_data import INVENTORY
+
+BUCKET = "storage.googleapis.com/Bucket"
+# Rechaza RELATIONSHIP sin que el registro lo sepa, así que hay que sondearlo.
+SQL = "sqladmin.googleapis.com/Instance"
+
+
+def _collect(cache: CapabilityCache, **kwargs) -> FakeAssetServiceClient:
+    client = FakeAssetServiceClient(INVENTORY, no_relationship_types={BUCKET, SQL})
+    collector = GCPRealDataCollector("p", max_workers=1, capability_cache=cache, **kwargs)
+    collector.asset_client = client
+    summary = collector.get_real_infrastructure()
+    assert [b["name"] for b in summary["storage"]] == ["bucket-1"]
+    assert [d["name"] for d in summary["databases"]] == ["db-1"]
+    return client
+
+
+def test_repeat_collection_skips_failing_relationship_call(tmp_path) -> None:
+    path = str(tmp_path / "capabilities.sqlite")
+    first = _collect(CapabilityCache(path))
+    assert len([c for c in first.calls if c["asset_types"] == [SQL]]) == 2
+    assert len([c for c in first.calls if c["asset_types"] == [BUCKET]]) == 1
+
+    cache = CapabilityCache(path)
+    second = _collect(cache)
+    sql_calls = [c for c in second.calls if c["asset_types"] == [SQL]]
+    assert [c["content_type"] for c in sql_calls] == [ContentType.RESOURCE]
+    assert cache.stats() == {"hits": len(second.calls), "misses": 0}
+
+
+def test_multi_type_requests_known_resource_only_types_together(tmp_path) -> None:
+    path = str(tmp_path / "capabilities.sqlite")
+    _collect(CapabilityCache(path), query_mode="multi_type")
+    client = _collect(CapabilityCache(path), query_mode="multi_type")
+    assert [c["content_type"] for c in client.calls] == [ContentType.RELATIONSHIP, ContentType.RESOURCE]
+    assert sorted(client.calls[1]["asset_types"]) == [SQL, BUCKET]
+
+
+def test_cold_cache_is_seeded_from_the_registry(tmp_path) -> None:
+    cache = CapabilityCache(str(tmp_path / "capabilities.sqlite"))
+    client = FakeAssetServiceClient(INVENTORY, no_relationship_types={BUCKET})
+    collector = GCPRealDataCollector("p", capability_cache=cache, query_mode="multi_type")
+    collector.asset_client = client
+    collector.get_real_infrastructure()
+    # Sin bisección: el bucket se pide directamente con RESOURCE y queda en la caché.
+    assert [c["content_type"] for c in client.calls] == [ContentType.RELATIONSHIP, ContentType.RESOURCE]
+    assert cache.get("p", BUCKET) == ContentType.RESOURCE
+
+
+def test_expired_capabilities_are_probed_again(tmp_path) -> None:
+    cache = CapabilityCache(str(tmp_path / "capabilities.sqlite"), ttl_seconds=0)
+    cache.record("p", [BUCKET], ContentType.RESOURCE)
+    assert cache.get("p", BUCKET) is None
+    assert cache.stats() == {"hits": 0, "misses": 1}
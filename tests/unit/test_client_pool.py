@@ -0,0 +1,83 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import google.auth
+
+from app.client_pool import ClientPool
+
+
+def test_clients_and_credentials_are_created_once(monkeypatch) -> None:
+    calls = []
+    default = google.auth.default
+
+    def counting_default():
+        calls.append(1)
+        return default()
+
+    monkeypatch.setattr(google.auth, "default", counting_default)
+    pool = ClientPool()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: pool.asset_client(), range(16)))
+    assert all(client is clients[0] for client in clients)
+    assert pool.recommender_client() is pool.recommender_client()
+    assert pool.storage_client("a") is not pool.storage_client("b")
+    assert len(calls) == 1
+
+    pool.reset()
+    assert pool.asset_client() is not clients[0]
+    assert len(calls) == 2
+
+
+def test_credential_context_describes_identity_once(monkeypatch) -> None:
+    calls = []
+
+    def fake_default():
+        calls.append(1)
+        return SimpleNamespace(service_account_email="sa@p.iam.gserviceaccount.com"), "p"
+
+    monkeypatch.setattr(google.auth, "default", fake_default)
+    pool = ClientPool()
+    context = pool.credential_context()
+    assert (context.project_id, context.account) == ("p", "sa@p.iam.gserviceaccount.com")
+    assert pool.credential_context().credentials is context.credentials
+    assert len(calls) == 1
+
+
+def test_channels_keep_unlimited_message_size(monkeypatch) -> None:
+    from google.cloud.asset_v1.services.asset_service.transports import (
+        AssetServiceGrpcTransport,
+    )
+    from google.cloud.recommender_v1.services.recommender.transports import (
+        RecommenderGrpcTransport,
+    )
+
+    options = {}
+    for name, transport in (("asset", AssetServiceGrpcTransport), ("recommender", RecommenderGrpcTransport)):
+        original = transport.create_channel
+
+        def recording(*args, _name=name, _original=original, **kwargs):
+            options[_name] = dict(kwargs["options"])
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(transport, "create_channel", recording)
+    pool = ClientPool()
+    pool.asset_client()
+    pool.recommender_client()
+    for name in ("asset", "recommender"):
+        assert options[name]["grpc.max_send_message_length"] == -1
+        assert options[name]["grpc.max_receive_message_length"] == -1
+        assert options[name]["grpc.keepalive_time_ms"] > 0
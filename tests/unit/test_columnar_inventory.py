@@ -0,0 +1,39 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.gcp_real_data import GCPRealDataCollector
+from tests.fakes import FakeAssetServiceClient
+from tests.unit.test_gcp_real_data import INVENTORY
+
+
+def _collector() -> GCPRealDataCollector:
+    collector = GCPRealDataCollector("p", max_workers=1)
+    collector.asset_client = FakeAssetServiceClient(INVENTORY)
+    return collector
+
+
+def test_columnar_exports_legacy_summary() -> None:
+    columnar = _collector().get_columnar_inventory()
+    assert len(columnar) == 4
+    assert columnar.to_summary() == _collector().get_real_infrastructure()
+
+
+def test_columnar_aggregations() -> None:
+    columnar = _collector().get_columnar_inventory()
+    assert round(columnar.total_cost(), 2) == 90.76
+    assert columnar.count_by_bucket()["storage"] == 1
+    assert columnar.cost_by_bucket()["databases"] == 50
+    assert columnar.top_k(2) == [("db-1", "databases", 50.0), ("vm-1", "vms", 24.46)]
+    assert columnar.top_k(1, bucket="run_services") == [("svc-1", "run_services", 15.0)]
+    assert columnar.relationships(0)[0]["type"] == "INSTANCE_TO_DISK"
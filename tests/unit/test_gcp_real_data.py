@@ -0,0 +1,242 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from datetime import datetime, timezone
+
+from google.cloud.asset_v1 import ContentType
+
+from app.gcp_real_data import GCPRealDataCollector, InventoryAggregator
+from app.inventory_store import InventorySnapshotStore
+from tests.fakes import FakeAssetServiceClient, make_asset
+
+INVENTORY = [
+    make_asset(
+        "//compute.googleapis.com/projects/p/zones/europe-west1-b/instances/vm-1",
+        "compute.googleapis.com/Instance",
+        [("//compute.googleapis.com/projects/p/zones/europe-west1-b/disks/d-1", "INSTANCE_TO_DISK")],
+    ),
+    make_asset(
+        "//storage.googleapis.com/bucket-1", "storage.googleapis.com/Bucket"
+    ),
+    make_asset(
+        "//sqladmin.googleapis.com/projects/p/instances/db-1",
+        "sqladmin.googleapis.com/Instance",
+    ),
+    make_asset(
+        "//run.googleapis.com/projects/p/locations/europe-west1/services/svc-1",
+        "run.googleapis.com/Service",
+    ),
+]
+
+
+def _collector(client: FakeAssetServiceClient, **kwargs) -> GCPRealDataCollector:
+    collector = GCPRealDataCollector("p", **kwargs)
+    collector.asset_client = client
+    return collector
+
+
+def test_concurrent_matches_sequential() -> None:
+    sequential = _collector(FakeAssetServiceClient(INVENTORY), max_workers=1)
+    concurrent = _collector(FakeAssetServiceClient(INVENTORY), max_workers=4)
+    assert concurrent.get_real_infrastructure() == sequential.get_real_infrastructure()
+
+
+def test_concurrency_is_bounded() -> None:
+    client = FakeAssetServiceClient(INVENTORY, latency=0.02)
+    _collector(client, max_workers=3).get_real_infrastructure()
+    assert 1 < client.max_in_flight <= 3
+
+
+def test_relationship_fallback_is_per_type() -> None:
+    client = FakeAssetServiceClient(
+        INVENTORY, no_relationship_types={"sqladmin.googleapis.com/Instance"}
+    )
+    summary = _collector(client, max_workers=4).get_real_infrastructure()
+    assert [d["name"] for d in summary["databases"]] == ["db-1"]
+    assert summary["vms"][0]["relationships"] == [
+        {
+            "target": "//compute.googleapis.com/projects/p/zones/europe-west1-b/disks/d-1",
+            "type": "INSTANCE_TO_DISK",
+        }
+    ]
+    sql_calls = [
+        c for c in client.calls if c["asset_types"] == ["sqladmin.googleapis.com/Instance"]
+    ]
+    assert len(sql_calls) == 2
+    # El registro ya sabe que los buckets no tienen relaciones: no se sondean.
+    bucket_calls = [
+        c for c in client.calls if c["asset_types"] == ["storage.googleapis.com/Bucket"]
+    ]
+    assert [c["content_type"] for c in bucket_calls] == [ContentType.RESOURCE]
+
+
+def test_multi_type_uses_single_request() -> None:
+    client = FakeAssetServiceClient(INVENTORY)
+    summary = _collector(client, query_mode="multi_type").get_real_infrastructure()
+    # Una llamada con relaciones y otra con RESOURCE para los tipos que el registro marca sin ellas.
+    assert [c["content_type"] for c in client.calls] == [ContentType.RELATIONSHIP, ContentType.RESOURCE]
+    expected = _collector(FakeAssetServiceClient(INVENTORY)).get_real_infrastructure()
+    assert summary == expected
+
+
+def test_multi_type_falls_back_only_for_rejecting_types() -> None:
+    rejecting = {"sqladmin.googleapis.com/Instance"}
+    client = FakeAssetServiceClient(INVENTORY, no_relationship_types=rejecting)
+    summary = _collector(client, query_mode="multi_type").get_real_infrastructure()
+    assert [d["name"] for d in summary["databases"]] == ["db-1"]
+    assert len(summary["vms"][0]["relationships"]) == 1
+    resource_only = [c for c in client.calls if c["content_type"] == ContentType.RESOURCE]
+    assert [c["asset_types"] for c in resource_only] == [sorted(rejecting), ["storage.googleapis.com/Bucket"]]
+
+
+def test_iter_resources_streams_records_into_aggregator() -> None:
+    collector = _collector(FakeAssetServiceClient(INVENTORY), max_workers=1)
+    records = collector.iter_resources()
+    first = next(records)
+    assert first.bucket == "vms"
+
+    totals_only = InventoryAggregator("p", keep_resources=False)
+    totals_only.add(first)
+    totals_only.consume(records)
+    summary = totals_only.summary()
+    expected = _collector(FakeAssetServiceClient(INVENTORY)).get_real_infrastructure()
+    assert summary["vms"] == []
+    assert summary["total_monthly_cost"] == expected["total_monthly_cost"]
+    assert summary["detected_resources"] == expected["detected_resources"]
+
+
+def test_snapshot_store_serves_fresh_inventory_without_api_calls(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    first = _collector(FakeAssetServiceClient(INVENTORY), snapshot_store=store)
+    expected = first.get_real_infrastructure()
+
+    client = FakeAssetServiceClient(INVENTORY)
+    warm = _collector(client, snapshot_store=store)
+    assert warm.get_real_infrastructure() == expected
+    assert client.calls == []
+
+
+def test_stale_snapshot_is_served_and_refreshed_in_background(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    _collector(FakeAssetServiceClient(INVENTORY), snapshot_store=store).get_real_infrastructure()
+    (read_time, _) = store.load_latest("p", "storage.googleapis.com/Bucket")
+
+    client = FakeAssetServiceClient(INVENTORY[:1])
+    stale = _collector(client, snapshot_store=store, freshness_seconds=0)
+    assert len(stale.get_real_infrastructure()["storage"]) == 1
+
+    deadline = time.time() + 5
+    while store.load_latest("p", "storage.googleapis.com/Bucket")[0] == read_time:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    assert store.load_latest("p", "storage.googleapis.com/Bucket")[1] == []
+
+
+def test_summary_collector_queries_live_instead_of_refreshing_a_stale_snapshot(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    _collector(FakeAssetServiceClient(INVENTORY), snapshot_store=store).get_real_infrastructure()
+    (read_time, _) = store.load_latest("p", "storage.googleapis.com/Bucket")
+
+    client = FakeAssetServiceClient(INVENTORY[:1])
+    stale = _collector(client, backend="summary", snapshot_store=store, freshness_seconds=0)
+    assert stale.get_real_infrastructure()["storage"] == []
+    assert len(client.calls) == 1
+    time.sleep(0.05)
+    assert len(client.calls) == 1
+    assert store.load_latest("p", "storage.googleapis.com/Bucket")[0] == read_time
+
+
+def test_sync_inventory_applies_only_changes(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    first = _collector(FakeAssetServiceClient(INVENTORY), snapshot_store=store)
+    aggregator = InventoryAggregator("p").consume(first.iter_resources())
+
+    changed_vm = make_asset(
+        INVENTORY[0].name,
+        INVENTORY[0].asset_type,
+        update_time=datetime(2025, 10, 1, tzinfo=timezone.utc),
+    )
+    new_bucket = make_asset("//storage.googleapis.com/bucket-2", "storage.googleapis.com/Bucket")
+    client = FakeAssetServiceClient([changed_vm, INVENTORY[1], new_bucket, INVENTORY[3]])
+    delta = _collector(client, snapshot_store=store).sync_inventory(aggregator)
+
+    assert [r.resource.name for r in delta.added] == ["bucket-2"]
+    assert [r.resource.name for r in delta.removed] == ["db-1"]
+    assert [new.resource.name for _, new in delta.modified] == ["vm-1"]
+    assert [c.get("scope") for c in client.calls] == ["projects/p"]
+
+    # Relationships survive the search-only refresh of the modified VM.
+    summary = aggregator.summary()
+    assert len(summary["vms"][0]["relationships"]) == 1
+    rebuilt = _collector(FakeAssetServiceClient([]), snapshot_store=store).get_real_infrastructure()
+    assert rebuilt == summary
+
+
+def test_summary_backend_uses_single_masked_search(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    client = FakeAssetServiceClient(INVENTORY)
+    summary = _collector(client, backend="summary", snapshot_store=store).get_real_infrastructure()
+    detailed = _collector(FakeAssetServiceClient(INVENTORY)).get_real_infrastructure()
+
+    assert len(client.calls) == 1
+    assert client.calls[0]["read_mask"].paths == ["name", "asset_type", "location", "update_time"]
+    assert summary["detected_resources"] == detailed["detected_resources"]
+    assert summary["vms"][0]["relationships"] == []
+    # Summary results carry no relationships, so they must not become the snapshot.
+    assert store.load_latest("p", "compute.googleapis.com/Instance") is None
+
+
+def test_deadline_returns_partial_inventory_without_waiting_for_slow_types() -> None:
+    client = FakeAssetServiceClient(INVENTORY, type_latency={"sqladmin.googleapis.com/Instance": 1.0})
+    collector = _collector(client, max_workers=4, deadline_seconds=0.2)
+    start = time.perf_counter()
+    summary = collector.get_real_infrastructure()
+    assert time.perf_counter() - start < 0.6
+    assert summary["partial"] is True
+    assert summary["missing"] == ["sqladmin.googleapis.com/Instance"]
+    assert summary["databases"] == []
+    assert [vm["name"] for vm in summary["vms"]] == ["vm-1"]
+    assert "partial" not in _collector(FakeAssetServiceClient(INVENTORY), deadline_seconds=5).get_real_infrastructure()
+
+
+def test_absolute_deadline_is_shared_and_can_be_tightened_per_call() -> None:
+    slow = {"sqladmin.googleapis.com/Instance": 1.0}
+    collector = _collector(FakeAssetServiceClient(INVENTORY, type_latency=slow), max_workers=4,
+                           deadline_seconds=5, deadline_at=time.monotonic() + 0.2)
+    start = time.perf_counter()
+    assert collector.get_real_infrastructure()["missing"] == ["sqladmin.googleapis.com/Instance"]
+    assert time.perf_counter() - start < 0.6
+
+    collector = _collector(FakeAssetServiceClient(INVENTORY, type_latency=slow), max_workers=4, deadline_seconds=5)
+    start = time.perf_counter()
+    records = list(collector.iter_resources(deadline_at=time.monotonic() + 0.2))
+    assert time.perf_counter() - start < 0.6
+    assert collector.incomplete_asset_types == ["sqladmin.googleapis.com/Instance"]
+    assert {record.bucket for record in records} == {"vms", "storage", "run_services"}
+
+
+def test_deadline_bounds_each_rpc_and_slow_pages_in_multi_type_and_summary() -> None:
+    for kwargs in ({"query_mode": "multi_type"}, {"backend": "summary"}):
+        client = FakeAssetServiceClient(INVENTORY, page_latency=1.0)
+        collector = _collector(client, deadline_seconds=0.2, **kwargs)
+        start = time.perf_counter()
+        summary = collector.get_real_infrastructure()
+        assert time.perf_counter() - start < 0.6
+        assert summary["partial"] is True
+        assert client.timeouts and all(0 < t <= 0.2 for t in client.timeouts)
+    # Sin deadline no se fija timeout y se espera a las páginas.
+    client = FakeAssetServiceClient(INVENTORY, page_latency=0.01)
+    assert "partial" not in _collector(client, query_mode="multi_type").get_real_infrastructure()
+    assert client.timeouts == [None, None]
@@ -0,0 +1,75 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.insight_service import InsightService, collect_insight_names, summarize_content
+from app.recommendation_store import InsightCache
+from app.recommender_service import RecommenderService
+from tests.fakes import FakeRecommenderClient, make_insight, make_recommendation
+
+IDLE_VM = "projects/p/locations/europe-west1-b/recommenders/google.compute.instance.IdleResourceRecommender"
+VM_INSIGHTS = "projects/p/locations/europe-west1-b/insightTypes/google.compute.instance.IdleResourceInsight"
+SQL_INSIGHTS = "projects/p/locations/europe-west1/insightTypes/google.cloudsql.instance.IdleInsight"
+
+
+def _insights() -> dict:
+    insights = {f"{VM_INSIGHTS}/insights/i{i}": make_insight(f"{VM_INSIGHTS}/insights/i{i}", cpu={"p95": 0.02 * i})
+                for i in range(4)}
+    insights[f"{SQL_INSIGHTS}/insights/s1"] = make_insight(f"{SQL_INSIGHTS}/insights/s1", connections=0)
+    return insights
+
+
+def _recs() -> list:
+    client = FakeRecommenderClient({IDLE_VM: [
+        make_recommendation(f"{IDLE_VM}/recommendations/r{i}", savings_units=10,
+                            insights=(f"{VM_INSIGHTS}/insights/i{i}", f"{VM_INSIGHTS}/insights/i{(i + 1) % 4}"))
+        for i in range(4)
+    ] + [make_recommendation(f"{IDLE_VM}/recommendations/sql", insights=(f"{SQL_INSIGHTS}/insights/s1",
+                                                                         f"{SQL_INSIGHTS}/insights/gone"))]})
+    return RecommenderService("p", client=client).get_all_recommendations(
+        [("europe-west1-b", "google.compute.instance.IdleResourceRecommender")])
+
+
+def test_insights_are_deduped_batched_and_attached() -> None:
+    recs = _recs()
+    assert len(collect_insight_names(recs)) == 6
+    client = FakeRecommenderClient(insights=_insights())
+    assert InsightService("p", client).attach_evidence(recs) == 5
+    # Cuatro insights del mismo tipo: una sola llamada list_insights; los sueltos con get_insight.
+    assert sorted(client.insight_calls) == [
+        ("get_insight", f"{SQL_INSIGHTS}/insights/gone"),
+        ("get_insight", f"{SQL_INSIGHTS}/insights/s1"),
+        ("list_insights", VM_INSIGHTS),
+    ]
+    evidence = recs[0]["evidence"]
+    assert [insight["name"] for insight in evidence] == [f"{VM_INSIGHTS}/insights/i0", f"{VM_INSIGHTS}/insights/i1"]
+    assert evidence[1]["evidence"] == {"cpu.p95": 0.02}
+    assert evidence[1]["observation_days"] == 30
+    assert [insight["evidence"] for insight in recs[4]["evidence"]] == [{"connections": 0}]
+
+
+def test_cached_insights_are_not_fetched_again(tmp_path) -> None:
+    cache = InsightCache(str(tmp_path / "insights.sqlite"))
+    InsightService("p", FakeRecommenderClient(insights=_insights()), cache=cache).attach_evidence(_recs())
+    client = FakeRecommenderClient(insights=_insights())
+    recs = _recs()
+    InsightService("p", client, cache=cache).attach_evidence(recs)
+    # Solo se vuelve a pedir el que no existía.
+    assert client.insight_calls == [("get_insight", f"{SQL_INSIGHTS}/insights/gone")]
+    assert len(recs[0]["evidence"]) == 2
+
+
+def test_summarize_content() -> None:
+    content = {"a": 1, "b": {"c": 2, "d": {"deep": 1}}, "e": [1, 2, 3]}
+    assert summarize_content(content) == {"a": 1, "b.c": 2, "e": "3 items"}
+    assert len(summarize_content({f"k{i}": i for i in range(20)}, limit=5)) == 5
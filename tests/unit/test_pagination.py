@@ -0,0 +1,66 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.pagination import iter_prefetched
+from tests.fakes import FakePager
+
+PAGES = [[1, 2], [3, 4], [5]]
+
+
+def test_prefetch_keeps_order_and_overlaps_fetch_with_processing() -> None:
+    pager = FakePager(PAGES, latency=0.05)
+    start = time.perf_counter()
+    items = []
+    for item in iter_prefetched(pager, "assets"):
+        time.sleep(0.05 / 2)  # procesado de cada elemento
+        items.append(item)
+    elapsed = time.perf_counter() - start
+    assert items == [1, 2, 3, 4, 5]
+    # Secuencial serían 3 * 0.05 + 5 * 0.025 = 0.275s.
+    assert elapsed < 0.25
+
+
+def test_prefetch_stops_when_consumer_abandons() -> None:
+    pager = FakePager([[i] for i in range(10)], latency=0.01)
+    assert next(iter_prefetched(pager, "assets")) == 0
+    time.sleep(0.3)
+    assert pager.fetched <= 3
+
+
+def test_prefetch_reraises_page_errors_and_accepts_plain_iterables() -> None:
+    class BrokenPager:
+        @property
+        def pages(self):
+            yield SimpleNamespace(assets=[1])
+            raise RuntimeError("page 2 failed")
+
+    items = []
+    with pytest.raises(RuntimeError, match="page 2 failed"):
+        for item in iter_prefetched(BrokenPager(), "assets"):
+            items.append(item)
+    assert items == [1]
+    assert list(iter_prefetched([1, 2], "assets")) == [1, 2]
+
+
+def test_prefetch_deadline_stops_waiting_for_a_slow_page() -> None:
+    pager = FakePager([[1], [2]], latency=0.5)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        list(iter_prefetched(pager, "assets", deadline_at=time.monotonic() + 0.1))
+    assert time.perf_counter() - start < 0.4
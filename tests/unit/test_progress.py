@@ -0,0 +1,44 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from app import progress
+
+
+def _publish_in_thread(tool: str, message: str) -> None:
+    thread = threading.Thread(target=progress.publish, args=(tool, message))
+    thread.start()
+    thread.join()
+
+
+def test_progress_reaches_only_its_own_run() -> None:
+    received = {"a": [], "b": []}
+    progress.subscribe("a", lambda tool, message: received["a"].append(message))
+    progress.subscribe("b", lambda tool, message: received["b"].append(message))
+    try:
+        with progress.run_scope("a"):
+            progress.publish("tool", "for a")
+        with progress.run_scope("b"):
+            progress.publish("tool", "for b")
+        # Sin ejecución en el contexto y con dos suscritas no se sabe de quién es.
+        _publish_in_thread("tool", "unknown")
+        assert received == {"a": ["for a"], "b": ["for b"]}
+
+        progress.unsubscribe("b")
+        _publish_in_thread("tool", "only a is running")
+        assert received["a"] == ["for a", "only a is running"]
+    finally:
+        progress.unsubscribe("a")
+        progress.unsubscribe("b")
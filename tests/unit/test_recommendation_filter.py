@@ -0,0 +1,64 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from app.recommendation_filter import (
+    build_recommendation_filter,
+    parse_recommendation_filter,
+)
+from app.recommendation_store import RecommendationStore
+from app.recommender_replay import DEFAULT_REPLAY_DIR, ReplayRecommenderClient
+from app.recommender_service import RecommenderService
+from tests.fakes import FakeRecommenderClient, make_recommendation
+
+IAM = "projects/p/locations/global/recommenders/google.iam.policy.Recommender"
+
+
+def test_build_filter() -> None:
+    assert build_recommendation_filter() == ""
+    assert build_recommendation_filter(["active"]) == "stateInfo.state = ACTIVE"
+    assert build_recommendation_filter(["ACTIVE", " CLAIMED"], "P2") == (
+        "(stateInfo.state = ACTIVE OR stateInfo.state = CLAIMED) AND (priority = P1 OR priority = P2)")
+    assert build_recommendation_filter([""], "P4") == ""
+    assert parse_recommendation_filter(build_recommendation_filter(["ACTIVE"], "P1")) == {
+        "stateInfo.state": ["ACTIVE"], "priority": ["P1"]}
+    with pytest.raises(ValueError):
+        build_recommendation_filter(["OPEN"])
+    with pytest.raises(ValueError):
+        build_recommendation_filter(min_priority="P9")
+
+
+def test_filter_is_pushed_down_and_stored_separately(tmp_path) -> None:
+    store_path = str(tmp_path / "store.sqlite")
+    client = FakeRecommenderClient({IAM: [make_recommendation(f"{IAM}/recommendations/r1", category="SECURITY")]})
+    filtered = RecommenderService("p", client=client, filter="stateInfo.state = ACTIVE",
+                                  store=RecommendationStore(store_path))
+    filtered.get_all_recommendations([("global", "google.iam.policy.Recommender")])
+    assert client.calls[0]["filter"] == "stateInfo.state = ACTIVE"
+
+    # Un listado sin filtro no se sirve de lo guardado con filtro.
+    unfiltered = FakeRecommenderClient(client.recommendations)
+    RecommenderService("p", client=unfiltered, store=RecommendationStore(store_path)).get_all_recommendations(
+        [("global", "google.iam.policy.Recommender")])
+    assert len(unfiltered.calls) == 1 and "filter" not in unfiltered.calls[0]
+
+
+def test_replay_applies_the_filter() -> None:
+    client = ReplayRecommenderClient(DEFAULT_REPLAY_DIR)
+    everything = RecommenderService("p", client=client).get_all_recommendations()
+    important = RecommenderService("p", client=client,
+                                   filter=build_recommendation_filter(["ACTIVE"], "P3")).get_all_recommendations()
+    assert 0 < len(important) < len(everything)
+    assert {rec["priority"] for rec in important} <= {"P1", "P2", "P3"}
@@ -0,0 +1,81 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.asset_registry import ManagedResource
+from app.gcp_real_data import ResourceRecord
+from app.recommendation_index import RecommendationIndex, resource_key
+from app.recommender_service import RecommenderService
+from tests.fakes import FakeRecommenderClient, make_recommendation
+
+VM = "//compute.googleapis.com/projects/my-project/zones/europe-west1-b/instances/vm-1"
+DB = "//cloudsql.googleapis.com/projects/my-project/instances/db-1"
+RUN = "//run.googleapis.com/projects/my-project/locations/europe-west1/services/svc"
+
+
+def _record(bucket: str, name: str, cost: float) -> ResourceRecord:
+    return ResourceRecord(bucket, ManagedResource(name.rsplit("/", 1)[-1], "t", cost), name)
+
+
+RECORDS = [_record("vms", VM, 50.0), _record("databases", DB, 120.0), _record("run_services", RUN, 10.0)]
+
+
+def test_resource_key_matches_recommender_spellings() -> None:
+    assert resource_key("//sqladmin.googleapis.com/v1/projects/123/instances/db-1") == resource_key(DB)
+    assert resource_key("//run.googleapis.com/projects/123/regions/europe-west1/services/svc") == resource_key(RUN)
+    assert resource_key("//compute.googleapis.com/projects/123/zones/europe-west1-b/instances/vm-1") == resource_key(VM)
+    assert resource_key(VM) != resource_key(VM.replace("vm-1", "vm-2"))
+
+
+def test_index_joins_both_directions() -> None:
+    recs = [
+        {"id": "r1", "state": "ACTIVE", "monthly_savings": 30, "priority": "P2",
+         "resource_names": ["//compute.googleapis.com/projects/123/zones/europe-west1-b/instances/vm-1"]},
+        {"id": "r2", "state": "ACTIVE", "monthly_savings": 0, "priority": "P1",
+         "resource_names": ["//cloudresourcemanager.googleapis.com/projects/123",
+                            "//sqladmin.googleapis.com/v1/projects/my-project/instances/db-1"]},
+        {"id": "r3", "state": "DISMISSED", "monthly_savings": 80, "priority": "P4",
+         "resource_names": ["//compute.googleapis.com/projects/123/zones/europe-west1-b/instances/vm-1"]},
+        {"id": "r4", "state": "ACTIVE", "monthly_savings": 0, "priority": "P4",
+         "resource_names": ["//cloudresourcemanager.googleapis.com/projects/123"]},
+    ]
+    index = RecommendationIndex(RECORDS, recs)
+    assert index.resources_for("r2") == [DB]
+    assert [rec["id"] for rec in index.recommendations_for(VM)] == ["r1"]
+    assert [rec["id"] for rec in index.recommendations_for(VM, pending_only=False)] == ["r1", "r3"]
+    assert index.savings_for(VM) == 30
+    assert [record.asset_name for record, _ in index.costly_with_recommendations()] == [DB, VM]
+    assert index.unmatched == [3]
+
+
+def test_incremental_index_keeps_same_named_resources_apart() -> None:
+    other_vm = VM.replace("europe-west1-b", "us-central1-a")
+    index = RecommendationIndex()
+    for record in [*RECORDS, _record("vms", other_vm, 70.0)]:
+        index.add_record(record)
+    index.add_recommendations([{"id": "r1", "state": "ACTIVE", "monthly_savings": 30, "priority": "P2",
+                                "resource_names": [VM]}])
+    assert index.savings_for(VM) == 30
+    assert index.savings_for(other_vm) == 0
+    [(resource, _)] = index.costly_with_recommendations()
+    assert (resource.asset_name, resource.name, resource.monthly_cost) == (VM, "vm-1", 50.0)
+
+
+def test_parsed_recommendations_carry_full_resource_names() -> None:
+    parent = "projects/p/locations/europe-west1-b/recommenders/google.compute.instance.IdleResourceRecommender"
+    client = FakeRecommenderClient({parent: [make_recommendation(f"{parent}/recommendations/r1", resource=VM)]})
+    service = RecommenderService("p", client=client)
+    recs = service.get_all_recommendations([("europe-west1-b", "google.compute.instance.IdleResourceRecommender")])
+    assert recs[0]["resource"] == "vm-1"
+    assert recs[0]["resource_names"] == [VM]
+    assert RecommendationIndex(RECORDS, recs).resources_for(recs[0]["id"]) == [VM]
@@ -0,0 +1,53 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import pytest
+
+from app.recommendation_ranking import page_recommendations, rank_key, top_k
+
+
+def _rec(rec_id: str, savings: int, priority: str, category: str = "COST") -> dict:
+    return {"id": rec_id, "monthly_savings": savings, "priority": priority, "category": category}
+
+
+def test_top_k_orders_by_savings_then_priority() -> None:
+    recs = [_rec("a", 10, "P4"), _rec("b", 50, "P2"), _rec("c", 10, "P1"), _rec("d", 0, "P1", "SECURITY")]
+    assert [r["id"] for r in top_k(recs, 3)] == ["b", "c", "a"]
+    assert [r["id"] for r in top_k(recs, 10)] == ["b", "c", "a", "d"]
+
+
+def test_pages_cover_the_ranking_exactly_once() -> None:
+    rng = random.Random(7)
+    recs = [_rec(f"r{i}", rng.choice([0, 5, 20, 100]), rng.choice(["P1", "P2", "P3", "P4"])) for i in range(57)]
+    categorized = {"COST": recs[:30], "SECURITY": recs[30:]}
+    seen, cursor = [], None
+    while True:
+        page, cursor = page_recommendations(categorized, page_size=10, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == sorted(recs, key=rank_key)
+
+    # Una recomendación nueva entre páginas no desplaza ni repite las ya entregadas.
+    first, cursor = page_recommendations(categorized, page_size=10)
+    categorized["COST"].append(_rec("new", 1000, "P1"))
+    second, _ = page_recommendations(categorized, page_size=10, cursor=cursor)
+    assert not {r["id"] for r in first} & {r["id"] for r in second}
+
+
+def test_invalid_cursor() -> None:
+    with pytest.raises(ValueError):
+        page_recommendations({"COST": []}, cursor="not-a-cursor")
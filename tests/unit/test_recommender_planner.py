@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from app.gcp_real_data import GCPRealDataCollector
+from app.recommender_planner import InventoryLocations, plan_recommender_pairs
+from app.recommender_service import LOCATIONS, RECOMMENDER_TYPES
+from tests.fakes import FakeAssetServiceClient
+from tests.unit.test_gcp_real_data import INVENTORY
+
+
+def _records() -> list:
+    collector = GCPRealDataCollector("p", max_workers=1)
+    collector.asset_client = FakeAssetServiceClient(INVENTORY)
+    return list(collector.iter_resources())
+
+
+def test_plan_follows_inventory_locations() -> None:
+    pairs = plan_recommender_pairs(_records())
+    assert len(pairs) < len(LOCATIONS) * len(RECOMMENDER_TYPES)
+    assert ("europe-west1-b", "google.compute.instance.IdleResourceRecommender") in pairs
+    assert ("us-central1", "google.compute.instance.IdleResourceRecommender") not in pairs
+    assert ("europe-west1", "google.compute.commitment.UsageCommitmentRecommender") in pairs
+    assert ("europe-west1", "google.run.service.CostRecommender") in pairs
+    assert ("global", "google.storage.bucket.SoftDeleteRecommender") in pairs
+    assert [p for p in pairs if p[1] == "google.iam.policy.Recommender"] == [("global", "google.iam.policy.Recommender")]
+    # No hay clusters GKE en el inventario.
+    assert not [p for p in pairs if p[1] == "google.container.DiagnosisRecommender"]
+    # Las instancias de Cloud SQL no llevan región en el nombre: se usan las ubicaciones por defecto.
+    assert ("us-central1", "google.cloudsql.instance.IdleRecommender") in pairs
+    assert pairs == sorted(pairs, key=lambda p: (p[0], RECOMMENDER_TYPES.index(p[1])))
+
+
+def test_plan_covers_zones_outside_the_default_list() -> None:
+    records = [r._replace(asset_name=r.asset_name.replace("europe-west1-b", "asia-east1-a")) for r in _records()]
+    pairs = plan_recommender_pairs(records)
+    assert ("asia-east1-a", "google.compute.instance.MachineTypeRecommender") in pairs
+    assert ("asia-east1", "google.compute.address.IdleResourceRecommender") in pairs
+
+
+def test_incomplete_types_fall_back_to_default_locations() -> None:
+    pairs = plan_recommender_pairs([], unknown_asset_types=["container.googleapis.com/Cluster"])
+    assert {location for location, t in pairs if t == "google.container.DiagnosisRecommender"} == set(LOCATIONS) - {"global"}
+
+
+def test_orphan_recommenders_are_planned_without_vms() -> None:
+    run_only = [r for r in _records() if r.bucket == "run_services"]
+    assert run_only
+    pairs = plan_recommender_pairs(run_only)
+    assert not [p for p in pairs if p[1] == "google.compute.instance.IdleResourceRecommender"]
+    assert ("europe-west1-b", "google.compute.disk.IdleResourceRecommender") in pairs
+    assert ("europe-west1-b", "google.compute.IdleResourceRecommender") in pairs
+    assert {location for location, t in pairs if t == "google.compute.address.IdleResourceRecommender"} == {"europe-west1", "us-central1"}
+
+
+def test_accumulated_locations_plan_like_the_records() -> None:
+    inventory = InventoryLocations()
+    for record in _records():
+        inventory.add(record)
+    assert inventory.count == len(_records())
+    assert plan_recommender_pairs(inventory) == plan_recommender_pairs(_records())
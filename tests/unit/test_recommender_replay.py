@@ -0,0 +1,76 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import pytest
+
+from app import recommender_service
+from app.capability_cache import UnavailableRecommenderCache
+from app.recommendation_store import RecommendationStore
+from app.recommender_replay import (
+    DEFAULT_REPLAY_DIR,
+    ReplayRecommenderClient,
+    iter_json_array,
+)
+from app.recommender_service import RecommenderService
+
+IAM = "projects/p/locations/global/recommenders/google.iam.policy.Recommender"
+
+
+def test_streaming_parser_matches_json_load(tmp_path) -> None:
+    items = [{"name": f"r{i}", "text": "a, ] [ {b}", "nested": [1, {"x": None}]} for i in range(50)]
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(items, indent=2))
+    assert list(iter_json_array(str(path), chunk_size=7)) == items
+
+    (tmp_path / "empty.json").write_text(" [ ]\n")
+    assert list(iter_json_array(str(tmp_path / "empty.json"))) == []
+
+    (tmp_path / "truncated.json").write_text('[{"name": "r0"}, {"name": ')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(tmp_path / "truncated.json"), chunk_size=4))
+
+
+def test_index_and_replay_from_dumps() -> None:
+    client = ReplayRecommenderClient(DEFAULT_REPLAY_DIR)
+    assert ("global", "google.iam.policy.Recommender") in client.index
+    assert ("europe-west1", "google.run.service.SecurityRecommender") in client.index
+    recommendations = list(client.list_recommendations({"parent": IAM}))
+    assert len(recommendations) == len(json.load(open(client.index[("global", "google.iam.policy.Recommender")])))
+    assert recommendations[0].name.startswith("projects/")
+    assert list(client.list_recommendations({"parent": IAM.replace("global", "us-central1")})) == []
+
+
+def test_service_runs_offline_against_dumps() -> None:
+    service = RecommenderService("p", client=ReplayRecommenderClient(DEFAULT_REPLAY_DIR))
+    data = service.get_categorized_recommendations()
+    assert data["recommendation_count"] > 0
+    assert data["recommendations"]["SECURITY"]
+    assert "partial" not in data
+
+
+def test_replay_run_leaves_the_store_and_caches_untouched(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(recommender_service, "RECOMMENDER_REPLAY_DIR", DEFAULT_REPLAY_DIR)
+    path = str(tmp_path / "store.sqlite")
+    store, cache = RecommendationStore(path), UnavailableRecommenderCache(path)
+    service = RecommenderService("p", store=store, unavailable_cache=cache)
+    assert service.replay
+    assert service.get_categorized_recommendations()["recommendation_count"] > 0
+
+    pairs = [(location, recommender) for location in recommender_service.LOCATIONS
+             for recommender in recommender_service.RECOMMENDER_TYPES]
+    assert store.fresh_pairs("p", pairs) == set()
+    assert store.load_recommender("p", "global", "google.iam.policy.Recommender") == {}
+    assert cache.unavailable("p") == {}
@@ -0,0 +1,193 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.capability_cache import UnavailableRecommenderCache
+from app.recommendation_store import RecommendationStore
+from app.recommender_service import LOCATIONS, RECOMMENDER_TYPES, RecommenderService
+from tests.fakes import FakeRecommenderClient, make_recommendation
+
+IDLE_VM = "projects/p/locations/europe-west1-b/recommenders/google.compute.instance.IdleResourceRecommender"
+IAM = "projects/p/locations/global/recommenders/google.iam.policy.Recommender"
+
+
+def _service(client: FakeRecommenderClient, **kwargs) -> RecommenderService:
+    service = RecommenderService("p", **kwargs)
+    service.client = client
+    return service
+
+
+def test_categorized_recommendations() -> None:
+    client = FakeRecommenderClient({
+        IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", savings_units=20)],
+        IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY", subtype="REMOVE_ROLE")],
+    })
+    data = _service(client).get_categorized_recommendations()
+    assert data["recommendation_count"] == 2
+    assert data["total_monthly_savings"] == 20
+    assert data["recommendations"]["COST"][0]["resource"] == "vm-1"
+    assert data["recommendations"]["SECURITY"][0]["type"] == "REMOVE_ROLE"
+    assert "partial" not in data
+
+
+def test_deadline_returns_partial_recommendations() -> None:
+    client = FakeRecommenderClient(
+        {IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY")]},
+        parent_latency={IDLE_VM: 1.0},
+    )
+    start = time.perf_counter()
+    data = _service(client, deadline_seconds=0.3).get_categorized_recommendations()
+    assert time.perf_counter() - start < 0.8
+    assert data["partial"] is True
+    assert "europe-west1-b/google.compute.instance.IdleResourceRecommender" in data["missing"]
+    assert len(data["recommendations"]["SECURITY"]) == 1
+
+
+def test_fan_out_is_bounded_and_keeps_order() -> None:
+    parents = [f"projects/p/locations/{location}/recommenders/{t}" for location in LOCATIONS for t in RECOMMENDER_TYPES]
+    client = FakeRecommenderClient(
+        {parent: [make_recommendation(f"{parent}/recommendations/r")] for parent in parents},
+        latency=0.005,
+    )
+    recs = _service(client, max_workers=8).get_all_recommendations()
+    assert len(recs) == len(parents)
+    assert [r["id"] for r in recs] == ["r"] * len(parents)
+    assert 1 < client.max_in_flight <= 8
+    assert len(client.calls) == len(parents)
+    sequential = _service(FakeRecommenderClient(client.recommendations), max_workers=1).get_all_recommendations()
+    assert recs == sequential
+
+
+def test_quota_errors_are_retried_with_backoff(monkeypatch) -> None:
+    monkeypatch.setattr("app.recommender_service.QUOTA_BACKOFF_SECONDS", 0.01)
+    client = FakeRecommenderClient(
+        {IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", savings_units=5)]},
+        quota_failures={IDLE_VM: 2},
+    )
+    recs = _service(client).get_all_recommendations()
+    assert [r["id"] for r in recs] == ["r1"]
+    assert len([c for c in client.calls if c["parent"] == IDLE_VM]) == 3
+
+
+def test_unavailable_pairs_are_skipped_until_they_expire(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    errors = {IAM: "403 PERMISSION_DENIED", IDLE_VM: "404 NOT_FOUND"}
+    first = FakeRecommenderClient(errors=errors)
+    data = _service(first, unavailable_cache=UnavailableRecommenderCache(path)).get_categorized_recommendations()
+    assert data["skipped_unavailable"] == 0
+
+    second = FakeRecommenderClient(errors=errors)
+    data = _service(second, unavailable_cache=UnavailableRecommenderCache(path)).get_categorized_recommendations()
+    assert data["skipped_unavailable"] == 2
+    assert len(second.calls) == len(first.calls) - 2
+    assert {IAM, IDLE_VM}.isdisjoint(c["parent"] for c in second.calls)
+
+    expired = FakeRecommenderClient(errors=errors)
+    cache = UnavailableRecommenderCache(path, ttl_seconds=0)
+    _service(expired, unavailable_cache=cache).get_all_recommendations()
+    assert len(expired.calls) == len(first.calls)
+
+
+def test_store_serves_fresh_recommenders_and_refetches_stale_ones(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "store.sqlite")
+    refreshed = datetime.now(timezone.utc) - timedelta(hours=1)
+    recs = {
+        IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", savings_units=20, last_refresh_time=refreshed)],
+        IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY",
+                                  last_refresh_time=refreshed - timedelta(days=3))],
+    }
+    first = FakeRecommenderClient(recs)
+    expected = _service(first, store=RecommendationStore(path)).get_all_recommendations()
+    assert [r["id"] for r in expected] == ["r2", "r1"]
+
+    second = FakeRecommenderClient(recs)
+    service = _service(second, store=RecommendationStore(path))
+    assert service.get_all_recommendations() == expected
+    # Todo sigue fresco, también IAM: se descargó hace menos de MIN_RECHECK_SECONDS.
+    assert second.calls == []
+    assert service.served_from_store == len(first.calls)
+
+    # Pasado el recheck mínimo solo se vuelve a pedir IAM, cuyo lastRefreshTime es antiguo.
+    third = FakeRecommenderClient(recs)
+    parses = []
+    original_parse = RecommenderService._parse_recommendation
+    monkeypatch.setattr(RecommenderService, "_parse_recommendation",
+                        lambda self, rec: parses.append(rec.name) or original_parse(self, rec))
+    data = _service(third, store=RecommendationStore(path, min_recheck_seconds=0)).get_categorized_recommendations()
+    stale_parents = {c["parent"] for c in third.calls}
+    assert IAM in stale_parents and IDLE_VM not in stale_parents
+    assert parses == []  # mismo etag: se reutiliza el parseo guardado
+    assert data["recommendation_count"] == 2
+
+
+def test_store_rechecks_recommenders_with_pending_recommendations_sooner(tmp_path) -> None:
+    path = str(tmp_path / "store.sqlite")
+    refreshed = datetime.now(timezone.utc) - timedelta(hours=1)
+    recs = {
+        IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", last_refresh_time=refreshed)],
+        IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY", state="DISMISSED",
+                                  last_refresh_time=refreshed)],
+    }
+    _service(FakeRecommenderClient(recs), store=RecommendationStore(path)).get_all_recommendations()
+
+    # r1 sigue ACTIVE en el store, pero pudo descartarse sin que cambiara su lastRefreshTime.
+    client = FakeRecommenderClient(recs)
+    _service(client, store=RecommendationStore(path, pending_recheck_seconds=0)).get_all_recommendations()
+    parents = {c["parent"] for c in client.calls}
+    assert IDLE_VM in parents and IAM not in parents
+
+
+def test_transient_errors_fall_back_to_the_stored_copy(tmp_path) -> None:
+    path = str(tmp_path / "store.sqlite")
+    recs = {
+        IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", savings_units=20)],
+        IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY")],
+    }
+    _service(FakeRecommenderClient(recs), store=RecommendationStore(path)).get_all_recommendations()
+
+    failing = FakeRecommenderClient(recs, errors={IDLE_VM: "503 Service Unavailable"})
+    store = RecommendationStore(path, min_recheck_seconds=0, refresh_seconds=0)
+    data = _service(failing, store=store).get_categorized_recommendations()
+    assert IDLE_VM in {c["parent"] for c in failing.calls}
+    assert data["recommendation_count"] == 2
+    assert data["recommendations"]["COST"][0]["id"] == "r1"
+    assert data["partial"] is True
+    assert data["stale"] == ["europe-west1-b/google.compute.instance.IdleResourceRecommender"]
+
+    # Sin copia guardada el par falla del todo y se da por no consultado.
+    data = _service(failing).get_categorized_recommendations()
+    assert data["recommendation_count"] == 1
+    assert data["missing"] == ["europe-west1-b/google.compute.instance.IdleResourceRecommender"]
+
+
+def test_incremental_mode_yields_partials_before_the_slowest_recommender() -> None:
+    client = FakeRecommenderClient(
+        {
+            IDLE_VM: [make_recommendation(f"{IDLE_VM}/recommendations/r1", savings_units=20)],
+            IAM: [make_recommendation(f"{IAM}/recommendations/r2", category="SECURITY")],
+        },
+        parent_latency={IDLE_VM: 0.5},
+    )
+    start = time.perf_counter()
+    partials = []
+    for data in _service(client).iter_categorized_recommendations():
+        partials.append((time.perf_counter() - start, data["done"], data["total_monthly_savings"],
+                         data["recommendation_count"]))
+    first_with_iam = next(p for p in partials if p[3] == 1)
+    assert first_with_iam[0] < 0.4 and first_with_iam[2] == 0
+    assert partials[-1][1:] == (True, 20, 2)
+    assert all(not done for _, done, _, _ in partials[:-1])
+    assert data["recommendations"] == _service(client).get_categorized_recommendations()["recommendations"]
@@ -0,0 +1,117 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from google.cloud.asset_v1 import Asset
+
+from app.asset_registry import ManagedResource, parse_relationships
+from app.gcp_real_data import GCPRealDataCollector, InventoryDelta, ResourceRecord
+from app.inventory_store import InventorySnapshotStore
+from app.relationship_graph import (
+    RelationshipGraph,
+    apply_project_delta,
+    get_project_graph,
+)
+from tests.fakes import FakeAssetServiceClient
+from tests.unit.test_gcp_real_data import INVENTORY
+
+
+def _record(name: str, *targets: str) -> ResourceRecord:
+    relationships = [{"target": target, "type": "USES"} for target in targets]
+    return ResourceRecord("run_services", ManagedResource(name.rsplit("/", 1)[-1], "t", 0.0, relationships), name)
+
+
+CHAIN = [
+    _record("//run/svc-a", "//sql/db-1"),
+    _record("//run/svc-b", "//run/svc-a"),
+    _record("//sql/db-1"),
+    _record("//redis/cache", "//vpc/net"),
+]
+
+
+def test_neighbors_and_blast_radius() -> None:
+    graph = RelationshipGraph()
+    graph.update(CHAIN)
+    assert graph.neighbors("svc-a") == {"depends_on": [("USES", "//sql/db-1")],
+                                        "dependents": [("USES", "//run/svc-b")]}
+    assert graph.blast_radius("db-1") == [("//run/svc-a", 1), ("//run/svc-b", 2)]
+    assert graph.blast_radius("//sql/db-1", max_depth=1) == [("//run/svc-a", 1)]
+    assert graph.connected_components() == [["//run/svc-a", "//sql/db-1", "//run/svc-b"],
+                                            ["//redis/cache", "//vpc/net"]]
+
+
+def test_update_is_incremental() -> None:
+    graph = RelationshipGraph()
+    assert graph.update(CHAIN) == 3
+    assert graph.update(CHAIN) == 0
+    node_ids = dict(graph.nodes.ids)
+
+    changed = [_record("//run/svc-a"), *CHAIN[1:3]]
+    assert graph.update(changed) == 2  # svc-a pierde su arista y cache desaparece
+    assert graph.blast_radius("db-1") == []
+    assert graph.neighbors("cache") == {"depends_on": [], "dependents": []}
+    # Los nodos que siguen vivos conservan su id; cache y su red ya no están referenciados.
+    assert all(graph.nodes.ids[name] == node for name, node in node_ids.items() if name in graph.nodes.ids)
+    assert set(graph.nodes.ids) == {"//run/svc-a", "//run/svc-b", "//sql/db-1"}
+    assert "cache" not in graph.short_names and "net" not in graph.short_names
+    assert set(graph.reverse) == {graph.nodes.ids["//run/svc-a"]}
+
+
+def test_parse_relationships_reads_related_assets() -> None:
+    asset = Asset(name="//compute/vm-1", asset_type="compute.googleapis.com/Instance")
+    asset.related_assets.relationship_attributes.type = "INSTANCE_TO_DISK"
+    asset.related_assets.assets.append({"asset": "//compute/disk-1"})
+    assert parse_relationships(asset) == [{"target": "//compute/disk-1", "type": "INSTANCE_TO_DISK"}]
+
+
+def test_sync_deltas_reach_the_project_graph() -> None:
+    apply_project_delta("delta-project", InventoryDelta([CHAIN[0]], [], [], 0.0))  # Sin índice aún: se ignora.
+    graph = get_project_graph("delta-project", CHAIN)
+    moved = _record("//run/svc-b", "//sql/db-1")
+    apply_project_delta("delta-project", InventoryDelta([_record("//run/svc-c", "//run/svc-b")], [CHAIN[0]],
+                                                        [(CHAIN[1], moved)], 0.0))
+    assert graph.blast_radius("db-1") == [("//run/svc-b", 1), ("//run/svc-c", 2)]
+    assert graph.neighbors("svc-a") == {"depends_on": [], "dependents": []}
+
+
+def test_repeated_syncs_do_not_grow_the_graph() -> None:
+    graph = RelationshipGraph()
+    for i in range(50):
+        graph.apply_delta(InventoryDelta([_record(f"//run/tmp-{i}", f"//sql/db-{i}")], [], [], 0.0))
+        graph.apply_delta(InventoryDelta([], [_record(f"//run/tmp-{i}", f"//sql/db-{i}")], [], 0.0))
+    assert len(graph.nodes) == 0
+    assert graph.short_names == {} and graph.reverse == {} and graph.forward == {}
+
+
+def test_graph_builds_from_an_incremental_collector_with_a_stale_snapshot(tmp_path) -> None:
+    store = InventorySnapshotStore(str(tmp_path / "snapshots.sqlite"))
+
+    def collector() -> GCPRealDataCollector:
+        c = GCPRealDataCollector("stale-graph-project", max_workers=1, snapshot_store=store, incremental=True,
+                                 freshness_seconds=0, max_stale_seconds=0)
+        c.asset_client = FakeAssetServiceClient(INVENTORY)
+        return c
+
+    get_project_graph("stale-graph-project", collector().iter_resources())
+    # El snapshot ya está caducado: iter_resources sincroniza dentro del update() del índice.
+    result = []
+    worker = threading.Thread(
+        target=lambda: result.append(get_project_graph("stale-graph-project", collector().iter_resources())),
+        daemon=True)
+    worker.start()
+    worker.join(timeout=5)
+    assert not worker.is_alive(), "update() deadlocked on its own inventory sync"
+    assert result[0].neighbors("vm-1")["depends_on"] == [
+        ("INSTANCE_TO_DISK", "//compute.googleapis.com/projects/p/zones/europe-west1-b/disks/d-1")]
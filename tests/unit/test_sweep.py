@@ -0,0 +1,103 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from typing import ClassVar
+
+from app.asset_registry import VirtualMachine
+from app.gcp_real_data import InventoryAggregator, ResourceRecord
+from app.sweep import InfrastructureSweep, format_rollup, resolve_projects
+
+
+class FakeAnalyzer:
+    COSTS: ClassVar[dict[str, list[float]]] = {"cheap": [1.3], "pricey": [50, 24.46], "medium": [15.0], "slow": [99.0]}
+
+    def __init__(self, project_id: str, deadline_seconds: float | None = None) -> None:
+        if project_id == "broken":
+            raise PermissionError("403 Permission denied")
+        if project_id == "slow":
+            time.sleep(1.0)
+        self.project_id = project_id
+        self.deadline_seconds = deadline_seconds
+
+    def get_infrastructure_summary(self) -> dict:
+        aggregator = InventoryAggregator(self.project_id)
+        for i, cost in enumerate(self.COSTS[self.project_id]):
+            vm = VirtualMachine(f"vm-{i}", "e2-medium", cost, "europe-west1-b", "running")
+            aggregator.add(ResourceRecord("vms", vm))
+        return aggregator.summary()
+
+    def get_google_recommendations(self, filter: str = "") -> dict:
+        assert filter == "(stateInfo.state = ACTIVE OR stateInfo.state = CLAIMED)"
+        savings = 10 if self.project_id == "cheap" else 0
+        return {"total_monthly_savings": savings, "recommendation_count": 1}
+
+
+def test_resolve_projects_from_list() -> None:
+    assert resolve_projects(" a, b ,,c ") == ["a", "b", "c"]
+
+
+def test_sweep_isolates_errors_and_ranks_projects() -> None:
+    sweep = InfrastructureSweep(max_workers=2, analyzer_factory=FakeAnalyzer)
+    rollup = sweep.run(["cheap", "broken", "pricey", "medium"])
+
+    assert [p["project_id"] for p in rollup["projects"]] == ["pricey", "medium", "cheap"]
+    assert list(rollup["errors"]) == ["broken"]
+    assert rollup["total_monthly_cost"] == 90.76
+    assert rollup["top_resources"][0] == {
+        "project_id": "pricey", "bucket": "vms", "name": "vm-0", "monthly_cost": 50,
+    }
+    assert rollup["top_savings"][0]["project_id"] == "cheap"
+    assert "broken: 403 Permission denied" in format_rollup(rollup)
+
+
+def test_sweep_deadline_reports_unfinished_projects() -> None:
+    sweep = InfrastructureSweep(max_workers=2, analyzer_factory=FakeAnalyzer, deadline_seconds=0.3)
+    start = time.perf_counter()
+    rollup = sweep.run(["slow", "cheap", "medium"])
+    assert time.perf_counter() - start < 0.8
+    assert rollup["unfinished"] == ["slow"]
+    assert [p["project_id"] for p in rollup["projects"]] == ["medium", "cheap"]
+    assert rollup["project_count"] == 3
+    assert "not finished within the time budget (1):** slow" in format_rollup(rollup)
+
+
+class PartialAnalyzer(FakeAnalyzer):
+    def get_infrastructure_summary(self) -> dict:
+        summary = super().get_infrastructure_summary()
+        if self.project_id == "pricey":
+            summary.update(partial=True, missing=["sqladmin.googleapis.com/Instance"])
+        return summary
+
+    def get_google_recommendations(self, filter: str = "") -> dict:
+        data = super().get_google_recommendations(filter)
+        if self.project_id == "cheap":
+            data.update(partial=True, missing=["global/google.iam.policy.Recommender"])
+        if self.project_id == "medium":
+            data.update(partial=True, stale=["global/google.iam.policy.Recommender"])
+        return data
+
+
+def test_sweep_flags_projects_with_partial_results() -> None:
+    rollup = InfrastructureSweep(analyzer_factory=PartialAnalyzer).run(["cheap", "pricey", "medium"])
+    assert rollup["partial"] == ["cheap", "pricey", "medium"]
+    flags = {p["project_id"]: (p["partial"], p["missing_asset_types"], p["missing_recommenders"])
+             for p in rollup["projects"]}
+    assert flags == {"pricey": (True, ["sqladmin.googleapis.com/Instance"], 0),
+                     "medium": (True, [], 0), "cheap": (True, [], 1)}
+    text = format_rollup(rollup)
+    assert "partial results (3)" in text
+    assert "medium: 1 recommender/location pairs served from a stored copy" in text
+    assert "pricey: asset types not listed: sqladmin.googleapis.com/Instance" in text
+    assert "cheap: 1 recommender/location pairs not checked" in text